@@ -11,6 +11,10 @@ python3 manage.py collectstatic --noinput
 echo "Running Populate Script..."
 python3 manage.py populate
 
-python3 manage.py runserver 0.0.0.0:8000
+if [ "$DJANGO_SERVER" = "asgi" ]; then
+    uvicorn erp_system.asgi:application --host 0.0.0.0 --port 8000 --workers "${WEB_CONCURRENCY:-2}"
+else
+    python3 manage.py runserver 0.0.0.0:8000
+fi
 # Execute CMD from Dockerfile
 exec "$@"
@@ -0,0 +1,88 @@
+"""Async read endpoints for ASGI deployments.
+
+``AsyncAPIView`` is a plain async Django view that borrows the policies of a
+DRF view: the request is authenticated, permission-checked and throttled by
+that view's ``initial()`` (run in a worker thread, as JWT authentication reads
+the user from the database), and errors are answered by its exception handler.
+The handlers then read with the async ORM (``acount``, ``aget``, ``aiterator``)
+and hold no worker thread while they wait on the database or sleep, which is
+what long polls and slow reports need under ASGI. Under WSGI they still work,
+each on its own event loop, but tie up the worker like a sync view.
+
+Responses are rendered with ``FastJSONRenderer`` and match the sync endpoints'.
+"""
+
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
+from django.views import View
+from rest_framework.exceptions import NotFound
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+from rest_framework.views import APIView
+
+from erp.renderers import FastJSONRenderer
+
+
+def json_response(data, status: int = 200, headers=None) -> HttpResponse:
+    return HttpResponse(
+        FastJSONRenderer().render(data), status=status, headers=headers, content_type="application/json"
+    )
+
+
+def _headers(response) -> dict:
+    """Headers of a DRF response to carry over, such as WWW-Authenticate, ETag or X-Cache."""
+    return {name: value for name, value in response.items() if name.lower() != "content-type"}
+
+
+class AsyncAPIView(View):
+    # The DRF view whose authentication, permissions, throttles and sync handlers apply
+    api_view: type[APIView]
+    api_view_initkwargs: dict = {}
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.view = view = self.api_view(**self.api_view_initkwargs)
+        view.args, view.kwargs = args, kwargs
+        view.request = view.initialize_request(request, *args, **kwargs)
+        view.headers = view.default_response_headers
+        try:
+            await sync_to_async(view.initial)(view.request, *args, **kwargs)
+            return await super().dispatch(view.request, *args, **kwargs)
+        except Exception as exc:
+            response = view.handle_exception(exc)
+            return json_response(response.data, response.status_code, headers=_headers(response))
+
+    async def sync_response(self, handler, *args, **kwargs) -> HttpResponse:
+        """Answers with a handler of the sync view, for requests the async path does not cover."""
+        response = await sync_to_async(handler)(self.view.request, *args, **kwargs)
+        return json_response(response.data, response.status_code, headers=_headers(response))
+
+    async def paginate(self, request, queryset, render) -> dict:
+        """The sync view's page-number pagination over the async ORM: one ``acount()``
+        and one page query, whose rows ``render`` (a coroutine function) turns into results."""
+        paginator = self.view.paginator
+        page_size = paginator.get_page_size(request)
+        count = await queryset.acount()
+        pages = max(1, -(-count // page_size))
+        number = request.query_params.get(paginator.page_query_param) or 1
+        if number in paginator.last_page_strings:
+            number = pages
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            number = 0
+        if not 1 <= number <= pages:
+            raise NotFound(paginator.invalid_page_message)
+
+        start = (number - 1) * page_size
+        rows = [row async for row in queryset[start : start + page_size].aiterator()]
+        url = request.build_absolute_uri()
+        previous = None
+        if number == 2:
+            previous = remove_query_param(url, paginator.page_query_param)
+        elif number > 2:
+            previous = replace_query_param(url, paginator.page_query_param, number - 1)
+        return {
+            "count": count,
+            "next": replace_query_param(url, paginator.page_query_param, number + 1) if number < pages else None,
+            "previous": previous,
+            "results": await render(rows),
+        }
@@ -0,0 +1,109 @@
+"""Composite requests: several API calls answered in one HTTP round trip.
+
+Each sub-request is resolved against the URLconf and dispatched straight to its
+DRF view, so the middleware stack runs once for the whole batch. Sub-requests
+are force-authenticated as the user the batch request authenticated (one JWT
+check) and share that user object, so the permission caches Django keeps on it
+(``get_all_permissions``, ``caching.permission_set``) are filled once.
+
+Read-only batches can run concurrently on a small thread pool. Each thread uses
+its own database connection and closes it when its sub-request is done.
+Sub-requests that write run in order, each on its own like a separate call.
+"""
+
+import io
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.handlers.wsgi import WSGIRequest
+from django.db import connections
+from django.urls import Resolver404, resolve
+from rest_framework.views import APIView
+
+from erp.renderers import FastJSONRenderer
+
+MAX_SUBREQUESTS = 20
+MAX_WORKERS = 4
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+def _error(status: int, detail: str) -> dict:
+    return {"status": status, "headers": {}, "body": {"detail": detail}}
+
+
+def _subrequest(request, method: str, path: str, query: str, body, headers) -> WSGIRequest:
+    content = b"" if body is None else FastJSONRenderer().render(body)
+    # Keep the server and client details of the batch request, not its body or validators
+    environ = {
+        key: value
+        for key, value in request.META.items()
+        if not key.startswith(("CONTENT_", "HTTP_IF_", "wsgi."))
+    }
+    environ.update(
+        {
+            "REQUEST_METHOD": method,
+            "PATH_INFO": path,
+            "QUERY_STRING": query,
+            "CONTENT_TYPE": "application/json",
+            "CONTENT_LENGTH": str(len(content)),
+            "wsgi.input": io.BytesIO(content),
+            "wsgi.url_scheme": request.scheme,
+        }
+    )
+    for name, value in (headers or {}).items():
+        environ["HTTP_" + name.upper().replace("-", "_")] = value
+
+    subrequest = WSGIRequest(environ)
+    subrequest.user = request.user
+    # Picked up by DRF's Request: authenticate as the batch's user without running JWT again
+    subrequest._force_auth_user = request.user
+    subrequest._force_auth_token = request.auth
+    return subrequest
+
+
+def _body(response):
+    if hasattr(response, "data"):
+        return response.data
+    if not response.content:
+        return None
+    if response.get("Content-Type", "").startswith("application/json"):
+        return json.loads(response.content)
+    return response.content.decode(response.charset)
+
+
+def dispatch(request, path: str, method: str = "GET", body=None, headers=None) -> dict:
+    """Run one sub-request of ``request`` and return its status, headers and body."""
+    path, _, query = path.partition("?")
+    try:
+        match = resolve(path)
+    except Resolver404:
+        return _error(404, "Not found.")
+    view_class = getattr(match.func, "cls", None)
+    if view_class is None or not issubclass(view_class, APIView) or not getattr(view_class, "batchable", True):
+        return _error(400, "This endpoint cannot be called in a batch.")
+
+    subrequest = _subrequest(request, method, path, query, body, headers)
+    subrequest.resolver_match = match
+    response = match.func(subrequest, *match.args, **match.kwargs)
+    return {
+        "status": response.status_code,
+        "headers": dict(response.items()),
+        "body": _body(response),
+    }
+
+
+def _dispatch_in_thread(request, subrequest: dict) -> dict:
+    try:
+        return dispatch(request, **subrequest)
+    finally:
+        connections.close_all()
+
+
+def run_batch(request, subrequests: list, concurrent: bool = False) -> list:
+    """Results of ``subrequests`` in order. Only read-only batches run concurrently;
+    a batch with a write runs in order even when ``concurrent`` is set."""
+    writes = any(subrequest.get("method", "GET") not in SAFE_METHODS for subrequest in subrequests)
+    if not concurrent or writes or len(subrequests) < 2:
+        return [dispatch(request, **subrequest) for subrequest in subrequests]
+    with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(subrequests))) as executor:
+        return list(executor.map(lambda subrequest: _dispatch_in_thread(request, subrequest), subrequests))
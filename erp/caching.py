@@ -0,0 +1,137 @@
+"""Read-through cache for hot read endpoints.
+
+Responses are cached in the default cache (Redis in production, locmem in
+tests) under a key built from the endpoint, the query parameters, the user's
+permission set and a generation counter per model the endpoint reads. Saving
+or deleting one of those models bumps its generation (see ``erp.signals``, and
+the bulk writers that bypass signals), so the old entries are never read again
+and simply expire. Hits and misses are counted per endpoint for the hit ratio.
+"""
+
+import hashlib
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework.response import Response
+
+PREFIX = "response-cache"
+DEFAULT_TIMEOUT = 300
+# Endpoint names of every cached view, for the statistics
+ENDPOINTS: set[str] = set()
+
+
+def _generation_key(model) -> str:
+    return f"{PREFIX}:generation:{model._meta.label_lower}"
+
+
+def _bump(keys) -> None:
+    for key in keys:
+        try:
+            cache.incr(key)
+        except ValueError:
+            # Missing counters restart from the clock so they never repeat an old value
+            cache.set(key, time.time_ns(), None)
+
+
+def bump_generation(*models) -> None:
+    """Invalidate every cached response that depends on ``models``, now and once
+    the current transaction commits (a read in between may have cached old rows)."""
+    keys = [_generation_key(model) for model in models]
+    _bump(keys)
+    transaction.on_commit(lambda: _bump(keys))
+
+
+def generations(models) -> list:
+    keys = [_generation_key(model) for model in models]
+    values = cache.get_many(keys)
+    for key in keys:
+        if key not in values:
+            cache.add(key, time.time_ns(), None)
+            values[key] = cache.get(key)
+    return [values[key] for key in keys]
+
+
+def permission_set(user) -> str:
+    if not user or not user.is_authenticated:
+        return "anonymous"
+    if user.is_superuser:
+        return "superuser"
+    return ",".join(sorted(user.get_all_permissions()))
+
+
+def response_key(endpoint: str, request, models) -> str:
+    parts = [
+        request.path,
+        sorted(request.query_params.lists()),
+        permission_set(request.user),
+        generations(models),
+    ]
+    digest = hashlib.md5(repr(parts).encode(), usedforsecurity=False).hexdigest()
+    return f"{PREFIX}:{endpoint}:{digest}"
+
+
+def record(endpoint: str, hit: bool) -> None:
+    key = f"{PREFIX}:stats:{endpoint}:{'hits' if hit else 'misses'}"
+    if not cache.add(key, 1, None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, None)
+
+
+def cache_stats() -> dict:
+    """Hits, misses and hit ratio of each cached endpoint."""
+    keys = [f"{PREFIX}:stats:{endpoint}:{kind}" for endpoint in sorted(ENDPOINTS) for kind in ("hits", "misses")]
+    counts = cache.get_many(keys)
+    stats = {}
+    for endpoint in sorted(ENDPOINTS):
+        hits = counts.get(f"{PREFIX}:stats:{endpoint}:hits", 0)
+        misses = counts.get(f"{PREFIX}:stats:{endpoint}:misses", 0)
+        stats[endpoint] = {
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": round(hits / (hits + misses), 4) if hits + misses else None,
+        }
+    return stats
+
+
+class CachedResponseMixin:
+    """
+    Serves ``list`` and ``retrieve`` from the response cache. ``cache_models``
+    names the models whose changes invalidate the view's entries.
+    """
+
+    cache_models: tuple = ()
+    cache_timeout = DEFAULT_TIMEOUT
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        ENDPOINTS.add(cls.__name__)
+
+    def cache_lookup(self, action_name: str, request) -> tuple:
+        """The cache key of a request and its cached data (None on a miss), counted as a hit or miss."""
+        endpoint = type(self).__name__
+        key = response_key(f"{endpoint}:{action_name}", request, self.cache_models)
+        entry = cache.get(key)
+        record(endpoint, hit=entry is not None)
+        return key, entry
+
+    def cached(self, action, request, *args, **kwargs):
+        key, entry = self.cache_lookup(action.__name__, request)
+        if entry is not None:
+            response = Response(entry)
+            response["X-Cache"] = "HIT"
+            return response
+
+        response = action(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(key, response.data, self.cache_timeout)
+        response["X-Cache"] = "MISS"
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.cached(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached(super().retrieve, request, *args, **kwargs)
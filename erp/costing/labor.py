@@ -0,0 +1,214 @@
+"""Labor hours and cost over many shifts at once.
+
+Two equivalent paths: ``labor_summary`` pulls shift columns with ``values_list``
+into NumPy arrays, ``labor_summary_sql`` lets the database aggregate. Both
+compute hours exactly like ``Shift.shift_hours()``: end minus start, wrapped past
+midnight for overnight shifts, minus the break. Overtime minutes are paid on top
+at OVERTIME_RATE_MULTIPLIER.
+"""
+
+from decimal import Decimal
+
+import numpy as np
+from django.conf import settings
+from django.db.models import Case, Count, F, FloatField, IntegerField, Sum, Value, When
+from django.db.models.functions import (
+    Cast,
+    Coalesce,
+    ExtractHour,
+    ExtractMinute,
+    ExtractSecond,
+    TruncDay,
+    TruncMonth,
+    TruncYear,
+)
+
+from erp.models import Shift
+
+SECONDS_PER_DAY = 86400
+GROUP_FIELDS = {
+    "employee": "employee_id",
+    "workstation": "workstation_id",
+    "manufacturing_order": "manufacturing_order_id",
+}
+PERIODS = {"day": "D", "month": "M", "year": "Y"}
+PERIOD_FUNCTIONS = {"day": TruncDay, "month": TruncMonth, "year": TruncYear}
+
+
+def overtime_rate_multiplier() -> float:
+    return float(getattr(settings, "OVERTIME_RATE_MULTIPLIER", 1.5))
+
+
+def seconds_of_day(field: str):
+    """SQL expression for a TimeField as whole seconds after midnight."""
+    return ExtractHour(field) * 3600 + ExtractMinute(field) * 60 + ExtractSecond(field)
+
+
+def shift_hours_array(start_seconds, end_seconds, break_minutes) -> np.ndarray:
+    """Vectorized ``Shift.shift_hours()`` over seconds-after-midnight arrays."""
+    elapsed = (np.asarray(end_seconds) - np.asarray(start_seconds)) % SECONDS_PER_DAY
+    return (elapsed.astype(np.float64) / 60 - np.asarray(break_minutes)) / 60
+
+
+def shift_arrays(shifts=None) -> dict:
+    """Columns needed for labor calculations as NumPy arrays, one element per shift."""
+    if shifts is None:
+        shifts = Shift.objects.all()
+    rows = list(
+        shifts.annotate(start=seconds_of_day("start_time"), end=seconds_of_day("end_time"))
+        .order_by()
+        .values_list(
+            "id",
+            "employee_id",
+            "workstation_id",
+            "manufacturing_order_id",
+            "shift_date",
+            "start",
+            "end",
+            "break_minutes",
+            "overtime_minutes",
+            "employee__hourly_rate",
+        )
+    )
+    (
+        ids,
+        employee_ids,
+        workstation_ids,
+        order_ids,
+        dates,
+        start,
+        end,
+        breaks,
+        overtime,
+        rates,
+    ) = zip(*rows) if rows else ([],) * 10
+
+    return {
+        "id": np.array(ids, dtype=np.int64),
+        # -1 stands in for a missing foreign key
+        "employee_id": np.array(employee_ids, dtype=np.int64),
+        "workstation_id": np.array([w if w is not None else -1 for w in workstation_ids], dtype=np.int64),
+        "manufacturing_order_id": np.array(order_ids, dtype=np.int64),
+        "shift_date": np.array(dates, dtype="datetime64[D]"),
+        "start": np.array(start, dtype=np.int64),
+        "end": np.array(end, dtype=np.int64),
+        "break_minutes": np.array(breaks, dtype=np.int64),
+        "overtime_minutes": np.array(overtime, dtype=np.int64),
+        "hourly_rate": np.array([float(r) if r is not None else 0.0 for r in rates]),
+    }
+
+
+def labor_arrays(shifts=None) -> dict:
+    """Per-shift hours, overtime hours and cost."""
+    columns = shift_arrays(shifts)
+    hours = shift_hours_array(columns["start"], columns["end"], columns["break_minutes"])
+    overtime_hours = columns["overtime_minutes"] / 60
+    columns["hours"] = hours
+    columns["overtime_hours"] = overtime_hours
+    columns["cost"] = (
+        hours + overtime_hours * overtime_rate_multiplier()
+    ) * columns["hourly_rate"]
+    return columns
+
+
+def _group_keys(columns: dict, group_by) -> list:
+    keys = []
+    for name in group_by:
+        if name in GROUP_FIELDS:
+            keys.append(columns[GROUP_FIELDS[name]])
+        elif name in PERIODS:
+            period = columns["shift_date"].astype(f"datetime64[{PERIODS[name]}]")
+            keys.append(period.astype("datetime64[D]").astype(np.int64))
+        else:
+            raise ValueError(f"Unknown labor grouping: {name}")
+    return keys
+
+
+def _key_value(name: str, value):
+    if name in PERIODS:
+        return np.datetime64(int(value), "D").tolist()
+    return None if value == -1 else int(value)
+
+
+def labor_summary(shifts=None, group_by=("employee",)) -> list:
+    """Hours, overtime hours and cost aggregated by any of employee, workstation,
+    manufacturing_order and one period (day, month, year)."""
+    columns = labor_arrays(shifts)
+    if not len(columns["id"]):
+        return []
+
+    keys, inverse = np.unique(
+        np.stack(_group_keys(columns, group_by), axis=1), axis=0, return_inverse=True
+    )
+    inverse = inverse.ravel()
+    totals = {
+        field: np.bincount(inverse, weights=columns[field])
+        for field in ("hours", "overtime_hours", "cost")
+    }
+    shift_counts = np.bincount(inverse)
+
+    return [
+        {
+            **{name: _key_value(name, key[i]) for i, name in enumerate(group_by)},
+            "shifts": int(shift_counts[row]),
+            "hours": float(totals["hours"][row]),
+            "overtime_hours": float(totals["overtime_hours"][row]),
+            "cost": Decimal(f"{totals['cost'][row]:.2f}"),
+        }
+        for row, key in enumerate(keys)
+    ]
+
+
+def annotate_labor(shifts):
+    """Annotate ``hours``, ``overtime_hours`` and ``cost`` per shift in SQL."""
+    start = seconds_of_day("start_time")
+    end = seconds_of_day("end_time")
+    elapsed = Case(
+        When(end_time__lt=F("start_time"), then=end - start + SECONDS_PER_DAY),
+        default=end - start,
+        output_field=IntegerField(),
+    )
+    hours = (Cast(elapsed, FloatField()) / Value(60.0) - F("break_minutes")) / Value(60.0)
+    overtime_hours = Cast("overtime_minutes", FloatField()) / Value(60.0)
+    rate = Coalesce(Cast("employee__hourly_rate", FloatField()), Value(0.0))
+    return shifts.annotate(hours=hours, overtime_hours=overtime_hours).annotate(
+        cost=(F("hours") + F("overtime_hours") * Value(overtime_rate_multiplier())) * rate
+    )
+
+
+def labor_summary_sql(shifts=None, group_by=("employee",)) -> list:
+    """Same result as ``labor_summary`` with the aggregation done by the database."""
+    if shifts is None:
+        shifts = Shift.objects.all()
+
+    fields, periods = [], {}
+    for name in group_by:
+        if name in GROUP_FIELDS:
+            fields.append(GROUP_FIELDS[name])
+        elif name in PERIOD_FUNCTIONS:
+            periods[name] = PERIOD_FUNCTIONS[name]("shift_date")
+        else:
+            raise ValueError(f"Unknown labor grouping: {name}")
+
+    rows = (
+        annotate_labor(shifts)
+        .order_by()
+        .values(*fields, **periods)
+        .annotate(
+            shifts=Count("id"),
+            total_hours=Sum("hours"),
+            total_overtime_hours=Sum("overtime_hours"),
+            total_cost=Sum("cost"),
+        )
+        .order_by(*fields, *periods)
+    )
+    return [
+        {
+            **{name: row[GROUP_FIELDS.get(name, name)] for name in group_by},
+            "shifts": row["shifts"],
+            "hours": row["total_hours"],
+            "overtime_hours": row["total_overtime_hours"],
+            "cost": Decimal(f"{row['total_cost']:.2f}"),
+        }
+        for row in rows
+    ]
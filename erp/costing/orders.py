@@ -0,0 +1,169 @@
+"""Actual production cost of completed manufacturing orders.
+
+production_cost = material + labor + maintenance, where
+
+* material: order quantity x BOM components at the cheapest preferred
+  SupplierProduct.unit_cost, falling back to Product.unit_cost;
+* labor: worked shift hours x Employee.hourly_rate (see erp.costing.labor);
+* maintenance: the order's hours on each workstation x that workstation's
+  maintenance cost per worked hour over the costing period.
+"""
+
+import datetime
+import logging
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db.models import (
+    DecimalField,
+    Exists,
+    ExpressionWrapper,
+    F,
+    OuterRef,
+    Q,
+    Subquery,
+    Sum,
+    Value,
+)
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from erp.costing.labor import annotate_labor
+from erp.models import (
+    BOMItem,
+    MaintenanceActivity,
+    ManufacturingOrder,
+    Shift,
+    SupplierProduct,
+)
+
+logger = logging.getLogger(__name__)
+
+CENTS = Decimal("0.01")
+UNWORKED_SHIFT_STATUSES = ["ABSENT", "CANCELLED"]
+MONEY = DecimalField(max_digits=12, decimal_places=2)
+
+
+def orders_to_cost(start: datetime.date, end: datetime.date, force: bool = False):
+    """Orders completed in the period that were never costed or changed since."""
+    orders = ManufacturingOrder.objects.filter(
+        status="COMPLETED",
+        actual_completion__gte=start,
+        actual_completion__lte=end,
+    )
+    if force:
+        return orders
+    changed_shifts = Shift.objects.filter(
+        manufacturing_order=OuterRef("pk"), updated_at__gt=OuterRef("cost_computed_at")
+    )
+    return orders.filter(
+        Q(cost_computed_at__isnull=True)
+        | Q(updated_at__gt=F("cost_computed_at"))
+        | Exists(changed_shifts)
+    )
+
+
+def material_cost_per_unit(product_ids) -> dict:
+    """BOM material cost of one unit, per product id."""
+    preferred_cost = (
+        SupplierProduct.objects.filter(product=OuterRef("component_id"), is_preferred=True)
+        .order_by("unit_cost")
+        .values("unit_cost")[:1]
+    )
+    component_cost = Coalesce(
+        Subquery(preferred_cost), F("component__unit_cost"), Value(Decimal("0")), output_field=MONEY
+    )
+    rows = (
+        BOMItem.objects.filter(bom__product_id__in=product_ids, bom__is_active=True)
+        .order_by()
+        .values("bom__product_id")
+        .annotate(
+            material=Sum(
+                ExpressionWrapper(F("quantity_required") * component_cost, output_field=MONEY)
+            )
+        )
+    )
+    return {row["bom__product_id"]: Decimal(row["material"]) for row in rows}
+
+
+def maintenance_rate_per_hour(start: datetime.date, end: datetime.date) -> dict:
+    """Maintenance cost per worked shift hour, per workstation id, over the period."""
+    costs = (
+        MaintenanceActivity.objects.filter(
+            start_datetime__date__gte=start, start_datetime__date__lte=end, cost__isnull=False
+        )
+        .exclude(status="CANCELLED")
+        .order_by()
+        .values("workstation_id")
+        .annotate(total=Sum("cost"))
+    )
+    costs = {row["workstation_id"]: Decimal(row["total"]) for row in costs}
+    if not costs:
+        return {}
+
+    hours = (
+        annotate_labor(
+            Shift.objects.filter(
+                workstation_id__in=costs, shift_date__gte=start, shift_date__lte=end
+            ).exclude(status__in=UNWORKED_SHIFT_STATUSES)
+        )
+        .order_by()
+        .values("workstation_id")
+        .annotate(total_hours=Sum("hours"))
+    )
+    return {
+        row["workstation_id"]: costs[row["workstation_id"]] / Decimal(f"{row['total_hours']}")
+        for row in hours
+        if row["total_hours"]
+    }
+
+
+def cost_manufacturing_orders(
+    start: datetime.date, end: datetime.date, force: bool = False
+) -> int:
+    """Fill ``production_cost`` for orders completed between ``start`` and ``end``.
+
+    Re-running only recosts orders that are new or changed since the last run,
+    unless ``force`` is set.
+    """
+    computed_at = timezone.now()
+    pending = orders_to_cost(start, end, force)
+    orders = list(pending.only("id", "product_id", "quantity"))
+    if not orders:
+        return 0
+
+    material = material_cost_per_unit(pending.values("product_id"))
+    maintenance_rates = maintenance_rate_per_hour(start, end)
+
+    labor: dict[int, Decimal] = defaultdict(Decimal)
+    maintenance: dict[int, Decimal] = defaultdict(Decimal)
+    shifts = (
+        annotate_labor(
+            Shift.objects.filter(manufacturing_order__in=pending.values("pk"))
+            .exclude(status__in=UNWORKED_SHIFT_STATUSES)
+        )
+        .order_by()
+        .values("manufacturing_order_id", "workstation_id")
+        .annotate(total_hours=Sum("hours"), total_cost=Sum("cost"))
+    )
+    for row in shifts:
+        order_id = row["manufacturing_order_id"]
+        labor[order_id] += Decimal(f"{row['total_cost']}")
+        rate = maintenance_rates.get(row["workstation_id"])
+        if rate:
+            maintenance[order_id] += rate * Decimal(f"{row['total_hours']}")
+
+    for order in orders:
+        cost = (
+            material.get(order.product_id, Decimal("0")) * order.quantity
+            + labor[order.id]
+            + maintenance[order.id]
+        )
+        order.production_cost = cost.quantize(CENTS)
+        order.cost_computed_at = computed_at
+
+    ManufacturingOrder.objects.bulk_update(
+        orders, ["production_cost", "cost_computed_at"], batch_size=1000
+    )
+    logger.info(f"Costed {len(orders)} manufacturing orders completed {start}..{end}")
+    return len(orders)
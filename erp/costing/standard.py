@@ -0,0 +1,131 @@
+"""Multi-level standard cost rollup over the BOM graph.
+
+The whole graph of active FIN/WIP bills of materials is loaded with one query.
+Products are then costed in descending low-level code (deepest components
+first), so every component is costed before the assemblies that use it,
+without recursing per product.
+"""
+
+import logging
+from collections import defaultdict, deque
+from decimal import Decimal
+
+from django.db import transaction
+from django.utils import timezone
+
+from erp import caching
+from erp.models import BOMItem, Product, ProductCostHistory
+
+logger = logging.getLogger(__name__)
+
+CENTS = Decimal("0.01")
+ROLLED_UP_CATEGORIES = ["FIN", "WIP"]
+
+
+class BOMCycleError(ValueError):
+    pass
+
+
+class BOMGraph:
+    """Components and where-used index of every active FIN/WIP bill of materials."""
+
+    def __init__(self, edges):
+        self.components = defaultdict(list)  # parent -> [(component, quantity)]
+        self.where_used = defaultdict(set)  # component -> {parents}
+        for parent_id, component_id, quantity in edges:
+            self.components[parent_id].append((component_id, quantity))
+            self.where_used[component_id].add(parent_id)
+        self.low_level_codes = self._low_level_codes()
+
+    @classmethod
+    def load(cls) -> "BOMGraph":
+        return cls(
+            BOMItem.objects.filter(
+                bom__is_active=True, bom__product__category__in=ROLLED_UP_CATEGORIES
+            ).values_list("bom__product_id", "component_id", "quantity_required")
+        )
+
+    def _low_level_codes(self) -> dict:
+        """Deepest level each product appears at, 0 for top-level assemblies."""
+        nodes = set(self.components) | set(self.where_used)
+        pending_parents = {node: len(self.where_used.get(node, ())) for node in nodes}
+        codes = {node: 0 for node in nodes}
+        queue = deque(node for node, count in pending_parents.items() if count == 0)
+
+        visited = 0
+        while queue:
+            parent = queue.popleft()
+            visited += 1
+            for component in {component for component, _ in self.components.get(parent, ())}:
+                codes[component] = max(codes[component], codes[parent] + 1)
+                pending_parents[component] -= 1
+                if pending_parents[component] == 0:
+                    queue.append(component)
+
+        if visited != len(nodes):
+            cyclic = sorted(node for node, count in pending_parents.items() if count > 0)
+            raise BOMCycleError(f"Bill of materials cycle through products {cyclic}")
+        return codes
+
+    def ancestors(self, product_ids) -> set:
+        """Every assembly that directly or indirectly uses one of ``product_ids``."""
+        found = set()
+        queue = deque(product_ids)
+        while queue:
+            for parent in self.where_used.get(queue.popleft(), ()):
+                if parent not in found:
+                    found.add(parent)
+                    queue.append(parent)
+        return found
+
+    def costing_order(self, product_ids) -> list:
+        """Assemblies among ``product_ids`` ordered deepest first."""
+        assemblies = [pid for pid in product_ids if pid in self.components]
+        return sorted(assemblies, key=lambda pid: -self.low_level_codes[pid])
+
+
+def rollup_standard_costs(changed_product_ids=None, graph: BOMGraph | None = None) -> int:
+    """Recompute ``unit_cost`` of FIN/WIP products from their components.
+
+    With ``changed_product_ids`` only the assemblies that use those products are
+    recosted. Returns the number of products whose cost changed.
+    """
+    graph = graph or BOMGraph.load()
+    if changed_product_ids is None:
+        targets = graph.costing_order(graph.components)
+    else:
+        targets = graph.costing_order(graph.ancestors(changed_product_ids))
+    if not targets:
+        return 0
+
+    needed = set(targets)
+    for parent in targets:
+        needed.update(component for component, _ in graph.components[parent])
+    costs = dict(Product.objects.filter(id__in=needed).values_list("id", "unit_cost"))
+
+    changed = {}
+    for parent in targets:
+        cost = sum(
+            (quantity * (costs.get(component) or 0) for component, quantity in graph.components[parent]),
+            Decimal("0"),
+        ).quantize(CENTS)
+        if cost != costs.get(parent):
+            changed[parent] = (costs.get(parent), cost)
+            costs[parent] = cost
+
+    if not changed:
+        return 0
+
+    now = timezone.now()
+    products = [Product(id=pid, unit_cost=new, updated_at=now) for pid, (_, new) in changed.items()]
+    history = [
+        ProductCostHistory(product_id=pid, previous_cost=old, unit_cost=new, changed_at=now)
+        for pid, (old, new) in changed.items()
+    ]
+    with transaction.atomic():
+        Product.objects.bulk_update(products, ["unit_cost", "updated_at"], batch_size=1000)
+        ProductCostHistory.objects.bulk_create(history, batch_size=1000)
+        caching.bump_generation(Product)
+
+    logger.info(f"Rolled up standard cost of {len(targets)} products, {len(changed)} changed")
+    return len(changed)
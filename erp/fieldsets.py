@@ -0,0 +1,131 @@
+"""Sparse fieldsets for the API viewsets.
+
+``?fields=id,name`` narrows a list or detail response to those fields and
+``?expand=customer`` nests a related object (or list) in place of its id. The
+query is narrowed with the response: ``.only()`` loads just the columns behind
+the requested fields, and the prefetches and annotations a viewset declares
+per field are only applied when that field is part of the response.
+
+Fields whose value cannot be traced to a column (serializer methods, model
+properties) are served from full rows rather than deferred ones, which would
+cost one query per row.
+"""
+
+from typing import Any, Callable, NamedTuple
+
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.serializers import ListSerializer
+
+
+class Fieldset(NamedTuple):
+    fields: list  # Serializer fields in the response
+    expand: list  # Relations nested in the response
+    narrowed: bool  # Whether ?fields= was given
+    serializer_fields: dict
+
+
+def _names(value: str) -> list:
+    return [name.strip() for name in value.split(",") if name.strip()]
+
+
+class SparseFieldsetMixin:
+    """
+    ``field_prefetches`` and ``field_annotations`` map a serializer field to the
+    prefetch lookup or expression it is computed from; ``expandable_fields``
+    maps a relation to the serializer used to expand it.
+    """
+
+    field_prefetches: dict[str, Any] = {}
+    field_annotations: dict[str, Any] = {}
+    expandable_fields: dict[str, Any] = {}
+
+    # Provided by the GenericAPIView this is mixed into
+    request: Any
+    get_serializer_class: Callable
+    get_serializer_context: Callable
+
+    def sparse_fieldset(self) -> Fieldset:
+        """The fields and expansions of the request, validated once."""
+        if not hasattr(self, "_sparse_fieldset"):
+            self._sparse_fieldset = self.parse_sparse_fieldset()
+        return self._sparse_fieldset
+
+    def parse_sparse_fieldset(self) -> Fieldset:
+        serializer_fields = self.get_serializer_class()(context=self.get_serializer_context()).fields
+        available = list(serializer_fields)
+        if self.request is None or self.request.method not in SAFE_METHODS:
+            return Fieldset(available, [], False, serializer_fields)
+
+        params = self.request.query_params
+        expand = _names(params.get("expand", ""))
+        if set(expand) - set(self.expandable_fields):
+            raise ValidationError({"expand": [f"Choose from: {', '.join(self.expandable_fields)}"]})
+        available += [name for name in expand if name not in available]
+        if "fields" not in params:
+            return Fieldset(available, expand, False, serializer_fields)
+
+        fields = _names(params["fields"])
+        if not fields or set(fields) - set(available):
+            raise ValidationError({"fields": [f"Choose from: {', '.join(available)}"]})
+        fields += [name for name in expand if name not in fields]
+        return Fieldset(fields, expand, True, serializer_fields)
+
+    def sparse_columns(self, model, fieldset: Fieldset):
+        """Columns behind the fields, or None when some field needs the whole row."""
+        columns = {model._meta.pk.name}
+        for name in fieldset.fields:
+            if name in self.field_annotations or name in self.field_prefetches:
+                continue
+            field = fieldset.serializer_fields.get(name)
+            source = field.source_attrs if field is not None else [name]
+            if not source:
+                return None
+            try:
+                model_field = model._meta.get_field(source[0])
+            except FieldDoesNotExist:
+                return None
+            if model_field.concrete and not model_field.many_to_many:
+                columns.add(model_field.name)
+        return columns
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        fieldset = self.sparse_fieldset()
+
+        for name, annotation in self.field_annotations.items():
+            if name in fieldset.fields:
+                queryset = queryset.annotate(**{name: annotation})
+        for name, lookup in self.field_prefetches.items():
+            if name in fieldset.fields:
+                queryset = queryset.prefetch_related(lookup)
+        for name in fieldset.expand:
+            relation = queryset.model._meta.get_field(name)
+            if relation.many_to_one or (relation.one_to_one and relation.concrete):
+                queryset = queryset.select_related(name)
+            else:
+                queryset = queryset.prefetch_related(name)
+
+        if fieldset.narrowed:
+            columns = self.sparse_columns(queryset.model, fieldset)
+            if columns is not None:
+                queryset = queryset.only(*columns)
+        return queryset
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        fieldset = self.sparse_fieldset()
+        if not fieldset.narrowed and not fieldset.expand:
+            return serializer
+
+        child = serializer.child if isinstance(serializer, ListSerializer) else serializer
+        for name in list(child.fields):
+            if name not in fieldset.fields:
+                child.fields.pop(name)
+        model = child.Meta.model
+        for name in fieldset.expand:
+            relation = model._meta.get_field(name)
+            many = relation.one_to_many or relation.many_to_many
+            child.fields[name] = self.expandable_fields[name](many=many, read_only=True)
+        return serializer
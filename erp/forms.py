@@ -2,8 +2,29 @@ from django import forms
 
 from erp.models import Invoice, SalesOrder, SalesOrderItem
 
+
+class SalesOrderItemForm(forms.ModelForm):
+    """Order line whose price and discount may be left empty to use the customer's price list"""
+
+    class Meta:
+        model = SalesOrderItem
+        exclude: list[str] = []
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields["unit_price"].required = False
+        self.fields["unit_price"].help_text = "Leave empty to use the customer's price list"
+        self.fields["discount_percentage"].required = False
+
+    def clean(self):
+        cleaned_data = super().clean()
+        if cleaned_data.get("unit_price") is not None and cleaned_data.get("discount_percentage") is None:
+            cleaned_data["discount_percentage"] = 0
+        return cleaned_data
+
+
 SalesOrderFormSet = forms.inlineformset_factory(
-    SalesOrder, SalesOrderItem, extra=2, exclude=[]
+    SalesOrder, SalesOrderItem, form=SalesOrderItemForm, extra=2, exclude=[]
 )
 
 
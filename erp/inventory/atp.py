@@ -0,0 +1,199 @@
+"""Available-to-promise (ATP) per product.
+
+A product's timeline starts with on-hand stock today. Open sales order lines are
+subtracted at their requested delivery, and scheduled manufacturing output and
+open purchase order receipts are added at their expected dates. The quantity
+promisable on a date is the lowest projected balance from that date onwards, so
+a new order can never take stock already promised to a later one.
+
+Timelines are cached per product and dropped by signals when one of their
+inputs changes, so only affected products are rebuilt.
+"""
+
+import datetime
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import NamedTuple
+
+from django.core.cache import cache
+from django.db.models import F, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from erp.models import (
+    ManufacturingOrder,
+    ProductInventory,
+    PurchaseOrderItem,
+    SalesOrderItem,
+)
+
+CACHE_PREFIX = "atp:timeline:"
+CACHE_TIMEOUT = 60 * 60
+OPEN_SALES_STATUSES = ["CONFIRMED", "PROCESSING", "READY", "PARTIAL"]
+SCHEDULED_PRODUCTION_STATUSES = ["PLANNED", "MATERIAL_PENDING", "READY", "IN_PROGRESS", "ON_HOLD"]
+OPEN_PURCHASE_STATUSES = ["APPROVED", "ORDERED", "PARTIAL"]
+
+
+@dataclass
+class Timeline:
+    """Projected balance per date with the running minimum from each date onwards."""
+
+    dates: list  # date ordinals, the first one is today
+    projected: list
+    promisable: list
+
+    def promisable_on(self, date: datetime.date) -> int:
+        """Lowest projected balance from ``date`` onwards, negative when oversold."""
+        index = max(bisect_right(self.dates, date.toordinal()) - 1, 0)
+        return self.promisable[index]
+
+    def available(self, date: datetime.date) -> int:
+        return max(self.promisable_on(date), 0)
+
+    def earliest_date(self, quantity: int):
+        """First date on which ``quantity`` can be promised, None if never."""
+        index = bisect_left(self.promisable, quantity)
+        if index == len(self.promisable):
+            return None
+        return datetime.date.fromordinal(self.dates[index])
+
+
+class ATPLine(NamedTuple):
+    product_id: int
+    quantity: int
+    requested_date: datetime.date
+    allocated: bool = False  # Already counted as open sales demand
+
+
+@dataclass
+class ATPResult:
+    product_id: int
+    quantity: int
+    requested_date: datetime.date
+    available: int
+    earliest_date: datetime.date | None
+
+    @property
+    def is_available(self) -> bool:
+        return self.available >= self.quantity
+
+
+def build_timelines(product_ids) -> dict:
+    """Build timelines for many products with one query per input."""
+    today = timezone.now().date()
+    product_ids = list(product_ids)
+    on_hand = dict(
+        ProductInventory.objects.filter(product_id__in=product_ids)
+        .order_by()
+        .values("product_id")
+        .annotate(total=Sum("quantity"))
+        .values_list("product_id", "total")
+    )
+
+    changes: dict[int, dict[int, int]] = defaultdict(lambda: defaultdict(int))
+    demand = (
+        SalesOrderItem.objects.filter(
+            product_id__in=product_ids, sales_order__status__in=OPEN_SALES_STATUSES
+        )
+        .order_by()
+        .values("product_id", date=F("sales_order__requested_delivery"))
+        .annotate(total=Sum("quantity"))
+    )
+    production = (
+        ManufacturingOrder.objects.filter(
+            product_id__in=product_ids, status__in=SCHEDULED_PRODUCTION_STATUSES
+        )
+        .order_by()
+        .values("product_id", date=F("estimated_completion"))
+        .annotate(total=Sum("quantity"))
+    )
+    receipts = (
+        PurchaseOrderItem.objects.filter(
+            product_id__in=product_ids,
+            purchase_order__status__in=OPEN_PURCHASE_STATUSES,
+            quantity_ordered__gt=F("quantity_received"),
+        )
+        .order_by()
+        .values(
+            "product_id",
+            date=Coalesce("expected_delivery", "purchase_order__expected_delivery"),
+        )
+        .annotate(total=Sum(F("quantity_ordered") - F("quantity_received")))
+    )
+    for rows, sign in ((demand, -1), (production, 1), (receipts, 1)):
+        for row in rows:
+            # Anything overdue is expected today
+            changes[row["product_id"]][max(row["date"], today).toordinal()] += sign * row["total"]
+
+    timelines = {}
+    for product_id in product_ids:
+        dates = [today.toordinal()]
+        projected = [on_hand.get(product_id) or 0]
+        for date, change in sorted(changes[product_id].items()):
+            if date == dates[-1]:
+                projected[-1] += change
+            else:
+                dates.append(date)
+                projected.append(projected[-1] + change)
+
+        promisable = projected[:]
+        for i in range(len(promisable) - 2, -1, -1):
+            promisable[i] = min(promisable[i], promisable[i + 1])
+        timelines[product_id] = Timeline(dates, projected, promisable)
+    return timelines
+
+
+def get_timelines(product_ids) -> dict:
+    """Cached timelines, building only the ones missing from the cache."""
+    product_ids = set(product_ids)
+    today = timezone.now().date().toordinal()
+    cached = cache.get_many([f"{CACHE_PREFIX}{pid}" for pid in product_ids])
+    timelines = {
+        int(key.removeprefix(CACHE_PREFIX)): timeline
+        for key, timeline in cached.items()
+        if timeline.dates[0] == today
+    }
+
+    missing = product_ids - timelines.keys()
+    if missing:
+        built = build_timelines(missing)
+        cache.set_many(
+            {f"{CACHE_PREFIX}{pid}": timeline for pid, timeline in built.items()},
+            CACHE_TIMEOUT,
+        )
+        timelines.update(built)
+    return timelines
+
+
+def invalidate(product_ids):
+    cache.delete_many([f"{CACHE_PREFIX}{pid}" for pid in set(product_ids)])
+
+
+def check_availability(lines) -> list:
+    """ATP for a list of ATPLine.
+
+    Lines for the same product are checked in date order and each one consumes
+    what it asks for, so one order cannot promise the same stock twice. Lines of
+    orders that are already open are part of the timeline's demand, so their own
+    quantity is credited back.
+    """
+    timelines = get_timelines(line.product_id for line in lines)
+    consumed: dict[int, int] = defaultdict(int)
+    results: list[ATPResult | None] = [None] * len(lines)
+
+    for i in sorted(range(len(lines)), key=lambda i: lines[i].requested_date):
+        line = lines[i]
+        timeline = timelines[line.product_id]
+        prior = consumed[line.product_id] - (line.quantity if line.allocated else 0)
+        available = max(timeline.promisable_on(line.requested_date) - prior, 0)
+        if not line.allocated:
+            consumed[line.product_id] = prior + min(line.quantity, available)
+        results[i] = ATPResult(
+            product_id=line.product_id,
+            quantity=line.quantity,
+            requested_date=line.requested_date,
+            available=available,
+            earliest_date=timeline.earliest_date(prior + line.quantity),
+        )
+    return results
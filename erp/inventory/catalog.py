@@ -0,0 +1,139 @@
+"""Bulk upsert of product master data keyed by sku.
+
+Rows are processed in chunks of ``CHUNK_SIZE``, each in a fixed number of
+queries: the rows are validated in memory (the serializer has no per-row
+database validators), the stored rows of the chunk's skus are read with one
+``SELECT ... WHERE sku IN``, and new and changed rows are written with one
+``INSERT ... ON CONFLICT (sku) DO UPDATE`` (``bulk_create(update_conflicts=True)``).
+Fields a row leaves out keep their stored value and unchanged rows are not
+written. Invalid rows are reported by position and do not stop the others.
+
+Input can be any iterable of dicts, so large NDJSON or CSV files are streamed
+chunk by chunk (``ndjson_rows``, ``csv_rows``), each chunk in its own transaction.
+"""
+
+import csv
+import json
+import logging
+from dataclasses import dataclass, field
+from itertools import islice
+
+from django.db import transaction
+from rest_framework.exceptions import ValidationError
+
+from erp import caching
+from erp.models import Product
+from erp.serializers import ProductUpsertSerializer
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 1000
+MAX_ERRORS = 1000  # Errors reported in full; the rest are only counted
+UPSERT_FIELDS = [name for name in ProductUpsertSerializer.Meta.fields if name != "sku"]
+REQUIRED_ON_CREATE = ["name", "unit_price"]
+
+
+@dataclass
+class UpsertResult:
+    created: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    failed: int = 0
+    errors: list = field(default_factory=list)
+
+    def error(self, row: int, sku, detail):
+        self.failed += 1
+        if len(self.errors) < MAX_ERRORS:
+            self.errors.append({"row": row, "sku": sku, "errors": detail})
+
+
+def ndjson_rows(lines):
+    """Rows of newline-delimited JSON (bytes or str lines); invalid lines become ValueErrors."""
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError as exc:
+            yield ValueError(f"Invalid JSON: {exc}")
+
+
+def csv_rows(lines, encoding: str = "utf-8"):
+    """Rows of a CSV file with a header line; empty cells are left out."""
+    text = (line.decode(encoding) if isinstance(line, bytes) else line for line in lines)
+    for row in csv.DictReader(text):
+        yield {key: value for key, value in row.items() if key and value not in ("", None)}
+
+
+def _upsert_chunk(chunk: list, serializer, result: UpsertResult):
+    valid: dict[str, tuple] = {}  # sku -> (position of its last row, data); repeated skus apply in order
+    for position, row in chunk:
+        if not isinstance(row, dict):
+            message = str(row) if isinstance(row, ValueError) else "Expected an object"
+            result.error(position, None, {"non_field_errors": [message]})
+            continue
+        try:
+            data = serializer.run_validation(row)
+        except ValidationError as exc:
+            result.error(position, row.get("sku"), exc.detail)
+            continue
+        sku = data.pop("sku")
+        previous = valid.get(sku, (position, {}))[1]
+        valid[sku] = (position, {**previous, **data})
+    if not valid:
+        return
+
+    with transaction.atomic():
+        stored = {
+            row["sku"]: row
+            for row in Product.objects.filter(sku__in=list(valid)).values("id", "sku", *UPSERT_FIELDS)
+        }
+        products, recost = [], []
+        for sku, (position, data) in valid.items():
+            current = stored.get(sku)
+            if current is None:
+                missing = [name for name in REQUIRED_ON_CREATE if name not in data]
+                if missing:
+                    result.error(position, sku, {name: ["This field is required."] for name in missing})
+                    continue
+                products.append(Product(sku=sku, **data))
+                result.created += 1
+                continue
+
+            values = {name: data.get(name, current[name]) for name in UPSERT_FIELDS}
+            if values == {name: current[name] for name in UPSERT_FIELDS}:
+                result.unchanged += 1
+                continue
+            if values["unit_cost"] != current["unit_cost"]:
+                recost.append(current["id"])
+            products.append(Product(sku=sku, **values))
+            result.updated += 1
+
+        if not products:
+            return
+        Product.objects.bulk_create(
+            products,
+            update_conflicts=True,
+            unique_fields=["sku"],
+            update_fields=UPSERT_FIELDS + ["updated_at"],
+        )
+        # bulk_create skips the post_save signals: invalidate and re-cost here instead
+        caching.bump_generation(Product)
+        if recost:
+            from erp.tasks import update_standard_costs
+
+            transaction.on_commit(lambda: update_standard_costs.delay(recost))
+
+
+def upsert_products(rows, chunk_size: int = CHUNK_SIZE) -> UpsertResult:
+    """Create or update products from an iterable of {"sku": ..., field: value} rows."""
+    result = UpsertResult()
+    serializer = ProductUpsertSerializer()
+    rows = enumerate(rows)
+    while chunk := list(islice(rows, chunk_size)):
+        _upsert_chunk(chunk, serializer, result)
+    logger.info(
+        f"Upserted products: {result.created} created, {result.updated} updated, "
+        f"{result.unchanged} unchanged, {result.failed} failed"
+    )
+    return result
@@ -0,0 +1,116 @@
+"""Dock receiving of purchase order lines.
+
+All lines of one or many purchase orders are received in a fixed number of
+queries, however many lines there are: the lines are read and locked once,
+``quantity_received`` is written with ``bulk_update``, inventory in each PO's
+warehouse is upserted (insert missing rows, then add with ``F()``) and the PO
+status is rolled up in SQL.
+"""
+
+import logging
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Case, Exists, F, IntegerField, OuterRef, Q, Value, When
+from django.utils import timezone
+
+from erp import caching
+from erp.inventory import atp
+from erp.models import ProductInventory, PurchaseOrder, PurchaseOrderItem
+from erp.purchasing import sourcing
+from erp.reporting.suppliers import month_start, refresh_supplier_performance
+
+logger = logging.getLogger(__name__)
+
+RECEIVABLE_STATUSES = ["APPROVED", "ORDERED", "PARTIAL"]
+
+
+class ReceivingError(ValueError):
+    pass
+
+
+def receive_purchase_order_items(quantities: dict) -> dict:
+    """Receive {purchase order item id: quantity} and return {PO id: new status}.
+
+    Nothing is received if a line is unknown, belongs to a PO that is not open
+    or would be received beyond the quantity ordered.
+    """
+    with transaction.atomic():
+        items = list(
+            PurchaseOrderItem.objects.select_for_update()
+            .filter(id__in=quantities, purchase_order__status__in=RECEIVABLE_STATUSES)
+            .select_related("purchase_order")
+            .only(
+                "id",
+                "product_id",
+                "quantity_ordered",
+                "quantity_received",
+                "purchase_order__id",
+                "purchase_order__supplier_id",
+                "purchase_order__warehouse_id",
+                "purchase_order__expected_delivery",
+            )
+        )
+        missing = quantities.keys() - {item.id for item in items}
+        if missing:
+            raise ReceivingError(f"Lines {sorted(missing)} do not exist or their purchase order is not open")
+
+        stock: dict[tuple[int, int], int] = defaultdict(int)  # (product id, warehouse id) -> received quantity
+        over_received = []
+        for item in items:
+            item.quantity_received += quantities[item.id]
+            if item.quantity_received > item.quantity_ordered:
+                over_received.append(item.id)
+            stock[item.product_id, item.purchase_order.warehouse_id] += quantities[item.id]
+        if over_received:
+            raise ReceivingError(f"Lines {sorted(over_received)} would exceed the quantity ordered")
+
+        PurchaseOrderItem.objects.bulk_update(items, ["quantity_received"], batch_size=1000)
+
+        ProductInventory.objects.bulk_create(
+            [
+                ProductInventory(product_id=product_id, warehouse_id=warehouse_id, quantity=0)
+                for product_id, warehouse_id in stock
+            ],
+            ignore_conflicts=True,
+        )
+        pairs = Q()
+        received = []
+        for (product_id, warehouse_id), quantity in stock.items():
+            pairs |= Q(product_id=product_id, warehouse_id=warehouse_id)
+            received.append(
+                When(product_id=product_id, warehouse_id=warehouse_id, then=Value(quantity))
+            )
+        now = timezone.now()
+        ProductInventory.objects.filter(pairs).update(
+            quantity=F("quantity") + Case(*received, default=Value(0), output_field=IntegerField()),
+            updated_at=now,
+        )
+        caching.bump_generation(ProductInventory)
+
+        order_ids = {item.purchase_order.id for item in items}
+        outstanding = Exists(
+            PurchaseOrderItem.objects.filter(
+                purchase_order=OuterRef("pk"), quantity_received__lt=F("quantity_ordered")
+            )
+        )
+        PurchaseOrder.objects.filter(id__in=order_ids).update(
+            status=Case(When(outstanding, then=Value("PARTIAL")), default=Value("RECEIVED")),
+            actual_delivery=Case(When(outstanding, then=F("actual_delivery")), default=Value(now.date())),
+            updated_at=now,
+        )
+        statuses = dict(
+            PurchaseOrder.objects.filter(id__in=order_ids).values_list("id", "status")
+        )
+
+    # Bulk writes bypass the signals that keep ATP timelines and supplier statistics fresh
+    atp.invalidate(product_id for product_id, _ in stock)
+    sourcing.queue_refresh(supplier_ids={item.purchase_order.supplier_id for item in items})
+    refresh_supplier_performance(
+        {
+            (item.purchase_order.supplier_id, month_start(item.purchase_order.expected_delivery))
+            for item in items
+        }
+    )
+    logger.info(f"Received {len(items)} lines of {len(order_ids)} purchase orders")
+    return statuses
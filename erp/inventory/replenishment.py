@@ -0,0 +1,173 @@
+"""Replenishment planning.
+
+A product is short when its unreserved stock plus what is still due on purchase
+orders (drafts included, so re-running the planner does not order twice) is
+below ``Product.min_stock_level``. The shortage is ordered in multiples of the
+supplier's ``min_order_quantity``. Shortages, the warehouse to deliver to and the
+top ranked supplier source are found with one annotated query; lines are then grouped in
+memory into one draft purchase order per supplier and warehouse.
+"""
+
+import datetime
+import logging
+from collections import defaultdict
+from decimal import Decimal
+from typing import NamedTuple
+
+from django.db import transaction
+from django.db.models import F, IntegerField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from erp.models import (
+    OrderNumber,
+    Product,
+    ProductInventory,
+    PurchaseOrder,
+    PurchaseOrderItem,
+    SupplierSource,
+    Warehouse,
+)
+
+logger = logging.getLogger(__name__)
+
+INBOUND_STATUSES = ["DRAFT", "PENDING", "APPROVED", "ORDERED", "PARTIAL"]
+CREATED_BY = "replenishment"
+
+
+class ReplenishmentLine(NamedTuple):
+    product_id: int
+    supplier_id: int
+    warehouse_id: int
+    quantity: int
+    unit_cost: Decimal
+    lead_time_days: int
+
+
+def _total(queryset, expression):
+    """Correlated SUM per product, 0 when there are no rows."""
+    return Coalesce(
+        Subquery(
+            queryset.filter(product=OuterRef("pk"))
+            .order_by()
+            .values("product")
+            .annotate(total=Sum(expression))
+            .values("total")
+        ),
+        Value(0),
+        output_field=IntegerField(),
+    )
+
+
+def shortages():
+    """Active products below their minimum stock, with warehouse and best supplier."""
+    stock = ProductInventory.objects.filter(warehouse__is_active=True)
+    # Deliver to the warehouse already holding most of the product
+    warehouse = stock.filter(product=OuterRef("pk")).order_by("-quantity", "warehouse_id")
+    # Top ranked source, see erp.purchasing.sourcing
+    supplier = SupplierSource.objects.filter(product=OuterRef("pk"), rank=1)
+
+    return (
+        Product.objects.filter(is_active=True, min_stock_level__gt=0)
+        .annotate(
+            available=_total(stock, F("quantity") - F("reserved_quantity")),
+            inbound=_total(
+                PurchaseOrderItem.objects.filter(purchase_order__status__in=INBOUND_STATUSES),
+                F("quantity_ordered") - F("quantity_received"),
+            ),
+        )
+        .filter(min_stock_level__gt=F("available") + F("inbound"))
+        .annotate(
+            target_warehouse=Subquery(warehouse.values("warehouse_id")[:1]),
+            best_supplier=Subquery(supplier.values("supplier_id")[:1]),
+            supplier_cost=Subquery(supplier.values("unit_cost")[:1]),
+            min_order_quantity=Subquery(supplier.values("min_order_quantity")[:1]),
+            lead_time_days=Subquery(supplier.values("lead_time_days")[:1]),
+        )
+        .order_by("id")
+        .values_list(
+            "id",
+            "min_stock_level",
+            "available",
+            "inbound",
+            "target_warehouse",
+            "best_supplier",
+            "supplier_cost",
+            "min_order_quantity",
+            "lead_time_days",
+        )
+    )
+
+
+def plan_replenishment() -> list:
+    """Replenishment lines for every short product that has a supplier."""
+    default_warehouse = (
+        Warehouse.objects.filter(is_active=True).order_by("id").values_list("id", flat=True).first()
+    )
+    lines, unsourced = [], 0
+    for (
+        product_id,
+        min_stock_level,
+        available,
+        inbound,
+        warehouse_id,
+        supplier_id,
+        unit_cost,
+        min_order_quantity,
+        lead_time_days,
+    ) in shortages():
+        warehouse_id = warehouse_id or default_warehouse
+        if supplier_id is None or warehouse_id is None:
+            unsourced += 1
+            continue
+        pack = max(min_order_quantity, 1)
+        quantity = -(-(min_stock_level - available - inbound) // pack) * pack  # Rounded up
+        lines.append(
+            ReplenishmentLine(product_id, supplier_id, warehouse_id, quantity, unit_cost, lead_time_days)
+        )
+    if unsourced:
+        logger.warning(f"{unsourced} short products have no active supplier or warehouse")
+    return lines
+
+
+def create_purchase_orders(lines) -> list:
+    """One draft purchase order per supplier and warehouse, written with bulk_create."""
+    groups = defaultdict(list)
+    for line in lines:
+        groups[line.supplier_id, line.warehouse_id].append(line)
+    if not groups:
+        return []
+
+    today = timezone.now().date()
+    with transaction.atomic():
+        numbers = OrderNumber.allocate(len(groups))
+        orders = [
+            PurchaseOrder(
+                po_number=f"RP-{number}",
+                supplier_id=supplier_id,
+                warehouse_id=warehouse_id,
+                order_date=today,
+                expected_delivery=today + datetime.timedelta(days=max(line.lead_time_days for line in group)),
+                status="DRAFT",
+                total_amount=sum((line.quantity * line.unit_cost for line in group), Decimal("0")),
+                created_by=CREATED_BY,
+            )
+            for number, ((supplier_id, warehouse_id), group) in zip(numbers, groups.items())
+        ]
+        PurchaseOrder.objects.bulk_create(orders, batch_size=1000)
+        PurchaseOrderItem.objects.bulk_create(
+            [
+                PurchaseOrderItem(
+                    purchase_order=order,
+                    product_id=line.product_id,
+                    quantity_ordered=line.quantity,
+                    unit_price=line.unit_cost,
+                    expected_delivery=today + datetime.timedelta(days=line.lead_time_days),
+                )
+                for order, group in zip(orders, groups.values())
+                for line in group
+            ],
+            batch_size=1000,
+        )
+    logger.info(f"Created {len(orders)} replenishment purchase orders with {len(lines)} lines")
+    return orders
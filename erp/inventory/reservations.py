@@ -0,0 +1,199 @@
+"""Stock reservations for sales order lines.
+
+``ProductInventory.reserved_quantity`` sits next to ``quantity``, so the stock
+still free in a warehouse is ``quantity - reserved_quantity`` on a single row.
+Reserving locks the candidate inventory rows, plans the whole allocation in
+memory and writes it with one conditional UPDATE, which only succeeds if every
+row still has the stock it was planned against. Shipping an order consumes its
+reservations; any other move out of a holding status (cancelling, back to
+draft) releases them. Lines saved on a holding order are reserved again.
+"""
+
+import logging
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Sum, Value, When
+
+from erp import caching
+from erp.models import ProductInventory, SalesOrder, SalesOrderItem, StockReservation
+
+logger = logging.getLogger(__name__)
+
+HOLDING_STATUSES = ["CONFIRMED", "PROCESSING", "READY", "PARTIAL"]
+SHIPPED_STATUSES = ["SHIPPED", "DELIVERED"]
+
+
+class InsufficientStockError(ValueError):
+    def __init__(self, shortages: dict):
+        self.shortages = shortages  # product id -> missing quantity
+        super().__init__(f"Not enough stock to reserve products {sorted(shortages)}")
+
+
+def _per_row(amounts: dict):
+    """CASE expression picking each inventory row's own amount."""
+    return Case(
+        *[When(id=inventory_id, then=Value(amount)) for inventory_id, amount in amounts.items()],
+        default=Value(0),
+        output_field=IntegerField(),
+    )
+
+
+def plan_allocation(items, stock: dict):
+    """Split sales order lines over warehouses.
+
+    ``items`` are (item id, product id, preferred warehouse id, quantity) and
+    ``stock`` maps product id -> {inventory id: (warehouse id, available)}. A line
+    is taken from its own warehouse when set, then from the warehouses with the
+    most stock available, so most lines come from a single warehouse. Returns
+    {(item id, inventory id): quantity} and {product id: missing quantity}.
+    """
+    allocation: dict[tuple[int, int], int] = defaultdict(int)
+    shortages: dict[int, int] = defaultdict(int)
+    available = {
+        inventory_id: free
+        for rows in stock.values()
+        for inventory_id, (_, free) in rows.items()
+    }
+    for item_id, product_id, warehouse_id, quantity in items:
+        candidates = sorted(
+            stock.get(product_id, {}).items(),
+            key=lambda row: (row[1][0] != warehouse_id, -available[row[0]], row[0]),
+        )
+        remaining = quantity
+        for inventory_id, _ in candidates:
+            take = min(remaining, available[inventory_id])
+            if take > 0:
+                allocation[item_id, inventory_id] += take
+                available[inventory_id] -= take
+                remaining -= take
+            if not remaining:
+                break
+        if remaining:
+            shortages[product_id] += remaining
+    return dict(allocation), dict(shortages)
+
+
+def reserve(items) -> int:
+    """Reserve stock for a queryset of sales order items, earliest delivery first.
+
+    All or nothing: raises InsufficientStockError without reserving anything
+    when some line cannot be covered. Returns the number of reservations made.
+    """
+    with transaction.atomic():
+        lines = list(
+            items.exclude(reservations__isnull=False)
+            .order_by("sales_order__requested_delivery", "id")
+            .values_list("id", "product_id", "warehouse_id", "quantity")
+        )
+        if not lines:
+            return 0
+
+        stock: dict[int, dict] = defaultdict(dict)
+        rows = (
+            ProductInventory.objects.select_for_update()
+            .filter(
+                product_id__in={line[1] for line in lines},
+                warehouse__is_active=True,
+                quantity__gt=F("reserved_quantity"),
+            )
+            .order_by("id")
+            .values_list("id", "product_id", "warehouse_id", "quantity", "reserved_quantity")
+        )
+        for inventory_id, product_id, warehouse_id, quantity, reserved in rows:
+            stock[product_id][inventory_id] = (warehouse_id, quantity - reserved)
+
+        allocation, shortages = plan_allocation(lines, stock)
+        if shortages:
+            raise InsufficientStockError(shortages)
+
+        amounts: dict[int, int] = defaultdict(int)
+        for (_, inventory_id), quantity in allocation.items():
+            amounts[inventory_id] += quantity
+        amount = _per_row(amounts)
+        updated = ProductInventory.objects.filter(
+            id__in=amounts, quantity__gte=F("reserved_quantity") + amount
+        ).update(reserved_quantity=F("reserved_quantity") + amount)
+        if updated != len(amounts):
+            # Stock changed under us (e.g. a database without row locks)
+            raise InsufficientStockError({})
+        caching.bump_generation(ProductInventory)
+
+        StockReservation.objects.bulk_create(
+            [
+                StockReservation(sales_order_item_id=item_id, inventory_id=inventory_id, quantity=quantity)
+                for (item_id, inventory_id), quantity in allocation.items()
+            ],
+            batch_size=1000,
+        )
+    logger.info(f"Reserved {len(lines)} sales order lines in {len(allocation)} reservations")
+    return len(allocation)
+
+
+def release(items, consume: bool = False) -> int:
+    """Drop the reservations of a queryset of sales order items.
+
+    With ``consume`` the reserved stock leaves the warehouse as well (shipping).
+    Returns the number of reservations released.
+    """
+    with transaction.atomic():
+        reservations = StockReservation.objects.filter(sales_order_item__in=items)
+        amounts = dict(
+            reservations.order_by()
+            .values("inventory_id")
+            .annotate(total=Sum("quantity"))
+            .values_list("inventory_id", "total")
+        )
+        if not amounts:
+            return 0
+
+        amount = _per_row(amounts)
+        changes = {"reserved_quantity": F("reserved_quantity") - amount}
+        if consume:
+            changes["quantity"] = F("quantity") - amount
+        ProductInventory.objects.filter(id__in=amounts).update(**changes)
+        caching.bump_generation(ProductInventory)
+        released, _ = reservations.delete()
+    return released
+
+
+def reserve_order(order) -> int:
+    return reserve(order.items.all())
+
+
+def release_order(order) -> int:
+    return release(order.items.all())
+
+
+def ship_order(order) -> int:
+    return release(order.items.all(), consume=True)
+
+
+def apply_status_change(order, previous_status) -> None:
+    """Reserve when an order starts holding stock, consume on shipping, release on any other exit."""
+    was_holding = previous_status in HOLDING_STATUSES
+    is_holding = order.status in HOLDING_STATUSES
+    if is_holding and not was_holding:
+        reserve_order(order)
+    elif was_holding and order.status in SHIPPED_STATUSES:
+        ship_order(order)
+    elif was_holding and not is_holding:
+        release_order(order)
+
+
+def apply_item_change(item) -> int:
+    """Reserve a line saved on a holding order again, as its product or quantity may have changed.
+
+    Raises InsufficientStockError after the line itself was saved, so callers
+    save lines inside a transaction (as the order form does).
+    """
+    if not SalesOrder.objects.filter(pk=item.sales_order_id, status__in=HOLDING_STATUSES).exists():
+        return 0
+    with transaction.atomic():
+        line = SalesOrderItem.objects.filter(pk=item.pk)
+        release(line)
+        return reserve(line)
+
+
+def release_items(item_ids) -> int:
+    return release(SalesOrderItem.objects.filter(id__in=item_ids))
@@ -0,0 +1,115 @@
+"""Bulk invoicing of shipped sales orders.
+
+Every shipped or delivered order without an invoice is billed in one pass: the
+net amount (order lines after discount plus shipping) is summed in SQL, VAT and
+gross are computed for all rows at once by ``compute_taxes``, invoice numbers are
+allocated as one block and the invoices are written with ``bulk_create``. PDFs
+are rendered in the background in batches.
+"""
+
+import datetime
+import logging
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import DecimalField, Exists, OuterRef, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from erp.inventory.reservations import SHIPPED_STATUSES
+from erp.invoices.taxes import compute_taxes
+from erp.models import Invoice, OrderNumber, SalesOrder
+from erp.reporting.sales import line_totals
+from erp.sales import credit
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_VAT_RATE = Decimal("23")
+PAYMENT_TERMS_DAYS = 14
+PDF_BATCH_SIZE = 200
+MONEY = DecimalField(max_digits=14, decimal_places=2)
+
+
+def uninvoiced_orders():
+    """Shipped or delivered orders that have no invoice yet."""
+    return SalesOrder.objects.filter(status__in=SHIPPED_STATUSES).filter(
+        ~Exists(Invoice.objects.filter(sales_order=OuterRef("pk")))
+    )
+
+
+def queue_pdf_rendering(invoice_ids, batch_size: int = PDF_BATCH_SIZE) -> None:
+    """Render the PDFs in batches once the current transaction commits."""
+    from erp.tasks import invoice_generate_pdfs
+
+    for i in range(0, len(invoice_ids), batch_size):
+        batch = invoice_ids[i:i + batch_size]
+        transaction.on_commit(lambda batch=batch: invoice_generate_pdfs.delay(batch))
+
+
+def invoice_shipped_orders(
+    vat_rate: Decimal = DEFAULT_VAT_RATE,
+    issued_date: datetime.date | None = None,
+    payment_terms_days: int = PAYMENT_TERMS_DAYS,
+) -> list:
+    """Create one invoice per uninvoiced shipped order. Returns the new invoice ids."""
+    vat_rate = Decimal(str(vat_rate))
+    issued_date = issued_date or timezone.now().date()
+    due_date = issued_date + datetime.timedelta(days=payment_terms_days)
+
+    with transaction.atomic():
+        # Holding the number counter serialises concurrent runs, so no order is billed twice
+        OrderNumber.objects.select_for_update().order_by("pk").first()
+        rows = list(
+            uninvoiced_orders()
+            .order_by("pk")
+            .annotate(
+                lines_net=Coalesce(Sum(line_totals("items__")["net"]), Value(Decimal("0")), output_field=MONEY)
+            )
+            .values_list(
+                "pk",
+                "customer_id",
+                "customer__name",
+                "customer__address",
+                "customer__email",
+                "customer__phone",
+                "lines_net",
+                "shipping_cost",
+            )
+        )
+        if not rows:
+            return []
+
+        numbers = Invoice.allocate_invoice_numbers(len(rows))
+        nets, vats, grosses = compute_taxes([Decimal(row[6]) + row[7] for row in rows], vat_rate)
+        invoices = []
+        exposure: dict[int, Decimal] = defaultdict(Decimal)
+        for number, row, net, vat, gross in zip(numbers, rows, nets, vats, grosses):
+            order_id, customer_id, name, address, email, phone = row[:6]
+            exposure[customer_id] += gross
+            invoices.append(
+                Invoice(
+                    sales_order_id=order_id,
+                    invoice_number=number,
+                    issued_date=issued_date,
+                    due_date=due_date,
+                    status="ISSUED",
+                    customer_name=name,
+                    customer_address=address,
+                    customer_email=email,
+                    customer_phone=phone,
+                    net_amount=net,
+                    vat_rate=vat_rate,
+                    vat_amount=vat,
+                    gross_amount=gross,
+                    total_amount=gross,
+                )
+            )
+        Invoice.objects.bulk_create(invoices, batch_size=1000)
+        invoice_ids = [invoice.pk for invoice in invoices]
+        # bulk_create skips the invoice signals, so the unpaid amounts are added here
+        credit.adjust_balances(exposure)
+        queue_pdf_rendering(invoice_ids)
+
+    logger.info(f"Invoiced {len(invoice_ids)} shipped sales orders")
+    return invoice_ids
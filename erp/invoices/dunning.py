@@ -0,0 +1,96 @@
+"""Overdue invoice detection and dunning reminders.
+
+Unpaid invoices past their due date are flipped to ``OVERDUE`` with one
+set-based UPDATE, served by the partial index on unpaid invoices. Reminders go
+out one email per customer, listing all of the customer's overdue invoices, and
+each batch of customers is sent over a single mail connection.
+"""
+
+import logging
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from erp.models import Invoice
+
+logger = logging.getLogger(__name__)
+
+UNPAID_STATUSES = ["ISSUED", "PARTIAL"]
+REMINDER_BATCH_SIZE = 100
+
+
+def _with_recipient(invoices):
+    return invoices.annotate(recipient=Coalesce(F("customer_email"), F("sales_order__customer__email")))
+
+
+def flag_overdue_invoices(today=None) -> list:
+    """Mark unpaid invoices due before ``today`` as overdue and return their ids."""
+    today = today or timezone.now().date()
+    overdue = Invoice.objects.filter(due_date__lt=today, status__in=UNPAID_STATUSES)
+    with transaction.atomic():
+        invoice_ids = list(overdue.select_for_update().values_list("pk", flat=True))
+        if invoice_ids:
+            overdue.update(status="OVERDUE", updated_at=timezone.now())
+    logger.info(f"Marked {len(invoice_ids)} invoices as overdue")
+    return invoice_ids
+
+
+def reminder_batches(invoice_ids, batch_size: int = REMINDER_BATCH_SIZE) -> list:
+    """Split the customers of the given invoices into batches of recipient addresses."""
+    recipients = sorted(
+        set(
+            _with_recipient(Invoice.objects.filter(pk__in=invoice_ids))
+            .exclude(recipient__isnull=True)
+            .exclude(recipient="")
+            .values_list("recipient", flat=True)
+        )
+    )
+    return [recipients[i:i + batch_size] for i in range(0, len(recipients), batch_size)]
+
+
+def reminder_message(recipient: str, invoices) -> EmailMessage:
+    lines = [
+        f"- {invoice.invoice_number or invoice.pk}: {invoice.gross_amount}, due {invoice.due_date}"
+        for invoice in invoices
+    ]
+    body = "\n".join(
+        [
+            "The following invoices are overdue:",
+            *lines,
+            "",
+            f"Total outstanding: {sum(invoice.gross_amount or 0 for invoice in invoices)}",
+            "Please arrange payment at your earliest convenience.",
+        ]
+    )
+    return EmailMessage(
+        subject=f"Payment reminder: {len(invoices)} overdue invoice(s)",
+        body=body,
+        from_email=settings.EMAIL_HOST_USER,
+        to=[recipient],
+    )
+
+
+def send_overdue_reminders(recipients) -> int:
+    """Send one reminder per recipient with all of their overdue invoices,
+    over a single mail connection. Returns the number of emails sent."""
+    invoices = (
+        _with_recipient(Invoice.objects.filter(status="OVERDUE"))
+        .filter(recipient__in=recipients)
+        .order_by("recipient", "due_date", "pk")
+    )
+    by_recipient = defaultdict(list)
+    for invoice in invoices:
+        by_recipient[invoice.recipient].append(invoice)
+
+    messages = [reminder_message(recipient, overdue) for recipient, overdue in by_recipient.items()]
+    if not messages:
+        return 0
+    with get_connection() as connection:
+        sent = connection.send_messages(messages)
+    logger.info(f"Sent {sent} overdue invoice reminders")
+    return sent
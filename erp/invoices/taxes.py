@@ -0,0 +1,82 @@
+"""Invoice tax computation.
+
+VAT and gross amounts are computed with Decimal arithmetic over whole arrays of
+net amounts and VAT rates, rounded half-up to the cent. ``Invoice.save()`` and
+every bulk path call the same functions, and a check constraint on ``Invoice``
+keeps ``gross_amount`` equal to ``net_amount + vat_amount``.
+"""
+
+import logging
+from collections import defaultdict
+from decimal import ROUND_HALF_UP, Decimal
+
+import numpy as np
+from django.db import transaction
+
+from erp.models import Invoice
+from erp.sales import credit
+
+logger = logging.getLogger(__name__)
+
+CENTS = Decimal("0.01")
+TAX_FIELDS = ["net_amount", "vat_rate", "vat_amount", "gross_amount"]
+
+_decimal = np.frompyfunc(lambda value: value if isinstance(value, Decimal) else Decimal(str(value)), 1, 1)
+_cents = np.frompyfunc(lambda value: value.quantize(CENTS, ROUND_HALF_UP), 1, 1)
+
+
+def compute_taxes(net_amounts, vat_rates) -> tuple:
+    """(nets, VAT amounts, gross amounts) for arrays of net amounts and VAT rates
+    in percent; a single rate applies to every net amount."""
+    nets = _cents(_decimal(np.asarray(net_amounts, dtype=object)))
+    rates = _decimal(np.asarray(vat_rates, dtype=object))
+    vats = _cents(nets * rates / 100)
+    return list(nets), list(vats), list(nets + vats)
+
+
+def invoice_taxes(net_amount, vat_rate) -> tuple:
+    """(net, VAT, gross) of one invoice, or Nones while an amount is missing."""
+    if net_amount is None or vat_rate is None:
+        return net_amount, None, None
+    (net,), (vat,), (gross,) = compute_taxes([net_amount], [vat_rate])
+    return net, vat, gross
+
+
+def recompute_invoice_taxes(invoices=None, vat_rate=None, batch_size: int = 1000) -> int:
+    """Recompute VAT and gross of ``invoices`` (default: all), optionally moving them to
+    a new ``vat_rate``. Only rows that change are written. Returns that number."""
+    invoices = Invoice.objects.all() if invoices is None else invoices
+    invoices = invoices.exclude(net_amount=None)
+    if vat_rate is None:
+        invoices = invoices.exclude(vat_rate=None)
+    else:
+        vat_rate = Decimal(str(vat_rate))
+    rows = invoices.order_by("pk").values_list(
+        "pk", "net_amount", "vat_rate", "vat_amount", "gross_amount", "status", "sales_order__customer_id"
+    )
+
+    updated, last_pk = 0, 0
+    with transaction.atomic():
+        # Page by primary key: rows moved to a new rate may leave the filtered set
+        while batch := list(rows.filter(pk__gt=last_pk)[:batch_size]):
+            last_pk = batch[-1][0]
+            rates = [vat_rate] * len(batch) if vat_rate is not None else [row[2] for row in batch]
+            nets, vats, grosses = compute_taxes([row[1] for row in batch], rates)
+
+            changed = []
+            exposure: dict[int, Decimal] = defaultdict(Decimal)
+            for row, rate, net, vat, gross in zip(batch, rates, nets, vats, grosses):
+                pk, old_net, old_rate, old_vat, old_gross, status, customer_id = row
+                if (old_net, old_rate, old_vat, old_gross) == (net, rate, vat, gross):
+                    continue
+                changed.append(Invoice(pk=pk, net_amount=net, vat_rate=rate, vat_amount=vat, gross_amount=gross))
+                exposure[customer_id] += credit.invoice_exposure(status, gross) - credit.invoice_exposure(
+                    status, old_gross
+                )
+            Invoice.objects.bulk_update(changed, TAX_FIELDS)
+            # bulk_update skips the invoice signals, so unpaid amounts are moved here
+            credit.adjust_balances(exposure)
+            updated += len(changed)
+
+    logger.info(f"Recomputed taxes of {updated} invoices")
+    return updated
@@ -0,0 +1,23 @@
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from erp.reporting.rollups import archive_production_logs
+
+
+class Command(BaseCommand):
+    help = "Archive production logs older than the retention window; rollups keep their totals"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=None, help="Retention window in days")
+        parser.add_argument(
+            "--output-dir",
+            type=Path,
+            default=Path(settings.BASE_DIR) / "archive",
+            help="Directory for the gzipped CSV archive",
+        )
+
+    def handle(self, *args, **options):
+        count = archive_production_logs(options["output_dir"], options["days"])
+        self.stdout.write(self.style.SUCCESS(f"Archived {count} production logs"))
@@ -0,0 +1,123 @@
+import io
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import RequestFactory
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from erp.models import Product, ProductInventory, Supplier, SupplierProduct, Warehouse
+from erp.parsers import FastJSONParser
+from erp.renderers import FastJSONRenderer, orjson
+from erp.views import ProductModelViewSet
+
+
+def best_of(repeat: int, function) -> float:
+    """Fastest of ``repeat`` runs, in milliseconds."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the product list serialized by ProductSerializer against the .values() path, "
+        "and JSON rendering/parsing with the stdlib against orjson, on generated rows that are rolled back"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=2000, help="Number of products to generate")
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.generate(options["rows"])
+            self.benchmark(options["repeat"])
+            transaction.set_rollback(True)
+
+    def generate(self, rows: int):
+        warehouses = Warehouse.objects.bulk_create(
+            [Warehouse(name=f"Bench {n}", location="Bench", capacity=10**6) for n in range(3)]
+        )
+        supplier = Supplier.objects.create(
+            name="Bench", contact_person="Bench", email="bench@example.com", phone="0", address="Bench"
+        )
+        products = Product.objects.bulk_create(
+            [
+                Product(
+                    name=f"Bench product {n}",
+                    sku=f"BENCH-{n}",
+                    description="Generated by benchmark_api",
+                    unit_price=Decimal(n % 1000) + Decimal("0.99"),
+                    weight=1.5,
+                )
+                for n in range(rows)
+            ],
+            batch_size=1000,
+        )
+        ProductInventory.objects.bulk_create(
+            [
+                ProductInventory(product=product, warehouse=warehouse, quantity=10)
+                for product in products
+                for warehouse in warehouses
+            ],
+            batch_size=1000,
+        )
+        SupplierProduct.objects.bulk_create(
+            [
+                SupplierProduct(
+                    supplier=supplier, product=product, supplier_sku=product.sku, unit_cost=1, is_preferred=True
+                )
+                for product in products
+            ],
+            batch_size=1000,
+        )
+
+    def benchmark(self, repeat: int):
+        view = ProductModelViewSet(action_map={"get": "list"}, format_kwarg=None, args=(), kwargs={})
+        view.request = view.initialize_request(RequestFactory().get("/api/products/"))
+        queryset = view.get_queryset().filter(sku__startswith="BENCH-")
+        plan = view.values_plan(Product)
+        serializer_class = view.get_serializer_class()
+
+        def serialize():
+            return serializer_class(queryset.all(), many=True, context=view.get_serializer_context()).data
+
+        def values():
+            return view.render_values(Product, list(view.values_rows(queryset.all(), plan)), plan)
+
+        data = serialize()
+        body = JSONRenderer().render(data)
+        results = [
+            ("serialize", "ModelSerializer", best_of(repeat, serialize), ".values()", best_of(repeat, values)),
+        ]
+        if orjson is None:
+            self.stdout.write(self.style.WARNING("orjson is not installed, rendering uses the stdlib"))
+        results += [
+            (
+                "render",
+                "json",
+                best_of(repeat, lambda: JSONRenderer().render(data)),
+                "orjson",
+                best_of(repeat, lambda: FastJSONRenderer().render(data)),
+            ),
+            (
+                "parse",
+                "json",
+                best_of(repeat, lambda: JSONParser().parse(io.BytesIO(body))),
+                "orjson",
+                best_of(repeat, lambda: FastJSONParser().parse(io.BytesIO(body))),
+            ),
+        ]
+
+        self.stdout.write(f"{len(data)} products, {len(body) / 1024:.0f} KiB of JSON, best of {repeat}")
+        for step, baseline, baseline_ms, fast, fast_ms in results:
+            self.stdout.write(
+                f"{step:<10} {baseline:>16} {baseline_ms:9.1f} ms   {fast:>10} {fast_ms:9.1f} ms"
+                f"   {baseline_ms / fast_ms:5.1f}x"
+            )
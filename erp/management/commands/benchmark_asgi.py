@@ -0,0 +1,168 @@
+import asyncio
+import io
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from erp.models import Product, ProductInventory, Warehouse, Workstation
+
+PREFIX = "BENCH-ASGI"
+
+
+def server_name() -> str:
+    """A host name the settings accept."""
+    hosts = [host for host in settings.ALLOWED_HOSTS if host != "*" and not host.startswith(".")]
+    return hosts[0] if hosts else "localhost"
+
+
+def call_wsgi(application, path: str, query: str) -> tuple:
+    host = server_name()
+    environ = {
+        "REQUEST_METHOD": "GET",
+        "PATH_INFO": path,
+        "QUERY_STRING": query,
+        "SERVER_NAME": host,
+        "SERVER_PORT": "80",
+        "SERVER_PROTOCOL": "HTTP/1.1",
+        "HTTP_HOST": host,
+        "wsgi.input": io.BytesIO(),
+        "wsgi.errors": sys.stderr,
+        "wsgi.url_scheme": "http",
+    }
+    status = []
+    response = application(environ, lambda line, headers, exc_info=None: status.append(line))
+    try:
+        b"".join(response)
+    finally:
+        response.close()
+    return int(status[0].split()[0]), time.perf_counter()
+
+
+async def call_asgi(application, path: str, query: str) -> tuple:
+    host = server_name()
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query.encode(),
+        "root_path": "",
+        "headers": [(b"host", host.encode())],
+        "client": ("127.0.0.1", 0),
+        "server": (host, 80),
+    }
+    requested = False
+    messages = []
+
+    async def receive():
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await asyncio.Event().wait()  # The client never disconnects
+
+    async def send(message):
+        messages.append(message)
+
+    await application(scope, receive, send)
+    return messages[0]["status"], time.perf_counter()
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare concurrency under WSGI and ASGI: the async read endpoints are called by concurrent "
+        "clients through Django's WSGI handler on a pool of worker threads and through its ASGI handler "
+        "on one event loop, on the same generated rows, which are deleted afterwards"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1000, help="Number of products to generate")
+        parser.add_argument("--clients", type=int, default=50, help="Concurrent requests per endpoint")
+        parser.add_argument("--workers", type=int, default=8, help="WSGI worker threads")
+        parser.add_argument("--wait", type=int, default=2, help="Seconds a long poll waits for a change")
+
+    def handle(self, *args, **options):
+        warehouse = self.generate(options["rows"])
+        try:
+            # Nothing changes during the run, so every long poll waits the full time
+            poll = urlencode({"since": timezone.now().isoformat(), "wait": options["wait"]})
+            scenarios = [
+                ("products", "/api/async/products/", "page_size=50"),
+                ("inventory", f"/api/async/warehouses/{warehouse.id}/inventory/", ""),
+                ("long poll", "/api/async/workstations/status/", poll),
+            ]
+            self.benchmark(scenarios, options["clients"], options["workers"])
+        finally:
+            Product.objects.filter(sku__startswith=PREFIX).delete()
+            Workstation.objects.filter(machine_id__startswith=PREFIX).delete()
+            warehouse.delete()
+
+    def generate(self, rows: int) -> Warehouse:
+        warehouse = Warehouse.objects.create(name=PREFIX, location="Bench", capacity=10**6)
+        products = Product.objects.bulk_create(
+            [
+                Product(
+                    name=f"Bench product {n}",
+                    sku=f"{PREFIX}-{n}",
+                    unit_price=Decimal(n % 1000) + Decimal("0.99"),
+                )
+                for n in range(rows)
+            ],
+            batch_size=1000,
+        )
+        ProductInventory.objects.bulk_create(
+            [ProductInventory(product=product, warehouse=warehouse, quantity=10) for product in products],
+            batch_size=1000,
+        )
+        Workstation.objects.bulk_create(
+            [Workstation(name=f"Bench {n}", machine_id=f"{PREFIX}-{n}", location="Bench") for n in range(20)]
+        )
+        return warehouse
+
+    def benchmark(self, scenarios, clients: int, workers: int):
+        wsgi, asgi = WSGIHandler(), ASGIHandler()
+        self.stdout.write(
+            f"{clients} concurrent clients per endpoint; WSGI on {workers} worker threads, ASGI on one event loop"
+        )
+        self.stdout.write(f"{'endpoint':<10} {'server':<5} {'total':>9} {'req/s':>8} {'p50':>9} {'p95':>9}")
+        for name, path, query in scenarios:
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                results = list(
+                    executor.map(lambda _, path=path, query=query: call_wsgi(wsgi, path, query), range(clients))
+                )
+            self.report(name, "WSGI", results, start)
+
+            async def run(path=path, query=query):
+                return await asyncio.gather(*(call_asgi(asgi, path, query) for _ in range(clients)))
+
+            start = time.perf_counter()
+            results = asyncio.run(run())
+            self.report(name, "ASGI", results, start)
+
+    def report(self, name: str, server: str, results: list, start: float):
+        """Latencies run from the moment all clients sent their request, so they include queueing."""
+        total = max(finished for _, finished in results) - start
+        failed = [status for status, _ in results if status != 200]
+        if failed:
+            self.stdout.write(
+                self.style.WARNING(f"{name} under {server}: {len(failed)} responses were not 200: {sorted(set(failed))}")
+            )
+        latencies = sorted((finished - start) * 1000 for _, finished in results)
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        self.stdout.write(
+            f"{name:<10} {server:<5} {total:8.2f}s {len(results) / total:8.1f} "
+            f"{statistics.median(latencies):7.0f}ms {p95:7.0f}ms"
+        )
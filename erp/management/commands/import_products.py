@@ -0,0 +1,36 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from erp.inventory.catalog import CHUNK_SIZE, csv_rows, ndjson_rows, upsert_products
+
+READERS = {"csv": csv_rows, "ndjson": ndjson_rows}
+
+
+class Command(BaseCommand):
+    help = "Create or update products by sku from a CSV or NDJSON file, streamed in chunks"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument(
+            "--format", choices=sorted(READERS), help="File format (default: from the file extension)"
+        )
+        parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        file_format = options["format"] or ("csv" if path.endswith(".csv") else "ndjson")
+        try:
+            with open(path, "rb") as lines:
+                result = upsert_products(READERS[file_format](lines), chunk_size=options["chunk_size"])
+        except OSError as exc:
+            raise CommandError(exc)
+
+        for error in result.errors:
+            self.stderr.write(f"Row {error['row']} ({error['sku']}): {json.dumps(error['errors'])}")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{result.created} created, {result.updated} updated, "
+                f"{result.unchanged} unchanged, {result.failed} failed"
+            )
+        )
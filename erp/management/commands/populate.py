@@ -8,11 +8,14 @@ import numpy as np
 from django.contrib.auth.models import User
 from django.core.management.base import BaseCommand
 from django.db import transaction
+from django.db.models import Max, Min
 from django.utils import timezone
 from faker import Faker
 from tqdm import tqdm
 
 # Import models after Django setup
+from erp import caching
+from erp.invoices.taxes import compute_taxes
 from erp.models import (
     BillOfMaterials,
     BOMItem,
@@ -41,6 +44,11 @@ from erp.models import (
     Warehouse,
     Workstation,
 )
+from erp.purchasing.sourcing import refresh_supplier_sources
+from erp.reporting.rollups import rebuild_production_rollups
+from erp.reporting.sales import refresh_sales_rollups
+from erp.reporting.suppliers import refresh_supplier_performance
+from erp.sales.credit import recompute_open_balances
 
 # Setup Django environment
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'mysite.settings')
@@ -706,12 +714,6 @@ def create_sales_orders(customers, products, warehouses):
 
            # Ensure vat_rate is a Decimal
             vat_rate = decimal.Decimal(random.choice([5, 8, 23]))  # Convert VAT rate to Decimal
-            total_amount = decimal.Decimal("100.00")  # Example total amount
-
-            # Perform calculations with all Decimal values
-            net_amount = total_amount / (decimal.Decimal("1") + (vat_rate / decimal.Decimal("100")))  # Convert 1 and 100 to Decimal
-            vat_amount = total_amount - net_amount  # VAT amount
-            gross_amount = total_amount  # Gross amount remains the same
 
             payment_method = random.choice(['BANK_TRANSFER', 'CREDIT_CARD', 'CASH', 'PAYPAL', 'OTHER'])
 
@@ -727,12 +729,9 @@ def create_sales_orders(customers, products, warehouses):
                 invoice_number=f"INV-{order.order_number[3:]}",
                 issued_date=order.order_date,
                 due_date=due_date,
-                total_amount=gross_amount,
                 status=status,
                 vat_rate=vat_rate,
-                net_amount=net_amount,
-                vat_amount=vat_amount,
-                gross_amount=gross_amount,
+                net_amount=order.total_amount,  # VAT and gross are computed for all invoices below
                 payment_method=payment_method,
                 company_name=company_name,
                 company_address=company_address,
@@ -746,6 +745,13 @@ def create_sales_orders(customers, products, warehouses):
     # Update the total amounts
     SalesOrder.objects.bulk_update(sales_orders, ['total_amount'])
 
+    # bulk_create skips Invoice.save(), so compute the taxes the same way for all invoices at once
+    nets, vats, grosses = compute_taxes(
+        [invoice.net_amount for invoice in invoices], [invoice.vat_rate for invoice in invoices]
+    )
+    for invoice, net, vat, gross in zip(invoices, nets, vats, grosses):
+        invoice.net_amount, invoice.vat_amount, invoice.gross_amount, invoice.total_amount = net, vat, gross, gross
+
     # Create the items and invoices
     SalesOrderItem.objects.bulk_create(sales_order_items)
     Invoice.objects.bulk_create(invoices)
@@ -944,3 +950,11 @@ class Command(BaseCommand):
         create_purchase_orders(suppliers, warehouses)
         sales_orders, sales_order_items = create_sales_orders(customers, products, warehouses)
         create_manufacturing_orders(products, warehouses, sales_order_items, workstations, employees)
+        caching.bump_generation(Product, ProductInventory, Supplier, SupplierProduct, Warehouse)
+        refresh_supplier_sources()
+        recompute_open_balances()
+        refresh_sales_rollups()
+        refresh_supplier_performance()
+        log_dates = ProductionLog.objects.aggregate(start=Min("date"), end=Max("date"))
+        if log_dates["start"] is not None:
+            rebuild_production_rollups(log_dates["start"], log_dates["end"])
@@ -0,0 +1,26 @@
+import datetime
+
+from django.core.management.base import BaseCommand
+from django.db.models import Max, Min
+
+from erp.models import ProductionLog
+from erp.reporting.rollups import rebuild_production_rollups
+
+
+class Command(BaseCommand):
+    help = "Rebuild hourly, daily and monthly production rollups from raw production logs"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--start", type=datetime.date.fromisoformat, help="First date (YYYY-MM-DD)")
+        parser.add_argument("--end", type=datetime.date.fromisoformat, help="Last date (YYYY-MM-DD)")
+
+    def handle(self, *args, **options):
+        bounds = ProductionLog.objects.aggregate(first=Min("date"), last=Max("date"))
+        start = options["start"] or bounds["first"]
+        end = options["end"] or bounds["last"]
+        if start is None or end is None:
+            self.stdout.write("No production logs to roll up.")
+            return
+
+        count = rebuild_production_rollups(start, end)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {count} production rollups from {start} to {end}"))
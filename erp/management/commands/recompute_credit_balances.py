@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from erp.sales.credit import recompute_open_balances
+
+
+class Command(BaseCommand):
+    help = "Recompute every customer's open balance from open sales orders and unpaid invoices"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--customer", type=int, action="append", help="Only this customer id (repeatable)")
+
+    def handle(self, *args, **options):
+        count = recompute_open_balances(options["customer"])
+        self.stdout.write(self.style.SUCCESS(f"Recomputed the open balance of {count} customers"))
@@ -0,0 +1,32 @@
+import datetime
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+
+from erp.invoices.taxes import recompute_invoice_taxes
+from erp.models import Invoice
+
+
+class Command(BaseCommand):
+    help = "Recompute invoice VAT and gross amounts, optionally moving invoices to a new VAT rate"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rate", type=Decimal, help="New VAT rate in percent")
+        parser.add_argument("--from-rate", type=Decimal, help="Only invoices currently at this VAT rate")
+        parser.add_argument("--status", action="append", help="Only invoices in this status (repeatable)")
+        parser.add_argument(
+            "--issued-from", type=datetime.date.fromisoformat, help="Only invoices issued on or after this date"
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        invoices = Invoice.objects.all()
+        if options["from_rate"] is not None:
+            invoices = invoices.filter(vat_rate=options["from_rate"])
+        if options["status"]:
+            invoices = invoices.filter(status__in=options["status"])
+        if options["issued_from"]:
+            invoices = invoices.filter(issued_date__gte=options["issued_from"])
+
+        count = recompute_invoice_taxes(invoices, vat_rate=options["rate"], batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Recomputed taxes of {count} invoices"))
@@ -0,0 +1,72 @@
+# Generated by Django 5.1.6 on 2026-10-19 07:37
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('erp', '0012_alter_invoice_company_phone_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='productionkpi',
+            name='availability',
+            field=models.DecimalField(blank=True, decimal_places=4, max_digits=5, null=True),
+        ),
+        migrations.AddField(
+            model_name='productionkpi',
+            name='computed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='productionkpi',
+            name='downtime_minutes',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='productionkpi',
+            name='oee',
+            field=models.DecimalField(blank=True, decimal_places=4, max_digits=5, null=True),
+        ),
+        migrations.AddField(
+            model_name='productionkpi',
+            name='performance',
+            field=models.DecimalField(blank=True, decimal_places=4, max_digits=5, null=True),
+        ),
+        migrations.AddField(
+            model_name='productionkpi',
+            name='planned_minutes',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='productionkpi',
+            name='quality',
+            field=models.DecimalField(blank=True, decimal_places=4, max_digits=5, null=True),
+        ),
+        migrations.AddField(
+            model_name='productionkpi',
+            name='units_defective',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='productionkpi',
+            name='units_produced',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='productionkpi',
+            name='manufacturing_order',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='erp.manufacturingorder'),
+        ),
+        migrations.AddIndex(
+            model_name='productionkpi',
+            index=models.Index(fields=['date', 'workstation'], name='erp_product_date_da840e_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='productionkpi',
+            constraint=models.UniqueConstraint(condition=models.Q(('employee__isnull', True), ('manufacturing_order__isnull', True)), fields=('workstation', 'date'), name='unique_workstation_daily_kpi'),
+        ),
+    ]
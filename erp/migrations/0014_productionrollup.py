@@ -0,0 +1,80 @@
+# Generated by Django 5.1.6 on 2026-10-19 07:39
+
+import datetime
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models.functions import Coalesce, ExtractHour, TruncMonth
+
+
+def backfill_production_rollups(apps, schema_editor):
+    """Roll up the existing production logs, so trends have history right after the deploy
+    (the bucketing of erp.reporting.rollups as of this migration)."""
+    ProductionLog = apps.get_model("erp", "ProductionLog")
+    ProductionRollup = apps.get_model("erp", "ProductionRollup")
+
+    utc = datetime.timezone.utc
+    logs = ProductionLog.objects.order_by()
+    totals = {
+        "log_count": models.Count("id"),
+        "units_produced": models.Sum("units_produced"),
+        "units_defective": models.Sum("units_defective"),
+        "downtime_minutes": models.Sum("downtime_minutes"),
+    }
+    keys = ["workstation_id", "manufacturing_order_id"]
+
+    def rollup(grain, bucket_start, row):
+        return ProductionRollup(
+            grain=grain,
+            bucket_start=bucket_start,
+            workstation_id=row["workstation_id"],
+            manufacturing_order_id=row["manufacturing_order_id"],
+            log_count=row["log_count"],
+            units_produced=row["units_produced"],
+            units_defective=row["units_defective"],
+            downtime_minutes=row["downtime_minutes"],
+        )
+
+    rollups = []
+    for row in logs.values(*keys, "date", hour=Coalesce(ExtractHour("start_time"), models.Value(0))).annotate(
+        **totals
+    ):
+        date = row["date"]
+        bucket_start = datetime.datetime(date.year, date.month, date.day, row["hour"], tzinfo=utc)
+        rollups.append(rollup("HOUR", bucket_start, row))
+    for row in logs.values(*keys, "date").annotate(**totals):
+        date = row["date"]
+        rollups.append(rollup("DAY", datetime.datetime(date.year, date.month, date.day, tzinfo=utc), row))
+    for row in logs.values(*keys, month=TruncMonth("date")).annotate(**totals):
+        month = row["month"]
+        rollups.append(rollup("MONTH", datetime.datetime(month.year, month.month, 1, tzinfo=utc), row))
+    ProductionRollup.objects.bulk_create(rollups, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('erp', '0013_productionkpi_oee_metrics'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductionRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('grain', models.CharField(choices=[('HOUR', 'Hourly'), ('DAY', 'Daily'), ('MONTH', 'Monthly')], max_length=10)),
+                ('bucket_start', models.DateTimeField()),
+                ('log_count', models.PositiveIntegerField(default=0)),
+                ('units_produced', models.PositiveIntegerField(default=0)),
+                ('units_defective', models.PositiveIntegerField(default=0)),
+                ('downtime_minutes', models.PositiveIntegerField(default=0)),
+                ('manufacturing_order', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='production_rollups', to='erp.manufacturingorder')),
+                ('workstation', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='production_rollups', to='erp.workstation')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['grain', 'workstation', 'bucket_start'], name='erp_product_grain_24199a_idx')],
+                'constraints': [models.UniqueConstraint(fields=('grain', 'bucket_start', 'workstation', 'manufacturing_order'), name='unique_production_rollup_bucket')],
+            },
+        ),
+        migrations.RunPython(backfill_production_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.6 on 2026-10-19 07:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('erp', '0014_productionrollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='manufacturingorder',
+            name='cost_computed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
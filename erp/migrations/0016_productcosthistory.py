@@ -0,0 +1,29 @@
+# Generated by Django 5.1.6 on 2026-10-19 07:43
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('erp', '0015_manufacturingorder_cost_computed_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductCostHistory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('previous_cost', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('unit_cost', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('changed_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cost_history', to='erp.product')),
+            ],
+            options={
+                'verbose_name_plural': 'Product Cost History',
+                'indexes': [models.Index(fields=['product', 'changed_at'], name='erp_product_product_587932_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.1.6 on 2026-10-19 07:48
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('erp', '0016_productcosthistory'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='productinventory',
+            name='reserved_quantity',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name='StockReservation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.PositiveIntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('inventory', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reservations', to='erp.productinventory')),
+                ('sales_order_item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reservations', to='erp.salesorderitem')),
+            ],
+            options={
+                'unique_together': {('sales_order_item', 'inventory')},
+            },
+        ),
+    ]
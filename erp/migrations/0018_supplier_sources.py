@@ -0,0 +1,112 @@
+# Generated by Django 5.1.6 on 2026-10-19 07:51
+
+from collections import defaultdict
+from decimal import Decimal
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+# Copied from erp.purchasing.sourcing as of this migration
+WEIGHTS = {"cost": 0.4, "lead_time": 0.2, "rating": 0.15, "on_time": 0.25}
+NEUTRAL_SCORE = 0.5
+SCORE_PLACES = Decimal("0.0001")
+DELIVERED_STATUSES = ["PARTIAL", "RECEIVED"]
+
+
+def rank_sources(offers, rates, model):
+    """Score and rank the offers of one product, as ``model`` (historical SupplierSource) objects."""
+    cheapest = min(offer["unit_cost"] for offer in offers)
+    fastest = min(offer["lead_time_days"] for offer in offers)
+    scored = []
+    for offer in offers:
+        rate = rates.get(offer["supplier_id"])
+        factors = {
+            "cost": float(cheapest / offer["unit_cost"]) if offer["unit_cost"] else 1.0,
+            "lead_time": (fastest + 1) / (offer["lead_time_days"] + 1),
+            "rating": offer["rating"] / 5 if offer["rating"] else NEUTRAL_SCORE,
+            "on_time": rate if rate is not None else NEUTRAL_SCORE,
+        }
+        score = sum(WEIGHTS[name] * value for name, value in factors.items())
+        scored.append((Decimal(f"{score}").quantize(SCORE_PLACES), rate, offer))
+
+    scored.sort(
+        key=lambda row: (not row[2]["is_preferred"], -row[0], row[2]["unit_cost"], row[2]["supplier_id"])
+    )
+    return [
+        model(
+            product_id=offer["product_id"],
+            supplier_id=offer["supplier_id"],
+            rank=rank,
+            score=score,
+            unit_cost=offer["unit_cost"],
+            lead_time_days=offer["lead_time_days"],
+            min_order_quantity=offer["min_order_quantity"],
+            on_time_rate=Decimal(f"{rate}").quantize(SCORE_PLACES) if rate is not None else None,
+            is_preferred=offer["is_preferred"],
+        )
+        for rank, (score, rate, offer) in enumerate(scored, start=1)
+    ]
+
+
+def backfill_supplier_sources(apps, schema_editor):
+    """Rank the existing offers, so planning and lookups see sources right after the deploy."""
+    SupplierProduct = apps.get_model("erp", "SupplierProduct")
+    SupplierSource = apps.get_model("erp", "SupplierSource")
+    PurchaseOrder = apps.get_model("erp", "PurchaseOrder")
+
+    by_product = defaultdict(list)
+    for offer in SupplierProduct.objects.filter(supplier__is_active=True).values(
+        "product_id",
+        "supplier_id",
+        "unit_cost",
+        "lead_time_days",
+        "min_order_quantity",
+        "is_preferred",
+        rating=models.F("supplier__supplier_rating"),
+    ):
+        by_product[offer["product_id"]].append(offer)
+    rows = (
+        PurchaseOrder.objects.filter(status__in=DELIVERED_STATUSES, actual_delivery__isnull=False)
+        .order_by()
+        .values("supplier_id")
+        .annotate(
+            delivered=models.Count("id"),
+            on_time=models.Count("id", filter=models.Q(actual_delivery__lte=models.F("expected_delivery"))),
+        )
+    )
+    rates = {row["supplier_id"]: row["on_time"] / row["delivered"] for row in rows}
+    SupplierSource.objects.bulk_create(
+        [source for group in by_product.values() for source in rank_sources(group, rates, model=SupplierSource)],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('erp', '0017_stock_reservations'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SupplierSource',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.PositiveSmallIntegerField()),
+                ('score', models.DecimalField(decimal_places=4, max_digits=5)),
+                ('unit_cost', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('lead_time_days', models.PositiveIntegerField(default=0)),
+                ('min_order_quantity', models.PositiveIntegerField(default=1)),
+                ('on_time_rate', models.DecimalField(blank=True, decimal_places=4, max_digits=5, null=True)),
+                ('is_preferred', models.BooleanField(default=False)),
+                ('computed_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sources', to='erp.product')),
+                ('supplier', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sources', to='erp.supplier')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('product', 'rank'), name='unique_product_source_rank')],
+            },
+        ),
+        migrations.RunPython(backfill_supplier_sources, migrations.RunPython.noop),
+    ]
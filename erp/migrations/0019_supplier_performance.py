@@ -0,0 +1,106 @@
+# Generated by Django 5.1.6 on 2026-10-19 07:53
+
+import datetime
+from decimal import Decimal
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models.functions import Coalesce, TruncMonth
+
+# Copied from erp.reporting.suppliers as of this migration
+EXCLUDED_STATUSES = ["DRAFT", "CANCELLED"]
+
+
+def backfill_supplier_performance(apps, schema_editor):
+    """Aggregate the existing purchase orders, so the report has history right after the deploy."""
+    PurchaseOrder = apps.get_model("erp", "PurchaseOrder")
+    PurchaseOrderItem = apps.get_model("erp", "PurchaseOrderItem")
+    SupplierPerformance = apps.get_model("erp", "SupplierPerformance")
+
+    late = models.F("actual_delivery") - models.F("expected_delivery")
+    order_rows = (
+        PurchaseOrder.objects.exclude(status__in=EXCLUDED_STATUSES)
+        .order_by()
+        .values("supplier_id", month=TruncMonth("expected_delivery"))
+        .annotate(
+            purchase_orders=models.Count("id"),
+            delivered_orders=models.Count("id", filter=models.Q(actual_delivery__isnull=False)),
+            on_time_orders=models.Count("id", filter=models.Q(actual_delivery__lte=models.F("expected_delivery"))),
+            late_by=models.Sum(
+                models.Case(
+                    models.When(actual_delivery__gt=models.F("expected_delivery"), then=late),
+                    default=models.Value(datetime.timedelta(0)),
+                    output_field=models.DurationField(),
+                )
+            ),
+        )
+    )
+    item_rows = (
+        PurchaseOrderItem.objects.exclude(purchase_order__status__in=EXCLUDED_STATUSES)
+        .order_by()
+        .values(
+            supplier_id=models.F("purchase_order__supplier_id"),
+            month=TruncMonth("purchase_order__expected_delivery"),
+        )
+        .annotate(
+            lines=models.Count("id"),
+            ordered=models.Sum("quantity_ordered"),
+            received=models.Sum("quantity_received"),
+            spend_total=Coalesce(
+                models.Sum(models.F("quantity_ordered") * models.F("unit_price")), models.Value(Decimal("0"))
+            ),
+        )
+    )
+
+    computed_at = django.utils.timezone.now()
+    stats = {}
+    for row in order_rows:
+        stats[row["supplier_id"], row["month"]] = SupplierPerformance(
+            supplier_id=row["supplier_id"],
+            month=row["month"],
+            purchase_orders=row["purchase_orders"],
+            delivered_orders=row["delivered_orders"],
+            on_time_orders=row["on_time_orders"],
+            days_late=(row["late_by"] or datetime.timedelta(0)).days,
+            computed_at=computed_at,
+        )
+    for row in item_rows:
+        bucket = stats.get((row["supplier_id"], row["month"]))
+        if bucket is not None:
+            bucket.lines = row["lines"]
+            bucket.quantity_ordered = row["ordered"]
+            bucket.quantity_received = row["received"]
+            bucket.spend = row["spend_total"]
+    SupplierPerformance.objects.bulk_create(stats.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('erp', '0018_supplier_sources'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SupplierPerformance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField()),
+                ('purchase_orders', models.PositiveIntegerField(default=0)),
+                ('lines', models.PositiveIntegerField(default=0)),
+                ('delivered_orders', models.PositiveIntegerField(default=0)),
+                ('on_time_orders', models.PositiveIntegerField(default=0)),
+                ('days_late', models.PositiveIntegerField(default=0)),
+                ('quantity_ordered', models.PositiveIntegerField(default=0)),
+                ('quantity_received', models.PositiveIntegerField(default=0)),
+                ('spend', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('computed_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('supplier', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='performance', to='erp.supplier')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('supplier', 'month'), name='unique_supplier_performance_month')],
+            },
+        ),
+        migrations.RunPython(backfill_supplier_performance, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,82 @@
+# Generated by Django 5.1.6 on 2026-10-19 07:54
+
+from decimal import Decimal
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models.functions import TruncMonth
+
+# Copied from erp.reporting.sales as of this migration
+EXCLUDED_STATUSES = ["DRAFT", "CANCELLED"]
+CENTS = Decimal("0.01")
+MONEY = models.DecimalField(max_digits=14, decimal_places=2)
+
+
+def backfill_sales_rollups(apps, schema_editor):
+    """Roll up the existing order lines, so the sales summary has history right after the deploy."""
+    SalesOrderItem = apps.get_model("erp", "SalesOrderItem")
+    SalesRollup = apps.get_model("erp", "SalesRollup")
+
+    gross = models.F("quantity") * models.F("unit_price")
+    discount = gross * models.F("discount_percentage") / models.Value(Decimal("100"))
+    rows = (
+        SalesOrderItem.objects.exclude(sales_order__status__in=EXCLUDED_STATUSES)
+        .order_by()
+        .values(
+            "product_id",
+            customer_id=models.F("sales_order__customer_id"),
+            month=TruncMonth("sales_order__order_date"),
+        )
+        .annotate(
+            lines=models.Count("id"),
+            total_quantity=models.Sum("quantity"),
+            total_gross=models.Sum(models.ExpressionWrapper(gross, output_field=MONEY)),
+            total_discount=models.Sum(models.ExpressionWrapper(discount, output_field=MONEY)),
+        )
+    )
+    rollups = []
+    for row in rows:
+        row_gross = Decimal(row["total_gross"]).quantize(CENTS)
+        row_discount = Decimal(row["total_discount"]).quantize(CENTS)
+        rollups.append(
+            SalesRollup(
+                customer_id=row["customer_id"],
+                product_id=row["product_id"],
+                month=row["month"],
+                order_lines=row["lines"],
+                quantity=row["total_quantity"],
+                gross=row_gross,
+                discount=row_discount,
+                net=row_gross - row_discount,
+            )
+        )
+    SalesRollup.objects.bulk_create(rollups, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('erp', '0019_supplier_performance'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SalesRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField()),
+                ('order_lines', models.PositiveIntegerField(default=0)),
+                ('quantity', models.PositiveIntegerField(default=0)),
+                ('gross', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('discount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('net', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('customer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sales_rollups', to='erp.customer')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sales_rollups', to='erp.product')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['month', 'product'], name='erp_salesro_month_ca9bef_idx')],
+                'constraints': [models.UniqueConstraint(fields=('customer', 'product', 'month'), name='unique_sales_rollup_bucket')],
+            },
+        ),
+        migrations.RunPython(backfill_sales_rollups, migrations.RunPython.noop),
+    ]
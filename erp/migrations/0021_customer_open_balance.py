@@ -0,0 +1,53 @@
+# Generated by Django 5.1.6 on 2026-10-19 07:56
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+# Copied from erp.sales.credit as of this migration
+OPEN_ORDER_STATUSES = ["CONFIRMED", "PROCESSING", "READY", "PARTIAL"]
+UNPAID_INVOICE_STATUSES = ["ISSUED", "PARTIAL", "OVERDUE"]
+MONEY = models.DecimalField(max_digits=14, decimal_places=2)
+ZERO = Decimal("0")
+
+
+def recompute_open_balances(apps, schema_editor):
+    """Start every customer from the exposure of their existing orders and invoices."""
+    Customer = apps.get_model("erp", "Customer")
+    SalesOrder = apps.get_model("erp", "SalesOrder")
+    Invoice = apps.get_model("erp", "Invoice")
+    open_orders = (
+        SalesOrder.objects.filter(customer=models.OuterRef("pk"), status__in=OPEN_ORDER_STATUSES)
+        .order_by()
+        .values("customer")
+        .annotate(total=models.Sum("total_amount"))
+        .values("total")
+    )
+    unpaid_invoices = (
+        Invoice.objects.filter(sales_order__customer=models.OuterRef("pk"), status__in=UNPAID_INVOICE_STATUSES)
+        .order_by()
+        .values("sales_order__customer")
+        .annotate(total=models.Sum("gross_amount"))
+        .values("total")
+    )
+    Customer.objects.update(
+        open_balance=Coalesce(models.Subquery(open_orders), models.Value(ZERO), output_field=MONEY)
+        + Coalesce(models.Subquery(unpaid_invoices), models.Value(ZERO), output_field=MONEY)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('erp', '0020_sales_rollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customer',
+            name='open_balance',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=14),
+        ),
+        migrations.RunPython(recompute_open_balances, migrations.RunPython.noop),
+    ]
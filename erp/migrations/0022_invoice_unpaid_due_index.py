@@ -0,0 +1,17 @@
+# Generated by Django 5.1.6 on 2026-10-19 07:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('erp', '0021_customer_open_balance'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='invoice',
+            index=models.Index(condition=models.Q(('status__in', ['ISSUED', 'PARTIAL'])), fields=['due_date'], name='invoice_unpaid_due_idx'),
+        ),
+    ]
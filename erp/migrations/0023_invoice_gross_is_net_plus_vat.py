@@ -0,0 +1,29 @@
+# Generated by Django 5.1.6 on 2026-10-19 08:01
+
+from decimal import Decimal
+
+import django.db.models.expressions
+from django.db import migrations, models
+
+
+def repair_gross_amounts(apps, schema_editor):
+    """Rows written by bulk paths may have drifted; bring them in line before the check."""
+    Invoice = apps.get_model("erp", "Invoice")
+    Invoice.objects.exclude(net_amount=None).exclude(vat_amount=None).update(
+        gross_amount=models.F("net_amount") + models.F("vat_amount")
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('erp', '0022_invoice_unpaid_due_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(repair_gross_amounts, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='invoice',
+            constraint=models.CheckConstraint(condition=models.Q(('gross_amount__gte', django.db.models.expressions.CombinedExpression(django.db.models.expressions.CombinedExpression(models.F('net_amount'), '+', models.F('vat_amount')), '-', models.Value(Decimal('0.005')))), ('gross_amount__lte', django.db.models.expressions.CombinedExpression(django.db.models.expressions.CombinedExpression(models.F('net_amount'), '+', models.F('vat_amount')), '+', models.Value(Decimal('0.005'))))), name='invoice_gross_is_net_plus_vat'),
+        ),
+    ]
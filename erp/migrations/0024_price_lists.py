@@ -0,0 +1,49 @@
+# Generated by Django 5.1.6 on 2026-10-19 08:03
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('erp', '0023_invoice_gross_is_net_plus_vat'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PriceList',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('description', models.TextField(blank=True, null=True)),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='customer',
+            name='price_list',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='customers', to='erp.pricelist'),
+        ),
+        migrations.CreateModel(
+            name='PriceRule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('min_quantity', models.PositiveIntegerField(default=1)),
+                ('unit_price', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('discount_percentage', models.DecimalField(decimal_places=2, default=0, max_digits=5)),
+                ('valid_from', models.DateField(blank=True, null=True)),
+                ('valid_to', models.DateField(blank=True, null=True)),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('price_list', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='rules', to='erp.pricelist')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='price_rules', to='erp.product')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['product', 'price_list'], name='erp_priceru_product_ee2790_idx')],
+            },
+        ),
+    ]
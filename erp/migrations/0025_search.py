@@ -0,0 +1,79 @@
+# Generated by Django 5.1.6 on 2026-10-19 08:06
+
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+# Weighted columns of each table's search_vector; existing rows and the indexes are done by 0027
+SEARCH_DOCUMENTS = {
+    "erp_product": [("name", "A"), ("sku", "A"), ("description", "C")],
+    "erp_customer": [("name", "A"), ("contact_person", "B"), ("email", "B")],
+    "erp_supplier": [("name", "A"), ("contact_person", "B"), ("email", "B")],
+    "erp_salesorder": [("order_number", "A"), ("notes", "C")],
+}
+
+
+def create_search_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for table, weighted in SEARCH_DOCUMENTS.items():
+        document = " || ".join(
+            f"setweight(to_tsvector('simple', coalesce(NEW.{column}, '')), '{weight}')"
+            for column, weight in weighted
+        )
+        schema_editor.execute(
+            f"""
+            CREATE OR REPLACE FUNCTION {table}_search_vector() RETURNS trigger AS $$
+            BEGIN
+                NEW.search_vector := {document};
+                RETURN NEW;
+            END
+            $$ LANGUAGE plpgsql;
+            CREATE TRIGGER {table}_search_vector BEFORE INSERT OR UPDATE ON {table}
+                FOR EACH ROW EXECUTE FUNCTION {table}_search_vector();
+            """
+        )
+
+
+def drop_search_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for table in SEARCH_DOCUMENTS:
+        schema_editor.execute(
+            f"""
+            DROP TRIGGER IF EXISTS {table}_search_vector ON {table};
+            DROP FUNCTION IF EXISTS {table}_search_vector();
+            """
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('erp', '0024_price_lists'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='customer',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='salesorder',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='supplier',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(create_search_triggers, drop_search_triggers),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.1.6 on 2026-10-19 08:50
+
+from django.db import migrations, models
+
+COUNTERS = ["log_count", "units_produced", "units_defective", "downtime_minutes"]
+
+
+def merge_duplicate_buckets(apps, schema_editor):
+    """Concurrent logs without a workstation may have opened the same bucket twice."""
+    ProductionRollup = apps.get_model("erp", "ProductionRollup")
+    rollups = ProductionRollup.objects.filter(workstation__isnull=True).order_by()
+    duplicates = (
+        rollups.values("grain", "bucket_start", "manufacturing_order_id")
+        .annotate(rows=models.Count("id"), **{f"total_{field}": models.Sum(field) for field in COUNTERS})
+        .filter(rows__gt=1)
+    )
+    for row in duplicates:
+        bucket = rollups.filter(
+            grain=row["grain"],
+            bucket_start=row["bucket_start"],
+            manufacturing_order_id=row["manufacturing_order_id"],
+        )
+        keep = bucket.order_by("id").values_list("id", flat=True).first()
+        bucket.exclude(id=keep).delete()
+        ProductionRollup.objects.filter(id=keep).update(**{field: row[f"total_{field}"] for field in COUNTERS})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('erp', '0025_search'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_buckets, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='productionrollup',
+            constraint=models.UniqueConstraint(condition=models.Q(('workstation__isnull', True)), fields=('grain', 'bucket_start', 'manufacturing_order'), name='unique_production_rollup_bucket_without_workstation'),
+        ),
+    ]
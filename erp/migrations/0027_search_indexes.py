@@ -0,0 +1,65 @@
+# Generated by Django 5.1.6 on 2026-10-19 09:10
+
+from django.db import migrations
+
+# Columns with a trigram index per table; every table also gets a GIN index on search_vector
+TRIGRAM_COLUMNS = {
+    "erp_product": ["name", "sku"],
+    "erp_customer": ["name"],
+    "erp_supplier": ["name"],
+    "erp_salesorder": ["order_number"],
+}
+BATCH_SIZE = 10000
+
+
+def index_definitions():
+    for table, columns in TRIGRAM_COLUMNS.items():
+        yield f"{table}_search_vector_gin", f"{table} USING gin (search_vector)"
+        for column in columns:
+            yield f"{table}_{column}_trgm", f"{table} USING gin ({column} gin_trgm_ops)"
+
+
+def backfill_search_vectors(apps, schema_editor):
+    """Fill search_vector of existing rows through the trigger, one committed batch at a time,
+    so no statement holds row locks on a whole table."""
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for table in TRIGRAM_COLUMNS:
+        with schema_editor.connection.cursor() as cursor:
+            cursor.execute(f"SELECT coalesce(max(id), 0) FROM {table}")
+            [last_id] = cursor.fetchone()
+        for start in range(0, last_id + 1, BATCH_SIZE):
+            schema_editor.execute(
+                f"UPDATE {table} SET search_vector = NULL WHERE id >= %s AND id < %s AND search_vector IS NULL",
+                (start, start + BATCH_SIZE),
+            )
+
+
+def create_search_indexes(apps, schema_editor):
+    """Build the GIN indexes without blocking writes (as AddIndexConcurrently would; these
+    indexes are PostgreSQL only, so they are not declared on the models the SQLite tests use)."""
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for name, definition in index_definitions():
+        schema_editor.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {definition}")
+
+
+def drop_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for name, _ in index_definitions():
+        schema_editor.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('erp', '0026_production_rollup_without_workstation'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_search_vectors, migrations.RunPython.noop),
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
@@ -0,0 +1,93 @@
+# Generated by Django 5.1.6 on 2026-10-19 09:15
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+TABLE = "erp_manufacturingorder"
+# The product's sku is read when the order is written, so orders pick up a renamed sku on their next save
+DOCUMENT = (
+    "setweight(to_tsvector('simple', coalesce(NEW.order_number, '')), 'A')"
+    " || setweight(to_tsvector('simple', coalesce((SELECT sku FROM erp_product WHERE id = NEW.product_id), '')), 'A')"
+    " || setweight(to_tsvector('simple', coalesce(NEW.notes, '')), 'C')"
+)
+INDEXES = {
+    f"{TABLE}_search_vector_gin": f"{TABLE} USING gin (search_vector)",
+    f"{TABLE}_order_number_trgm": f"{TABLE} USING gin (order_number gin_trgm_ops)",
+}
+BATCH_SIZE = 10000
+
+
+def create_search_trigger(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(
+        f"""
+        CREATE OR REPLACE FUNCTION {TABLE}_search_vector() RETURNS trigger AS $$
+        BEGIN
+            NEW.search_vector := {DOCUMENT};
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql;
+        CREATE TRIGGER {TABLE}_search_vector BEFORE INSERT OR UPDATE ON {TABLE}
+            FOR EACH ROW EXECUTE FUNCTION {TABLE}_search_vector();
+        """
+    )
+
+
+def drop_search_trigger(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(
+        f"""
+        DROP TRIGGER IF EXISTS {TABLE}_search_vector ON {TABLE};
+        DROP FUNCTION IF EXISTS {TABLE}_search_vector();
+        """
+    )
+
+
+def backfill_search_vectors(apps, schema_editor):
+    """Fill search_vector of existing orders through the trigger, one committed batch at a time."""
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f"SELECT coalesce(max(id), 0) FROM {TABLE}")
+        [last_id] = cursor.fetchone()
+    for start in range(0, last_id + 1, BATCH_SIZE):
+        schema_editor.execute(
+            f"UPDATE {TABLE} SET search_vector = NULL WHERE id >= %s AND id < %s AND search_vector IS NULL",
+            (start, start + BATCH_SIZE),
+        )
+
+
+def create_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for name, definition in INDEXES.items():
+        schema_editor.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {definition}")
+
+
+def drop_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for name in INDEXES:
+        schema_editor.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('erp', '0027_search_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='manufacturingorder',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(create_search_trigger, drop_search_trigger),
+        migrations.RunPython(backfill_search_vectors, migrations.RunPython.noop),
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
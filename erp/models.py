@@ -1,7 +1,9 @@
 from dataclasses import dataclass
+from decimal import Decimal
 from typing import List
 
 from django.contrib.auth.models import User
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models, transaction
 from django.utils import timezone
 
@@ -55,6 +57,7 @@ class Product(models.Model):
         Warehouse, through="ProductInventory", related_name="products"
     )
     is_active = models.BooleanField(default=True)
+    search_vector = SearchVectorField(null=True, editable=False)  # Kept by a database trigger, see erp.search
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -66,6 +69,26 @@ class Product(models.Model):
         return sum(inv.quantity for inv in self.inventory.all())
 
 
+class ProductCostHistory(models.Model):
+    """Standard cost changes written by the BOM cost rollup"""
+
+    product = models.ForeignKey(
+        Product, on_delete=models.CASCADE, related_name="cost_history"
+    )
+    previous_cost = models.DecimalField(
+        max_digits=10, decimal_places=2, null=True, blank=True
+    )
+    unit_cost = models.DecimalField(max_digits=10, decimal_places=2)
+    changed_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        verbose_name_plural = "Product Cost History"
+        indexes = [models.Index(fields=["product", "changed_at"])]
+
+    def __str__(self):
+        return f"{self.product.name}: {self.previous_cost} -> {self.unit_cost}"
+
+
 class ProductInventory(models.Model):
     """Junction table for the many-to-many relationship between Product and Warehouse"""
 
@@ -76,6 +99,9 @@ class ProductInventory(models.Model):
         Warehouse, on_delete=models.CASCADE, related_name="inventory"
     )
     quantity = models.PositiveIntegerField(default=0)
+    reserved_quantity = models.PositiveIntegerField(
+        default=0
+    )  # Held by stock reservations of confirmed sales orders
     location_code = models.CharField(
         max_length=50, null=True, blank=True
     )  # Aisle-Rack-Shelf code
@@ -90,6 +116,10 @@ class ProductInventory(models.Model):
     def __str__(self):
         return f"{self.product.name} at {self.warehouse.name}: {self.quantity} units"
 
+    @property
+    def available_quantity(self):
+        return self.quantity - self.reserved_quantity
+
 
 # -------------------------
 # 2️⃣ Suppliers & Purchase Orders
@@ -109,6 +139,7 @@ class Supplier(models.Model):
     )  # 1-5 rating
     is_active = models.BooleanField(default=True)
     notes = models.TextField(null=True, blank=True)
+    search_vector = SearchVectorField(null=True, editable=False)  # Kept by a database trigger, see erp.search
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -146,6 +177,37 @@ class SupplierProduct(models.Model):
         return f"{self.product.name} from {self.supplier.name}"
 
 
+class SupplierSource(models.Model):
+    """Ranked sources per product, precomputed by the supplier sourcing service"""
+
+    product = models.ForeignKey(
+        Product, on_delete=models.CASCADE, related_name="sources"
+    )
+    supplier = models.ForeignKey(
+        Supplier, on_delete=models.CASCADE, related_name="sources"
+    )
+    rank = models.PositiveSmallIntegerField()  # 1 = best source
+    score = models.DecimalField(max_digits=5, decimal_places=4)
+    unit_cost = models.DecimalField(max_digits=10, decimal_places=2)
+    lead_time_days = models.PositiveIntegerField(default=0)
+    min_order_quantity = models.PositiveIntegerField(default=1)
+    on_time_rate = models.DecimalField(
+        max_digits=5, decimal_places=4, null=True, blank=True
+    )  # Share of the supplier's deliveries that arrived on time
+    is_preferred = models.BooleanField(default=False)
+    computed_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["product", "rank"], name="unique_product_source_rank"
+            )
+        ]
+
+    def __str__(self):
+        return f"#{self.rank} {self.supplier_id} for {self.product_id}"
+
+
 class PurchaseOrderManager(models.Manager):
     def recent(self):
         return self.filter(
@@ -219,6 +281,19 @@ class PurchaseOrderItem(models.Model):
 # -------------------------
 # 3️⃣ Customers & Sales
 # -------------------------
+class PriceList(models.Model):
+    """A customer group with its own prices, e.g. wholesale or key accounts"""
+
+    name = models.CharField(max_length=100, unique=True)
+    description = models.TextField(null=True, blank=True)
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.name
+
+
 class Customer(models.Model):
     name = models.CharField(max_length=255)
     contact_person = models.CharField(max_length=255, null=True, blank=True)
@@ -229,9 +304,16 @@ class Customer(models.Model):
     credit_limit = models.DecimalField(
         max_digits=12, decimal_places=2, null=True, blank=True
     )
+    open_balance = models.DecimalField(
+        max_digits=14, decimal_places=2, default=0
+    )  # Open orders + unpaid invoices, kept by erp.sales.credit
+    price_list = models.ForeignKey(
+        PriceList, on_delete=models.SET_NULL, null=True, blank=True, related_name="customers"
+    )
     customer_since = models.DateField(null=True, blank=True)
     is_active = models.BooleanField(default=True)
     notes = models.TextField(null=True, blank=True)
+    search_vector = SearchVectorField(null=True, editable=False)  # Kept by a database trigger, see erp.search
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -239,6 +321,34 @@ class Customer(models.Model):
         return self.name
 
 
+class PriceRule(models.Model):
+    """A price or discount for a product, optionally limited to a price list,
+    a minimum quantity (quantity break) and a date range (promotion)"""
+
+    price_list = models.ForeignKey(
+        PriceList, on_delete=models.CASCADE, null=True, blank=True, related_name="rules"
+    )  # Empty = every customer
+    product = models.ForeignKey(
+        Product, on_delete=models.CASCADE, related_name="price_rules"
+    )
+    min_quantity = models.PositiveIntegerField(default=1)
+    unit_price = models.DecimalField(
+        max_digits=10, decimal_places=2, null=True, blank=True
+    )  # Empty = the product's list price
+    discount_percentage = models.DecimalField(max_digits=5, decimal_places=2, default=0)
+    valid_from = models.DateField(null=True, blank=True)
+    valid_to = models.DateField(null=True, blank=True)
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["product", "price_list"])]
+
+    def __str__(self):
+        return f"{self.product_id} from {self.min_quantity} ({self.price_list_id or 'all customers'})"
+
+
 class SalesOrderQuerySet(models.QuerySet):
     def expensive_order(self):
         return self.filter(total_amount__gte=10000)
@@ -265,6 +375,16 @@ class OrderNumber(models.Model):
         self.save()
         return self.last_number
 
+    @classmethod
+    def allocate(cls, count: int) -> range:
+        """Reserve ``count`` consecutive numbers with a single counter update."""
+        with transaction.atomic():
+            counter = cls.objects.select_for_update().order_by("pk").first()
+            if counter is None:
+                counter = cls.objects.create()
+            cls.objects.filter(pk=counter.pk).update(last_number=models.F("last_number") + count)
+            return range(counter.last_number + 1, counter.last_number + 1 + count)
+
 
 class SalesOrder(models.Model):
     objects = SalesOrderQueryManager()
@@ -293,6 +413,7 @@ class SalesOrder(models.Model):
     total_amount = models.DecimalField(max_digits=12, decimal_places=2, default=0)
     notes = models.TextField(null=True, blank=True)
     created_by = models.CharField(max_length=100, null=True, blank=True)
+    search_vector = SearchVectorField(null=True, editable=False)  # Kept by a database trigger, see erp.search
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -307,7 +428,23 @@ class SalesOrder(models.Model):
         if not self.order_number:  # If order_number is not set (new order)
             order_number = self.generate_order_number()
             self.order_number = order_number
-        super().save(*args, **kwargs)
+        # Reserve or release stock together with the status change
+        with transaction.atomic():
+            # The stored row, read and locked once; the save signals compare with it too
+            self._stored = None
+            if self.pk:
+                self._stored = (
+                    SalesOrder.objects.select_for_update()
+                    .filter(pk=self.pk)
+                    .only("customer", "order_date", "status", "total_amount")
+                    .first()
+                )
+            previous_status = self._stored.status if self._stored else None
+            super().save(*args, **kwargs)
+            if previous_status != self.status:
+                from erp.inventory.reservations import apply_status_change
+
+                apply_status_change(self, previous_status)
 
     def generate_order_number(self):
         """Generate the next order number in the format SO-0032."""
@@ -338,6 +475,25 @@ class SalesOrderItem(models.Model):
         return self.quantity * self.unit_price * (1 - self.discount_percentage / 100)
 
 
+class StockReservation(models.Model):
+    """Stock held in one warehouse for a confirmed sales order line"""
+
+    sales_order_item = models.ForeignKey(
+        SalesOrderItem, on_delete=models.CASCADE, related_name="reservations"
+    )
+    inventory = models.ForeignKey(
+        ProductInventory, on_delete=models.CASCADE, related_name="reservations"
+    )
+    quantity = models.PositiveIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ["sales_order_item", "inventory"]
+
+    def __str__(self):
+        return f"{self.quantity} reserved for {self.sales_order_item_id} in {self.inventory_id}"
+
+
 
 class Invoice(models.Model):
 
@@ -399,14 +555,33 @@ class Invoice(models.Model):
         return f"Invoice {self.invoice_number} for Order {self.sales_order.order_number if self.sales_order else 'N/A'}"
 
     def save(self, *args, **kwargs):
-        # Calculate VAT and gross amount before saving the invoice
-        self.vat_amount = self.net_amount * (self.vat_rate / 100)
-        self.gross_amount = self.net_amount + self.vat_amount
+        # Calculate VAT and gross amount before saving the invoice; bulk paths use the same function
+        from erp.invoices.taxes import invoice_taxes
+
+        self.net_amount, self.vat_amount, self.gross_amount = invoice_taxes(self.net_amount, self.vat_rate)
         super().save(*args, **kwargs)
 
     class Meta:
         verbose_name = "Invoice"
         verbose_name_plural = "Invoices"
+        indexes = [
+            # Overdue detection only ever scans unpaid invoices
+            models.Index(
+                fields=["due_date"],
+                condition=models.Q(status__in=["ISSUED", "PARTIAL"]),
+                name="invoice_unpaid_due_idx",
+            )
+        ]
+        constraints = [
+            # Amounts are stored in cents, so this band only admits gross == net + VAT
+            models.CheckConstraint(
+                condition=models.Q(
+                    gross_amount__gte=models.F("net_amount") + models.F("vat_amount") - Decimal("0.005"),
+                    gross_amount__lte=models.F("net_amount") + models.F("vat_amount") + Decimal("0.005"),
+                ),
+                name="invoice_gross_is_net_plus_vat",
+            )
+        ]
 
     @staticmethod
     def generate_invoice_number():
@@ -417,6 +592,13 @@ class Invoice(models.Model):
             number = OrderNumber.objects.first().increment_and_get()
             return f"INV-{year}-{month}/{number}"
 
+    @staticmethod
+    def allocate_invoice_numbers(count: int) -> list:
+        """Reserve ``count`` consecutive invoice numbers with a single counter update."""
+        year = timezone.now().year
+        month = timezone.now().month
+        return [f"INV-{year}-{month}/{number}" for number in OrderNumber.allocate(count)]
+
 
 # -------------------------
 # 4️⃣ Manufacturing & Production
@@ -580,8 +762,12 @@ class ManufacturingOrder(models.Model):
     production_cost = models.DecimalField(
         max_digits=12, decimal_places=2, null=True, blank=True
     )
+    cost_computed_at = models.DateTimeField(
+        null=True, blank=True
+    )  # Last run of the costing job for this order
     notes = models.TextField(null=True, blank=True)
     created_by = models.CharField(max_length=100, null=True, blank=True)
+    search_vector = SearchVectorField(null=True, editable=False)  # Kept by a database trigger, see erp.search
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -907,8 +1093,143 @@ class ProductionKPI(models.Model):
         Employee, on_delete=models.CASCADE, related_name="kpis", null=True, blank=True
     )
     manufacturing_order = models.ForeignKey(
-        ManufacturingOrder, on_delete=models.CASCADE
+        ManufacturingOrder, on_delete=models.CASCADE, null=True, blank=True
+    )
+    planned_minutes = models.PositiveIntegerField(default=0)  # Scheduled shift time
+    downtime_minutes = models.PositiveIntegerField(default=0)
+    units_produced = models.PositiveIntegerField(default=0)
+    units_defective = models.PositiveIntegerField(default=0)
+    availability = models.DecimalField(
+        max_digits=5, decimal_places=4, null=True, blank=True
+    )  # Run time / planned time
+    performance = models.DecimalField(
+        max_digits=5, decimal_places=4, null=True, blank=True
+    )  # Actual output / ideal output at capacity_per_hour
+    quality = models.DecimalField(
+        max_digits=5, decimal_places=4, null=True, blank=True
+    )  # Good units / units produced
+    oee = models.DecimalField(max_digits=5, decimal_places=4, null=True, blank=True)
+    computed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["date", "workstation"])]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["workstation", "date"],
+                condition=models.Q(
+                    employee__isnull=True, manufacturing_order__isnull=True
+                ),
+                name="unique_workstation_daily_kpi",
+            )
+        ]
+
+    def __str__(self):
+        return f"KPI for {self.workstation} on {self.date}"
+
+
+class ProductionRollup(models.Model):
+    """Production log totals downsampled to hourly, daily and monthly buckets"""
+
+    GRAIN_CHOICES = [
+        ("HOUR", "Hourly"),
+        ("DAY", "Daily"),
+        ("MONTH", "Monthly"),
+    ]
+
+    grain = models.CharField(max_length=10, choices=GRAIN_CHOICES)
+    bucket_start = models.DateTimeField()
+    workstation = models.ForeignKey(
+        Workstation,
+        on_delete=models.CASCADE,
+        related_name="production_rollups",
+        null=True,
+        blank=True,
     )
+    manufacturing_order = models.ForeignKey(
+        ManufacturingOrder,
+        on_delete=models.CASCADE,
+        related_name="production_rollups",
+        null=True,
+        blank=True,
+    )
+    log_count = models.PositiveIntegerField(default=0)
+    units_produced = models.PositiveIntegerField(default=0)
+    units_defective = models.PositiveIntegerField(default=0)
+    downtime_minutes = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["grain", "bucket_start", "workstation", "manufacturing_order"],
+                name="unique_production_rollup_bucket",
+            ),
+            # NULLs are distinct in the constraint above, logs without a workstation get their own
+            models.UniqueConstraint(
+                fields=["grain", "bucket_start", "manufacturing_order"],
+                condition=models.Q(workstation__isnull=True),
+                name="unique_production_rollup_bucket_without_workstation",
+            ),
+        ]
+        indexes = [models.Index(fields=["grain", "workstation", "bucket_start"])]
+
+    def __str__(self):
+        return f"{self.grain} rollup for {self.workstation} at {self.bucket_start}"
+
+
+class SalesRollup(models.Model):
+    """Sales order line totals per customer, product and order month"""
+
+    customer = models.ForeignKey(
+        Customer, on_delete=models.CASCADE, related_name="sales_rollups"
+    )
+    product = models.ForeignKey(
+        Product, on_delete=models.CASCADE, related_name="sales_rollups"
+    )
+    month = models.DateField()  # First day of the order month
+    order_lines = models.PositiveIntegerField(default=0)
+    quantity = models.PositiveIntegerField(default=0)
+    gross = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    discount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    net = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["customer", "product", "month"], name="unique_sales_rollup_bucket"
+            )
+        ]
+        indexes = [models.Index(fields=["month", "product"])]
+
+    def __str__(self):
+        return f"Sales of {self.product_id} to {self.customer_id} in {self.month:%Y-%m}"
+
+
+class SupplierPerformance(models.Model):
+    """Monthly delivery and fill-rate totals per supplier, by PO expected delivery month"""
+
+    supplier = models.ForeignKey(
+        Supplier, on_delete=models.CASCADE, related_name="performance"
+    )
+    month = models.DateField()  # First day of the month
+    purchase_orders = models.PositiveIntegerField(default=0)
+    lines = models.PositiveIntegerField(default=0)
+    delivered_orders = models.PositiveIntegerField(default=0)
+    on_time_orders = models.PositiveIntegerField(default=0)
+    days_late = models.PositiveIntegerField(default=0)  # Summed over delivered orders
+    quantity_ordered = models.PositiveIntegerField(default=0)
+    quantity_received = models.PositiveIntegerField(default=0)
+    spend = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    computed_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["supplier", "month"], name="unique_supplier_performance_month"
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.supplier_id} performance for {self.month:%Y-%m}"
 
 
 # -------------------------
@@ -0,0 +1,30 @@
+"""JSON request parsing with orjson, when installed (the ``fast`` extra).
+
+Like DRF's strict ``JSONParser``, NaN and Infinity are rejected. Bodies in an
+encoding other than UTF-8, and parsers without orjson, use ``JSONParser``.
+"""
+
+import io
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+
+from erp.renderers import FastJSONRenderer, orjson
+
+
+class FastJSONParser(JSONParser):
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get("encoding", settings.DEFAULT_CHARSET)
+        if orjson is None or encoding.lower().replace("-", "") != "utf8":
+            return super().parse(stream, media_type, parser_context)
+        body = stream.read()
+        try:
+            return orjson.loads(body)
+        except orjson.JSONDecodeError as exc:
+            if not self.strict:
+                # orjson always rejects NaN and Infinity, the stdlib accepts them when not strict
+                return super().parse(io.BytesIO(body), media_type, parser_context)
+            raise ParseError(f"JSON parse error - {exc}") from exc
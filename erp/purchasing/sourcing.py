@@ -0,0 +1,183 @@
+"""Supplier sourcing: a precomputed, ranked list of sources per product.
+
+Each active ``SupplierProduct`` gets a score between 0 and 1 from
+
+* cost: cheapest cost for the product / this cost;
+* lead time: (shortest lead time + 1) / (this lead time + 1);
+* rating: ``Supplier.supplier_rating`` / 5;
+* on time: share of the supplier's delivered purchase orders whose
+  ``actual_delivery`` was not after ``expected_delivery``.
+
+Unknown ratings and suppliers without delivery history score NEUTRAL_SCORE on
+that factor. Preferred sources rank before the rest, then by score. Rankings are
+stored in ``SupplierSource`` and cached per product, so looking up the sources
+of a product is one cache read.
+"""
+
+import logging
+from collections import defaultdict
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F, Q
+from django.utils import timezone
+
+from erp import caching
+from erp.models import PurchaseOrder, SupplierProduct, SupplierSource
+
+logger = logging.getLogger(__name__)
+
+CACHE_PREFIX = "sourcing:product:"
+CACHE_TIMEOUT = 24 * 60 * 60
+WEIGHTS = {"cost": 0.4, "lead_time": 0.2, "rating": 0.15, "on_time": 0.25}
+NEUTRAL_SCORE = 0.5
+SCORE_PLACES = Decimal("0.0001")
+DELIVERED_STATUSES = ["PARTIAL", "RECEIVED"]
+
+
+def on_time_rates(supplier_ids=None) -> dict:
+    """Share of delivered purchase orders that arrived on time, per supplier id."""
+    orders = PurchaseOrder.objects.filter(
+        status__in=DELIVERED_STATUSES, actual_delivery__isnull=False
+    )
+    if supplier_ids is not None:
+        orders = orders.filter(supplier_id__in=supplier_ids)
+    rows = (
+        orders.order_by()
+        .values("supplier_id")
+        .annotate(
+            delivered=Count("id"),
+            on_time=Count("id", filter=Q(actual_delivery__lte=F("expected_delivery"))),
+        )
+    )
+    return {row["supplier_id"]: row["on_time"] / row["delivered"] for row in rows}
+
+
+def rank_sources(offers, rates: dict) -> list:
+    """Score and rank the offers of one product.
+
+    ``offers`` are dicts with supplier_id, unit_cost, lead_time_days,
+    min_order_quantity, is_preferred and rating. Returns SupplierSource objects.
+    """
+    cheapest = min(offer["unit_cost"] for offer in offers)
+    fastest = min(offer["lead_time_days"] for offer in offers)
+    scored = []
+    for offer in offers:
+        rate = rates.get(offer["supplier_id"])
+        factors = {
+            "cost": float(cheapest / offer["unit_cost"]) if offer["unit_cost"] else 1.0,
+            "lead_time": (fastest + 1) / (offer["lead_time_days"] + 1),
+            "rating": offer["rating"] / 5 if offer["rating"] else NEUTRAL_SCORE,
+            "on_time": rate if rate is not None else NEUTRAL_SCORE,
+        }
+        score = sum(WEIGHTS[name] * value for name, value in factors.items())
+        scored.append((Decimal(f"{score}").quantize(SCORE_PLACES), rate, offer))
+
+    scored.sort(
+        key=lambda row: (not row[2]["is_preferred"], -row[0], row[2]["unit_cost"], row[2]["supplier_id"])
+    )
+    return [
+        SupplierSource(
+            product_id=offer["product_id"],
+            supplier_id=offer["supplier_id"],
+            rank=rank,
+            score=score,
+            unit_cost=offer["unit_cost"],
+            lead_time_days=offer["lead_time_days"],
+            min_order_quantity=offer["min_order_quantity"],
+            on_time_rate=Decimal(f"{rate}").quantize(SCORE_PLACES) if rate is not None else None,
+            is_preferred=offer["is_preferred"],
+        )
+        for rank, (score, rate, offer) in enumerate(scored, start=1)
+    ]
+
+
+def refresh_supplier_sources(product_ids=None, supplier_ids=None) -> int:
+    """Recompute rankings of the given products, or of every product the given
+    suppliers offer, or of all products. Returns the number of sources stored."""
+    offers = SupplierProduct.objects.all()
+    if supplier_ids is not None:
+        product_ids = set(product_ids or ()) | set(
+            offers.filter(supplier_id__in=supplier_ids).values_list("product_id", flat=True)
+        )
+    if product_ids is not None:
+        product_ids = set(product_ids)
+        if not product_ids:
+            return 0
+        offers = offers.filter(product_id__in=product_ids)
+
+    by_product = defaultdict(list)
+    for offer in offers.filter(supplier__is_active=True).values(
+        "product_id",
+        "supplier_id",
+        "unit_cost",
+        "lead_time_days",
+        "min_order_quantity",
+        "is_preferred",
+        rating=F("supplier__supplier_rating"),
+    ):
+        by_product[offer["product_id"]].append(offer)
+
+    rates = on_time_rates({offer["supplier_id"] for group in by_product.values() for offer in group})
+    computed_at = timezone.now()
+    sources = []
+    for group in by_product.values():
+        for source in rank_sources(group, rates):
+            source.computed_at = computed_at
+            sources.append(source)
+
+    with transaction.atomic():
+        stale = SupplierSource.objects.all()
+        if product_ids is not None:
+            stale = stale.filter(product_id__in=product_ids)
+        else:
+            # Products that lost all their sources must be dropped from the cache too
+            product_ids = set(by_product) | set(stale.values_list("product_id", flat=True).distinct())
+        stale.delete()
+        SupplierSource.objects.bulk_create(sources, batch_size=1000)
+        caching.bump_generation(SupplierSource)
+
+    cache.delete_many([f"{CACHE_PREFIX}{pid}" for pid in product_ids])
+    logger.info(f"Ranked {len(sources)} sources of {len(by_product)} products")
+    return len(sources)
+
+
+def ranked_sources(product_id: int) -> list:
+    """Sources of a product, best first, as dicts. Served from the cache."""
+    key = f"{CACHE_PREFIX}{product_id}"
+    sources = cache.get(key)
+    if sources is None:
+        sources = list(
+            SupplierSource.objects.filter(product_id=product_id)
+            .order_by("rank")
+            .values(
+                "rank",
+                "supplier_id",
+                "score",
+                "unit_cost",
+                "lead_time_days",
+                "min_order_quantity",
+                "on_time_rate",
+                "is_preferred",
+            )
+        )
+        cache.set(key, sources, CACHE_TIMEOUT)
+    return sources
+
+
+def best_source(product_id: int):
+    """The top ranked source of a product, None if nobody supplies it."""
+    sources = ranked_sources(product_id)
+    return sources[0] if sources else None
+
+
+def queue_refresh(product_ids=None, supplier_ids=None) -> None:
+    """Re-rank in the background once the current transaction commits."""
+    from erp.tasks import update_supplier_sources
+
+    product_ids = sorted(product_ids) if product_ids is not None else None
+    supplier_ids = sorted(supplier_ids) if supplier_ids is not None else None
+    transaction.on_commit(
+        lambda: update_supplier_sources.delay(product_ids=product_ids, supplier_ids=supplier_ids)
+    )
@@ -0,0 +1,40 @@
+"""JSON rendering with orjson.
+
+``FastJSONRenderer`` produces the same bytes as DRF's ``JSONRenderer`` for the
+API's compact UTF-8 output, several times faster on large lists. Types orjson
+does not know (``Decimal``, lazy translation strings, timedeltas, named tuples,
+NumPy values) go through DRF's encoder, and output orjson cannot produce
+(indentation for the browsable API, ASCII-only or non-compact settings, integers
+over 64 bits) falls back to ``JSONRenderer``. Without orjson installed (the
+``fast`` extra) the renderer is ``JSONRenderer``.
+"""
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils import encoders
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None  # type: ignore[assignment]
+
+OPTIONS = (orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS) if orjson else 0
+_default = encoders.JSONEncoder().default
+
+
+class FastJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        if (
+            orjson is None
+            or self.ensure_ascii
+            or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context or {}) is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(data, default=_default, option=OPTIONS)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        # Same escaping as JSONRenderer, keeping the output a strict javascript subset
+        return ret.replace("\u2028".encode(), b"\\u2028").replace("\u2029".encode(), b"\\u2029")
@@ -0,0 +1,143 @@
+import logging
+from decimal import Decimal
+
+import numpy as np
+from django.db import transaction
+from django.db.models import Max, Q, Sum
+from django.utils import timezone
+
+from erp.costing.labor import seconds_of_day, shift_hours_array
+from erp.models import ProductionKPI, ProductionLog, Shift
+
+logger = logging.getLogger(__name__)
+
+RATIO_PLACES = 4
+WORKSTATION_DAY = Q(employee__isnull=True, manufacturing_order__isnull=True)
+NON_WORKING_SHIFT_STATUSES = ["ABSENT", "CANCELLED"]
+
+
+def dirty_dates(since=None) -> list:
+    """Dates with production logs created since the last KPI run (all dates on the first run)."""
+    if since is None:
+        since = ProductionKPI.objects.filter(WORKSTATION_DAY).aggregate(
+            last_run=Max("computed_at")
+        )["last_run"]
+
+    logs = ProductionLog.objects.all()
+    if since is not None:
+        logs = logs.filter(created_at__gte=since)
+    return sorted(logs.order_by().values_list("date", flat=True).distinct())
+
+
+def planned_minutes(dates) -> dict:
+    """Scheduled shift minutes per (workstation_id, date), net of breaks.
+
+    Several employees on the same shift window share one machine, so identical
+    windows are counted once.
+    """
+    rows = list(
+        Shift.objects.filter(shift_date__in=dates, workstation__isnull=False)
+        .exclude(status__in=NON_WORKING_SHIFT_STATUSES)
+        .annotate(start=seconds_of_day("start_time"), end=seconds_of_day("end_time"))
+        .values_list("workstation_id", "shift_date", "start", "end", "break_minutes")
+        .order_by()
+        .distinct()
+    )
+    if not rows:
+        return {}
+
+    workstation_column, day_column, start, end, breaks = zip(*rows)
+    workstation_ids = np.array(workstation_column, dtype=np.int64)
+    days = np.array(day_column, dtype="datetime64[D]")
+    minutes = np.clip(shift_hours_array(start, end, breaks) * 60, 0, None)
+
+    keys, inverse = np.unique(
+        np.stack([workstation_ids, days.astype(np.int64)], axis=1),
+        axis=0,
+        return_inverse=True,
+    )
+    totals = np.bincount(inverse.ravel(), weights=minutes)
+    return {
+        (int(workstation_id), day): total
+        for workstation_id, day, total in zip(
+            keys[:, 0], keys[:, 1].astype("datetime64[D]").tolist(), totals
+        )
+    }
+
+
+def _ratio(value):
+    if np.isnan(value):
+        return None
+    return Decimal(f"{value:.{RATIO_PLACES}f}")
+
+
+def build_daily_kpis(dates, computed_at=None) -> list:
+    """Build unsaved workstation-day ProductionKPI rows for the given dates."""
+    logs = list(
+        ProductionLog.objects.filter(date__in=dates, workstation__isnull=False)
+        .values("workstation_id", "date")
+        .annotate(
+            produced=Sum("units_produced"),
+            defective=Sum("units_defective"),
+            downtime=Sum("downtime_minutes"),
+            capacity=Max("workstation__capacity_per_hour"),
+        )
+        .order_by()
+    )
+    if not logs:
+        return []
+
+    shift_minutes = planned_minutes(dates)
+    planned = np.array(
+        [shift_minutes.get((log["workstation_id"], log["date"]), 0.0) for log in logs]
+    )
+    produced = np.array([log["produced"] for log in logs], dtype=float)
+    defective = np.array([log["defective"] for log in logs], dtype=float)
+    downtime = np.array([log["downtime"] for log in logs], dtype=float)
+    capacity = np.array([log["capacity"] or 0 for log in logs], dtype=float)
+
+    run = np.clip(planned - downtime, 0, None)
+    ideal_units = capacity * run / 60
+    with np.errstate(divide="ignore", invalid="ignore"):
+        availability = np.where(planned > 0, run / planned, np.nan)
+        # Capped at 1.0 so an optimistic capacity rating cannot inflate OEE
+        performance = np.where(
+            ideal_units > 0, np.minimum(produced / ideal_units, 1.0), np.nan
+        )
+        quality = np.where(
+            produced > 0, np.clip(produced - defective, 0, None) / produced, np.nan
+        )
+    oee = availability * performance * quality
+
+    return [
+        ProductionKPI(
+            date=log["date"],
+            workstation_id=log["workstation_id"],
+            planned_minutes=round(planned[i]),
+            downtime_minutes=log["downtime"],
+            units_produced=log["produced"],
+            units_defective=log["defective"],
+            availability=_ratio(availability[i]),
+            performance=_ratio(performance[i]),
+            quality=_ratio(quality[i]),
+            oee=_ratio(oee[i]),
+            computed_at=computed_at,
+        )
+        for i, log in enumerate(logs)
+    ]
+
+
+def refresh_production_kpis(dates=None) -> int:
+    """Recompute workstation-day KPIs for ``dates``, or for days with new logs."""
+    started_at = timezone.now()
+    dates = sorted(set(dates)) if dates is not None else dirty_dates()
+    if not dates:
+        return 0
+
+    kpis = build_daily_kpis(dates, computed_at=started_at)
+    with transaction.atomic():
+        ProductionKPI.objects.filter(WORKSTATION_DAY, date__in=dates).delete()
+        ProductionKPI.objects.bulk_create(kpis, batch_size=1000)
+
+    logger.info(f"Refreshed {len(kpis)} production KPIs for {len(dates)} days")
+    return len(kpis)
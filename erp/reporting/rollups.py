@@ -0,0 +1,227 @@
+import csv
+import datetime
+import gzip
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Sum, Value
+from django.db.models.functions import Coalesce, ExtractHour, TruncMonth
+from django.utils import timezone
+
+from erp.models import ProductionLog, ProductionRollup
+
+logger = logging.getLogger(__name__)
+
+# Coarsest first, with the shortest span a bucket of that grain can cover
+GRAIN_WIDTHS = {
+    "MONTH": datetime.timedelta(days=28),
+    "DAY": datetime.timedelta(days=1),
+    "HOUR": datetime.timedelta(hours=1),
+}
+DEFAULT_TREND_POINTS = 400
+LOG_ARCHIVE_FIELDS = [
+    "id",
+    "manufacturing_order_id",
+    "manufacturing_step_id",
+    "workstation_id",
+    "date",
+    "start_time",
+    "end_time",
+    "units_produced",
+    "units_defective",
+    "downtime_minutes",
+    "downtime_reason",
+    "remarks",
+    "created_by",
+    "created_at",
+]
+
+_paused = ContextVar("production_rollups_paused", default=False)
+
+
+@contextmanager
+def rollups_paused():
+    """Skip incremental rollup maintenance, e.g. while archiving raw logs."""
+    token = _paused.set(True)
+    try:
+        yield
+    finally:
+        _paused.reset(token)
+
+
+def bucket_starts(date: datetime.date, start_time: datetime.time | None = None) -> dict:
+    """Start of the hour, day and month bucket a log on ``date`` falls into."""
+    hour = start_time.hour if start_time else 0
+    utc = datetime.timezone.utc
+    return {
+        "HOUR": datetime.datetime(date.year, date.month, date.day, hour, tzinfo=utc),
+        "DAY": datetime.datetime(date.year, date.month, date.day, tzinfo=utc),
+        "MONTH": datetime.datetime(date.year, date.month, 1, tzinfo=utc),
+    }
+
+
+def apply_log(log: ProductionLog, sign: int = 1):
+    """Add (or with ``sign=-1`` remove) one log's totals to its rollup buckets."""
+    if _paused.get():
+        return
+
+    deltas = {
+        "log_count": sign,
+        "units_produced": sign * log.units_produced,
+        "units_defective": sign * log.units_defective,
+        "downtime_minutes": sign * log.downtime_minutes,
+    }
+    increments = {field: F(field) + delta for field, delta in deltas.items()}
+    rollups = ProductionRollup.objects.select_for_update()
+    with transaction.atomic():
+        for grain, bucket_start in bucket_starts(log.date, log.start_time).items():
+            key = {
+                "grain": grain,
+                "bucket_start": bucket_start,
+                "workstation_id": log.workstation_id,
+                "manufacturing_order_id": log.manufacturing_order_id,
+            }
+            if sign < 0:
+                rollups.filter(**key).update(**increments)
+                continue
+            # Locks the bucket, or creates it; a concurrent create loses on the unique constraint and re-reads
+            rollup, created = rollups.get_or_create(**key, defaults=deltas)
+            if not created:
+                rollups.filter(pk=rollup.pk).update(**increments)
+
+
+def rebuild_production_rollups(start_date: datetime.date, end_date: datetime.date) -> int:
+    """Rebuild every bucket of the months spanning ``start_date``..``end_date`` from raw logs.
+
+    Use it to backfill after bulk loads, which bypass the signals. Do not rebuild
+    months whose raw logs have already been archived.
+    """
+    start_date = start_date.replace(day=1)
+    end_month = end_date.replace(day=1)
+    end_date = (end_month + datetime.timedelta(days=32)).replace(day=1)
+
+    logs = ProductionLog.objects.filter(date__gte=start_date, date__lt=end_date).order_by()
+    totals = {
+        "log_count": Count("id"),
+        "units_produced": Sum("units_produced"),
+        "units_defective": Sum("units_defective"),
+        "downtime_minutes": Sum("downtime_minutes"),
+    }
+    keys = ["workstation_id", "manufacturing_order_id"]
+
+    rollups = []
+    for row in logs.values(
+        *keys, "date", hour=Coalesce(ExtractHour("start_time"), Value(0))
+    ).annotate(**totals):
+        bucket = bucket_starts(row["date"])["DAY"].replace(hour=row["hour"])
+        rollups.append(_rollup("HOUR", bucket, row))
+    for row in logs.values(*keys, "date").annotate(**totals):
+        rollups.append(_rollup("DAY", bucket_starts(row["date"])["DAY"], row))
+    for row in logs.values(*keys, month=TruncMonth("date")).annotate(**totals):
+        rollups.append(_rollup("MONTH", bucket_starts(row["month"])["MONTH"], row))
+
+    with transaction.atomic():
+        ProductionRollup.objects.filter(
+            bucket_start__gte=bucket_starts(start_date)["DAY"],
+            bucket_start__lt=bucket_starts(end_date)["DAY"],
+        ).delete()
+        ProductionRollup.objects.bulk_create(rollups, batch_size=1000)
+
+    logger.info(f"Rebuilt {len(rollups)} production rollups from {start_date} to {end_date}")
+    return len(rollups)
+
+
+def _rollup(grain: str, bucket_start: datetime.datetime, row: dict) -> ProductionRollup:
+    return ProductionRollup(
+        grain=grain,
+        bucket_start=bucket_start,
+        workstation_id=row["workstation_id"],
+        manufacturing_order_id=row["manufacturing_order_id"],
+        log_count=row["log_count"],
+        units_produced=row["units_produced"],
+        units_defective=row["units_defective"],
+        downtime_minutes=row["downtime_minutes"],
+    )
+
+
+def select_grain(
+    start: datetime.datetime,
+    end: datetime.datetime,
+    resolution: datetime.timedelta | None = None,
+) -> str:
+    """Coarsest grain whose buckets are no wider than the requested resolution.
+
+    Without a resolution, the finest grain that keeps the range within
+    DEFAULT_TREND_POINTS buckets.
+    """
+    if resolution is None:
+        for grain, width in reversed(GRAIN_WIDTHS.items()):
+            if (end - start) / width <= DEFAULT_TREND_POINTS:
+                return grain
+        return "MONTH"
+
+    for grain, width in GRAIN_WIDTHS.items():
+        if width <= resolution:
+            return grain
+    return "HOUR"
+
+
+def production_trend(
+    start: datetime.datetime,
+    end: datetime.datetime,
+    resolution: datetime.timedelta | None = None,
+    workstation_id: int | None = None,
+    manufacturing_order_id: int | None = None,
+):
+    """Production totals between ``start`` and ``end`` read from the rollup tables."""
+    grain = select_grain(start, end, resolution)
+    first_bucket = bucket_starts(start.date(), start.time())[grain]
+
+    rollups = ProductionRollup.objects.filter(
+        grain=grain, bucket_start__gte=first_bucket, bucket_start__lt=end
+    )
+    if workstation_id is not None:
+        rollups = rollups.filter(workstation_id=workstation_id)
+    if manufacturing_order_id is not None:
+        rollups = rollups.filter(manufacturing_order_id=manufacturing_order_id)
+
+    series = (
+        rollups.values("bucket_start")
+        .annotate(
+            log_count=Sum("log_count"),
+            units_produced=Sum("units_produced"),
+            units_defective=Sum("units_defective"),
+            downtime_minutes=Sum("downtime_minutes"),
+        )
+        .order_by("bucket_start")
+    )
+    return grain, list(series)
+
+
+def archive_production_logs(output_dir: Path, retention_days: int | None = None) -> int:
+    """Write raw logs older than the retention window to a gzipped CSV and delete them.
+
+    The rollups keep their totals, so long-range trends are unaffected.
+    """
+    if retention_days is None:
+        retention_days = getattr(settings, "PRODUCTION_LOG_RETENTION_DAYS", 730)
+    cutoff = timezone.now().date() - datetime.timedelta(days=retention_days)
+    old_logs = ProductionLog.objects.filter(date__lt=cutoff)
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    path = output_dir / f"production_logs_before_{cutoff.isoformat()}.csv.gz"
+    with transaction.atomic(), rollups_paused():
+        with gzip.open(path, "wt", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(LOG_ARCHIVE_FIELDS)
+            writer.writerows(
+                old_logs.order_by("id").values_list(*LOG_ARCHIVE_FIELDS).iterator(chunk_size=5000)
+            )
+        _, deleted = old_logs.delete()
+
+    logger.info(f"Archived production logs before {cutoff} to {path}")
+    return deleted.get(ProductionLog._meta.label, 0)
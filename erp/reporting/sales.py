@@ -0,0 +1,180 @@
+"""Sales rollup: quantity, gross, discount and net per customer, product and month.
+
+Line totals are the SQL form of ``SalesOrderItem.line_total()``. Orders count in
+the month of their ``order_date``; drafts and cancelled orders are left out.
+Only the (customer, month) buckets touched by a changed order are recomputed,
+and reports aggregate the rollup instead of the raw order lines. Line changes
+are collected and refreshed once the transaction commits, one refresh per
+bucket however many lines changed.
+"""
+
+import datetime
+import logging
+import threading
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Q, Sum, Value
+from django.db.models.functions import TruncMonth, TruncQuarter, TruncYear
+
+from erp.models import SalesOrder, SalesOrderItem, SalesRollup
+
+logger = logging.getLogger(__name__)
+
+EXCLUDED_STATUSES = ["DRAFT", "CANCELLED"]
+CENTS = Decimal("0.01")
+MONEY = DecimalField(max_digits=14, decimal_places=2)
+GROUP_FIELDS = {"customer": "customer_id", "product": "product_id", "category": "product__category"}
+PERIOD_FUNCTIONS = {"month": TruncMonth, "quarter": TruncQuarter, "year": TruncYear}
+TOTALS = ["order_lines", "quantity", "gross", "discount", "net"]
+
+_pending = threading.local()
+
+
+def line_totals(prefix: str = "") -> dict:
+    """``gross``, ``discount`` and ``net`` of a sales order line as SQL expressions."""
+    gross = F(f"{prefix}quantity") * F(f"{prefix}unit_price")
+    discount = gross * F(f"{prefix}discount_percentage") / Value(Decimal("100"))
+    return {
+        "gross": ExpressionWrapper(gross, output_field=MONEY),
+        "discount": ExpressionWrapper(discount, output_field=MONEY),
+        "net": ExpressionWrapper(gross - discount, output_field=MONEY),
+    }
+
+
+def month_start(date: datetime.date) -> datetime.date:
+    return date.replace(day=1)
+
+
+def order_bucket(order) -> tuple:
+    order_date = SalesOrder._meta.get_field("order_date").to_python(order.order_date)
+    if isinstance(order_date, datetime.datetime):
+        order_date = order_date.date()
+    return order.customer_id, month_start(order_date)
+
+
+def _next_month(month: datetime.date) -> datetime.date:
+    return (month + datetime.timedelta(days=32)).replace(day=1)
+
+
+def refresh_sales_rollups(buckets=None) -> int:
+    """Recompute the given (customer id, month) buckets, or the whole rollup."""
+    items = SalesOrderItem.objects.exclude(sales_order__status__in=EXCLUDED_STATUSES)
+    stale = SalesRollup.objects.all()
+    if buckets is not None:
+        buckets = {(customer_id, month_start(month)) for customer_id, month in buckets}
+        if not buckets:
+            return 0
+        lines, months = Q(pk__in=[]), Q(pk__in=[])
+        for customer_id, month in buckets:
+            lines |= Q(
+                sales_order__customer_id=customer_id,
+                sales_order__order_date__gte=month,
+                sales_order__order_date__lt=_next_month(month),
+            )
+            months |= Q(customer_id=customer_id, month=month)
+        items = items.filter(lines)
+        stale = stale.filter(months)
+
+    totals = line_totals()
+    rows = (
+        items.order_by()
+        .values(
+            "product_id",
+            customer_id=F("sales_order__customer_id"),
+            month=TruncMonth("sales_order__order_date"),
+        )
+        .annotate(
+            lines=Count("id"),
+            total_quantity=Sum("quantity"),
+            total_gross=Sum(totals["gross"]),
+            total_discount=Sum(totals["discount"]),
+        )
+    )
+    rollups = []
+    for row in rows:
+        gross = Decimal(row["total_gross"]).quantize(CENTS)
+        discount = Decimal(row["total_discount"]).quantize(CENTS)
+        rollups.append(
+            SalesRollup(
+                customer_id=row["customer_id"],
+                product_id=row["product_id"],
+                month=row["month"],
+                order_lines=row["lines"],
+                quantity=row["total_quantity"],
+                gross=gross,
+                discount=discount,
+                net=gross - discount,
+            )
+        )
+
+    with transaction.atomic():
+        stale.delete()
+        SalesRollup.objects.bulk_create(rollups, batch_size=1000)
+
+    logger.info(f"Refreshed {len(rollups)} sales rollup rows")
+    return len(rollups)
+
+
+def queue_order_refresh(order_id: int) -> None:
+    """Refresh the bucket of an order whose lines changed, once the current transaction commits."""
+    pending = _pending.__dict__.setdefault("order_ids", set())
+    pending.add(order_id)
+    transaction.on_commit(_refresh_pending_orders)
+
+
+def _refresh_pending_orders() -> None:
+    # The first callback of a commit refreshes every order queued so far, the others find nothing
+    order_ids = getattr(_pending, "order_ids", None)
+    if not order_ids:
+        return
+    _pending.order_ids = set()
+    orders = SalesOrder.objects.filter(pk__in=order_ids).exclude(status__in=EXCLUDED_STATUSES)
+    buckets = {order_bucket(order) for order in orders.only("customer", "order_date")}
+    if buckets:
+        refresh_sales_rollups(buckets)
+
+
+def sales_summary(
+    start: datetime.date,
+    end: datetime.date,
+    group_by=("month",),
+    customer_id=None,
+    product_id=None,
+    category=None,
+) -> list:
+    """Sales totals sliced by any of customer, product, category and one period
+    (month, quarter, year), read from the rollup."""
+    rows = SalesRollup.objects.filter(month__gte=month_start(start), month__lte=end)
+    if customer_id is not None:
+        rows = rows.filter(customer_id=customer_id)
+    if product_id is not None:
+        rows = rows.filter(product_id=product_id)
+    if category is not None:
+        rows = rows.filter(product__category=category)
+
+    fields, periods = [], {}
+    for name in group_by:
+        if name in GROUP_FIELDS:
+            fields.append(GROUP_FIELDS[name])
+        elif name in PERIOD_FUNCTIONS:
+            periods[f"{name}_start"] = PERIOD_FUNCTIONS[name]("month")
+        else:
+            raise ValueError(f"Unknown sales grouping: {name}")
+
+    rows = (
+        rows.order_by()
+        .values(*fields, **periods)
+        .annotate(**{f"total_{name}": Sum(name) for name in TOTALS})
+        .order_by(*fields, *periods)
+    )
+    return [
+        {
+            **{
+                name: row[GROUP_FIELDS[name]] if name in GROUP_FIELDS else row[f"{name}_start"]
+                for name in group_by
+            },
+            **{name: row[f"total_{name}"] for name in TOTALS},
+        }
+        for row in rows
+    ]
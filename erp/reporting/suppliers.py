@@ -0,0 +1,169 @@
+"""Monthly supplier performance: on-time delivery, lateness, fill rate and spend.
+
+Purchase orders count in the month of their ``expected_delivery``; drafts and
+cancelled orders are left out. Totals are kept in ``SupplierPerformance`` and
+only the (supplier, month) buckets touched by a changed order are recomputed,
+so reports never join years of purchase order history.
+"""
+
+import datetime
+import logging
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Case, Count, DurationField, F, Q, Sum, Value, When
+from django.db.models.functions import Coalesce, TruncMonth
+from django.utils import timezone
+
+from erp.models import PurchaseOrder, PurchaseOrderItem, SupplierPerformance
+
+logger = logging.getLogger(__name__)
+
+EXCLUDED_STATUSES = ["DRAFT", "CANCELLED"]
+COUNTERS = [
+    "purchase_orders",
+    "lines",
+    "delivered_orders",
+    "on_time_orders",
+    "days_late",
+    "quantity_ordered",
+    "quantity_received",
+    "spend",
+]
+
+
+def month_start(date: datetime.date) -> datetime.date:
+    return date.replace(day=1)
+
+
+def order_bucket(order) -> tuple:
+    expected = PurchaseOrder._meta.get_field("expected_delivery").to_python(order.expected_delivery)
+    return order.supplier_id, month_start(expected)
+
+
+def _next_month(month: datetime.date) -> datetime.date:
+    return (month + datetime.timedelta(days=32)).replace(day=1)
+
+
+def _buckets_filter(buckets, prefix: str = "") -> Q:
+    condition = Q(pk__in=[])
+    for supplier_id, month in buckets:
+        condition |= Q(
+            **{
+                f"{prefix}supplier_id": supplier_id,
+                f"{prefix}expected_delivery__gte": month,
+                f"{prefix}expected_delivery__lt": _next_month(month),
+            }
+        )
+    return condition
+
+
+def refresh_supplier_performance(buckets=None) -> int:
+    """Recompute the given (supplier id, month) buckets, or all of them."""
+    orders = PurchaseOrder.objects.exclude(status__in=EXCLUDED_STATUSES)
+    items = PurchaseOrderItem.objects.exclude(purchase_order__status__in=EXCLUDED_STATUSES)
+    if buckets is not None:
+        buckets = {(supplier_id, month_start(month)) for supplier_id, month in buckets}
+        if not buckets:
+            return 0
+        orders = orders.filter(_buckets_filter(buckets))
+        items = items.filter(_buckets_filter(buckets, prefix="purchase_order__"))
+
+    late = F("actual_delivery") - F("expected_delivery")
+    order_rows = (
+        orders.order_by()
+        .values("supplier_id", month=TruncMonth("expected_delivery"))
+        .annotate(
+            purchase_orders=Count("id"),
+            delivered_orders=Count("id", filter=Q(actual_delivery__isnull=False)),
+            on_time_orders=Count("id", filter=Q(actual_delivery__lte=F("expected_delivery"))),
+            late_by=Sum(
+                Case(
+                    When(actual_delivery__gt=F("expected_delivery"), then=late),
+                    default=Value(datetime.timedelta(0)),
+                    output_field=DurationField(),
+                )
+            ),
+        )
+    )
+    item_rows = (
+        items.order_by()
+        .values(
+            supplier_id=F("purchase_order__supplier_id"),
+            month=TruncMonth("purchase_order__expected_delivery"),
+        )
+        .annotate(
+            lines=Count("id"),
+            ordered=Sum("quantity_ordered"),
+            received=Sum("quantity_received"),
+            spend_total=Coalesce(Sum(F("quantity_ordered") * F("unit_price")), Value(Decimal("0"))),
+        )
+    )
+
+    computed_at = timezone.now()
+    stats = {}
+    for row in order_rows:
+        stats[row["supplier_id"], row["month"]] = SupplierPerformance(
+            supplier_id=row["supplier_id"],
+            month=row["month"],
+            purchase_orders=row["purchase_orders"],
+            delivered_orders=row["delivered_orders"],
+            on_time_orders=row["on_time_orders"],
+            days_late=(row["late_by"] or datetime.timedelta(0)).days,
+            computed_at=computed_at,
+        )
+    for row in item_rows:
+        bucket = stats.get((row["supplier_id"], row["month"]))
+        if bucket is not None:
+            bucket.lines = row["lines"]
+            bucket.quantity_ordered = row["ordered"]
+            bucket.quantity_received = row["received"]
+            bucket.spend = row["spend_total"]
+
+    with transaction.atomic():
+        stale = SupplierPerformance.objects.all()
+        if buckets is not None:
+            months = Q(pk__in=[])
+            for supplier_id, month in buckets:
+                months |= Q(supplier_id=supplier_id, month=month)
+            stale = stale.filter(months)
+        stale.delete()
+        SupplierPerformance.objects.bulk_create(stats.values(), batch_size=1000)
+
+    logger.info(f"Refreshed {len(stats)} monthly supplier performance buckets")
+    return len(stats)
+
+
+def _ratio(part, whole):
+    return round(part / whole, 4) if whole else None
+
+
+def supplier_performance(start: datetime.date, end: datetime.date, supplier_id=None, group_by="month") -> list:
+    """Monthly (or whole range, ``group_by="supplier"``) performance per supplier."""
+    rows = SupplierPerformance.objects.filter(month__gte=month_start(start), month__lte=end)
+    if supplier_id is not None:
+        rows = rows.filter(supplier_id=supplier_id)
+    if group_by == "supplier":
+        rows = [
+            {"supplier_id": row["supplier_id"], **{name: row[f"total_{name}"] for name in COUNTERS}}
+            for row in rows.order_by()
+            .values("supplier_id")
+            .annotate(**{f"total_{name}": Sum(name) for name in COUNTERS})
+            .order_by("supplier_id")
+        ]
+    else:
+        rows = rows.order_by("supplier_id", "month").values("supplier_id", "month", *COUNTERS)
+
+    return [
+        {
+            "supplier": row["supplier_id"],
+            **({"month": row["month"]} if "month" in row else {}),
+            "purchase_orders": row["purchase_orders"],
+            "lines": row["lines"],
+            "on_time_rate": _ratio(row["on_time_orders"], row["delivered_orders"]),
+            "average_days_late": _ratio(row["days_late"], row["delivered_orders"]),
+            "fill_rate": _ratio(row["quantity_received"], row["quantity_ordered"]),
+            "spend": row["spend"],
+        }
+        for row in rows
+    ]
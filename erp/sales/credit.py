@@ -0,0 +1,108 @@
+"""Customer credit control.
+
+A customer's exposure is the ``total_amount`` of their open sales orders plus
+the ``gross_amount`` of their unpaid invoices. It is kept in
+``Customer.open_balance`` with ``F()`` increments whenever an order or invoice
+changes, so checking an order against ``Customer.credit_limit`` reads a single
+row. ``recompute_open_balances`` rebuilds the balances from scratch.
+"""
+
+import logging
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db.models import DecimalField, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+from erp.models import Customer, Invoice, SalesOrder
+
+logger = logging.getLogger(__name__)
+
+OPEN_ORDER_STATUSES = ["CONFIRMED", "PROCESSING", "READY", "PARTIAL"]
+UNPAID_INVOICE_STATUSES = ["ISSUED", "PARTIAL", "OVERDUE"]
+MONEY = DecimalField(max_digits=14, decimal_places=2)
+ZERO = Decimal("0")
+
+
+class CreditLimitExceededError(ValueError):
+    def __init__(self, customer_id: int, exposure: Decimal, credit_limit: Decimal):
+        self.customer_id = customer_id
+        self.exposure = exposure
+        self.credit_limit = credit_limit
+        super().__init__(
+            f"Customer {customer_id} would owe {exposure}, above the credit limit of {credit_limit}"
+        )
+
+
+def _money(value) -> Decimal:
+    return Decimal(str(value)) if value is not None else ZERO
+
+
+def order_exposure(status, total_amount) -> Decimal:
+    return _money(total_amount) if status in OPEN_ORDER_STATUSES else ZERO
+
+
+def invoice_exposure(status, gross_amount) -> Decimal:
+    return _money(gross_amount) if status in UNPAID_INVOICE_STATUSES else ZERO
+
+
+def check_credit(customer_id: int, increase: Decimal) -> None:
+    """Raise CreditLimitExceededError if ``increase`` takes the customer over their limit."""
+    row = (
+        Customer.objects.select_for_update()
+        .filter(pk=customer_id)
+        .values_list("credit_limit", "open_balance")
+        .first()
+    )
+    if row is None or row[0] is None:
+        return
+    credit_limit, open_balance = row
+    if open_balance + increase > credit_limit:
+        raise CreditLimitExceededError(customer_id, open_balance + increase, credit_limit)
+
+
+def adjust_balances(changes) -> None:
+    """Apply {customer id: amount} to the open balances, skipping zero changes."""
+    for customer_id, amount in changes.items():
+        if customer_id is not None and amount:
+            Customer.objects.filter(pk=customer_id).update(open_balance=F("open_balance") + amount)
+
+
+def exposure_changes(previous, current) -> dict:
+    """Balance changes for an order or invoice moving from ``previous`` to ``current``,
+    both (customer id, exposure) or None."""
+    changes: dict[int, Decimal] = defaultdict(Decimal)
+    if previous is not None:
+        changes[previous[0]] -= previous[1]
+    if current is not None:
+        changes[current[0]] += current[1]
+    return changes
+
+
+def recompute_open_balances(customer_ids=None) -> int:
+    """Rebuild ``open_balance`` with one UPDATE. Returns the number of customers."""
+    open_orders = (
+        SalesOrder.objects.filter(customer=OuterRef("pk"), status__in=OPEN_ORDER_STATUSES)
+        .order_by()
+        .values("customer")
+        .annotate(total=Sum("total_amount"))
+        .values("total")
+    )
+    unpaid_invoices = (
+        Invoice.objects.filter(
+            sales_order__customer=OuterRef("pk"), status__in=UNPAID_INVOICE_STATUSES
+        )
+        .order_by()
+        .values("sales_order__customer")
+        .annotate(total=Sum("gross_amount"))
+        .values("total")
+    )
+    customers = Customer.objects.all()
+    if customer_ids is not None:
+        customers = customers.filter(pk__in=customer_ids)
+    count = customers.update(
+        open_balance=Coalesce(Subquery(open_orders), Value(ZERO), output_field=MONEY)
+        + Coalesce(Subquery(unpaid_invoices), Value(ZERO), output_field=MONEY)
+    )
+    logger.info(f"Recomputed the open balance of {count} customers")
+    return count
@@ -0,0 +1,157 @@
+"""Price lists, quantity breaks and promotions.
+
+Active ``PriceRule`` rows are compiled once per process into an index keyed by
+(price list, product); rules without a price list apply to every customer. A
+version token in the cache is replaced whenever a rule or price list changes, so
+each process recompiles on its next call instead of querying rules per line.
+
+A line gets the lowest net unit price among its list price and the rules that
+apply to it (price list or all customers, ``min_quantity`` reached, date within
+the validity range). Ties go to the price list's own rule, then to the larger
+quantity break. Pricing one order or a whole batch costs one cache read and two
+queries: the customers' price lists and the products' list prices.
+"""
+
+import datetime
+import logging
+import uuid
+from decimal import ROUND_HALF_UP, Decimal
+from typing import NamedTuple
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from erp.models import Customer, PriceRule, Product
+
+logger = logging.getLogger(__name__)
+
+VERSION_KEY = "pricing:rules-version"
+CENTS = Decimal("0.01")
+
+
+class CompiledRule(NamedTuple):
+    rule_id: int
+    min_quantity: int
+    valid_from: datetime.date | None
+    valid_to: datetime.date | None
+    unit_price: Decimal | None
+    discount_percentage: Decimal
+
+    def applies(self, quantity: int, on: datetime.date) -> bool:
+        return (
+            quantity >= self.min_quantity
+            and (self.valid_from is None or self.valid_from <= on)
+            and (self.valid_to is None or on <= self.valid_to)
+        )
+
+
+class PricedLine(NamedTuple):
+    product_id: int
+    quantity: int
+    list_price: Decimal
+    unit_price: Decimal
+    discount_percentage: Decimal
+    rule_id: int | None
+
+    @property
+    def net_unit_price(self) -> Decimal:
+        return self.unit_price * (100 - self.discount_percentage) / 100
+
+    @property
+    def line_total(self) -> Decimal:
+        return (self.quantity * self.net_unit_price).quantize(CENTS, ROUND_HALF_UP)
+
+
+_compiled: dict = {"version": None, "rules": {}}
+
+
+def invalidate() -> None:
+    """Make every process recompile its rules, now and again once the transaction commits."""
+    cache.set(VERSION_KEY, uuid.uuid4().hex, None)
+    transaction.on_commit(lambda: cache.set(VERSION_KEY, uuid.uuid4().hex, None))
+
+
+def compile_rules() -> dict:
+    """Index active rules by (price list id or None, product id)."""
+    index: dict[tuple, list[CompiledRule]] = {}
+    rules = (
+        PriceRule.objects.filter(is_active=True)
+        .filter(Q(price_list__isnull=True) | Q(price_list__is_active=True))
+        .order_by("pk")
+        .values_list(
+            "pk",
+            "price_list_id",
+            "product_id",
+            "min_quantity",
+            "valid_from",
+            "valid_to",
+            "unit_price",
+            "discount_percentage",
+        )
+    )
+    for rule_id, price_list_id, product_id, *terms in rules:
+        index.setdefault((price_list_id, product_id), []).append(CompiledRule(rule_id, *terms))
+    return {key: tuple(rules) for key, rules in index.items()}
+
+
+def compiled_rules() -> dict:
+    """The process-wide rule index, recompiled when the cached version token changes."""
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, uuid.uuid4().hex, None)
+        version = cache.get(VERSION_KEY)
+    if version != _compiled["version"]:
+        rules = compile_rules()
+        _compiled.update(version=version, rules=rules)
+        logger.info(f"Compiled price rules for {len(rules)} price list/product pairs")
+    return _compiled["rules"]
+
+
+def best_price(
+    rules: dict, price_list_id, product_id: int, quantity: int, list_price: Decimal, on: datetime.date
+) -> PricedLine:
+    best = PricedLine(product_id, quantity, list_price, list_price, Decimal("0"), None)
+    best_key = (best.net_unit_price, 2, 0)
+    keys = [(price_list_id, product_id), (None, product_id)] if price_list_id is not None else [(None, product_id)]
+    for specificity, key in enumerate(keys):
+        for rule in rules.get(key, ()):
+            if not rule.applies(quantity, on):
+                continue
+            unit_price = rule.unit_price if rule.unit_price is not None else list_price
+            line = PricedLine(product_id, quantity, list_price, unit_price, rule.discount_percentage, rule.rule_id)
+            line_key = (line.net_unit_price, specificity, -rule.min_quantity)
+            if line_key < best_key:
+                best, best_key = line, line_key
+    return best
+
+
+def price_orders(orders, on: datetime.date | None = None) -> list:
+    """Price a batch of orders given as (customer id, [(product id, quantity), ...]).
+    Returns one list of ``PricedLine`` per order."""
+    on = on or timezone.now().date()
+    rules = compiled_rules()
+    customer_ids = {customer_id for customer_id, _ in orders}
+    product_ids = {product_id for _, lines in orders for product_id, _ in lines}
+    price_lists = dict(Customer.objects.filter(pk__in=customer_ids).values_list("pk", "price_list_id"))
+    list_prices = dict(Product.objects.filter(pk__in=product_ids).values_list("pk", "unit_price"))
+
+    missing = product_ids - list_prices.keys()
+    if missing:
+        raise ValueError(f"Unknown products: {sorted(missing)}")
+    missing_customers = customer_ids - price_lists.keys()
+    if missing_customers:
+        raise ValueError(f"Unknown customers: {sorted(missing_customers)}")
+    return [
+        [
+            best_price(rules, price_lists.get(customer_id), product_id, quantity, list_prices[product_id], on)
+            for product_id, quantity in lines
+        ]
+        for customer_id, lines in orders
+    ]
+
+
+def price_order(customer_id: int, lines, on: datetime.date | None = None) -> list:
+    """Price the (product id, quantity) lines of one order."""
+    return price_orders([(customer_id, lines)], on)[0]
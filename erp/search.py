@@ -0,0 +1,149 @@
+"""Search across products, customers, suppliers, sales orders and manufacturing orders.
+
+On PostgreSQL each searchable table has a weighted ``search_vector`` tsvector
+column kept current by a trigger, with a GIN index on it and GIN trigram
+(``pg_trgm``) indexes on its name-like columns (migration 0025 adds the
+triggers, 0027 backfills the vectors and builds the indexes concurrently;
+0028 does all three for manufacturing orders, whose vector includes the
+product's sku). A
+row matches when every word of the query prefix-matches its vector (typeahead)
+or the query is trigram-similar to its label, and results are ranked by
+``ts_rank`` plus trigram similarity. Both conditions are answered from the GIN
+indexes. The ``/api/search/`` endpoint runs one query per entity type,
+concurrently, on a pool of threads that keep their connections open between
+searches; they are closed when the process exits.
+
+Other databases (the SQLite test database) fall back to case-insensitive
+containment over the same columns, one entity type after the other.
+"""
+
+import atexit
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple, Optional
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramSimilarity
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connection, connections
+from django.db.models import Case, F, FloatField, Model, Q, Value, When
+from rest_framework import filters
+
+from erp.models import Customer, ManufacturingOrder, Product, SalesOrder, Supplier
+
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 50
+
+
+class SearchEntity(NamedTuple):
+    model: type[Model]
+    label: str  # Trigram-indexed column shown as the result
+    detail: str
+    fields: tuple  # Columns of the search_vector, used by the fallback
+
+
+ENTITIES = {
+    "products": SearchEntity(Product, "name", "sku", ("name", "sku", "description")),
+    "customers": SearchEntity(Customer, "name", "email", ("name", "contact_person", "email")),
+    "suppliers": SearchEntity(Supplier, "name", "email", ("name", "contact_person", "email")),
+    "orders": SearchEntity(SalesOrder, "order_number", "status", ("order_number", "notes")),
+    "manufacturing_orders": SearchEntity(
+        ManufacturingOrder, "order_number", "status", ("order_number", "product__sku", "notes")
+    ),
+}
+
+_worker_connections = []
+_worker_connections_lock = threading.Lock()
+
+
+def _register_worker_connection():
+    """Track each pool thread's connection, so it can be closed from the main thread on exit."""
+    worker_connection = connections[DEFAULT_DB_ALIAS]
+    worker_connection.inc_thread_sharing()
+    with _worker_connections_lock:
+        _worker_connections.append(worker_connection)
+
+
+_pool = ThreadPoolExecutor(
+    max_workers=len(ENTITIES) * 4, thread_name_prefix="erp-search", initializer=_register_worker_connection
+)
+
+
+@atexit.register
+def shutdown_search_pool():
+    _pool.shutdown(wait=True)
+    with _worker_connections_lock:
+        for worker_connection in _worker_connections:
+            worker_connection.close()
+        _worker_connections.clear()
+
+
+def prefix_query(text: str) -> Optional[str]:
+    """A raw tsquery matching rows that contain a word starting with each query word."""
+    words = re.findall(r"\w+", text.lower())
+    return " & ".join(f"{word}:*" for word in words) or None
+
+
+def search_queryset(queryset, entity: SearchEntity, text: str):
+    """``queryset`` filtered to rows matching ``text``, annotated with ``search_rank``, best first."""
+    text = text.strip()
+    if connections[queryset.db].vendor == "postgresql":
+        match = Q(**{f"{entity.label}__trigram_similar": text})
+        rank = TrigramSimilarity(entity.label, text)
+        terms = prefix_query(text)
+        if terms:
+            query = SearchQuery(terms, search_type="raw", config="simple")
+            match |= Q(search_vector=query)
+            rank = rank + SearchRank(F("search_vector"), query)
+        return queryset.filter(match).annotate(search_rank=rank).order_by("-search_rank", "pk")
+
+    match = Q(pk__in=[])
+    for field in entity.fields:
+        match |= Q(**{f"{field}__icontains": text})
+    rank = Case(
+        When(**{f"{entity.label}__istartswith": text}, then=Value(2.0)),
+        default=Value(1.0),
+        output_field=FloatField(),
+    )
+    return queryset.filter(match).annotate(search_rank=rank).order_by("-search_rank", entity.label, "pk")
+
+
+def search_entity(name: str, text: str, limit: int = DEFAULT_LIMIT) -> list:
+    entity = ENTITIES[name]
+    rows = search_queryset(entity.model.objects.all(), entity, text).values_list(
+        "pk", entity.label, entity.detail, "search_rank"
+    )[:limit]
+    return [
+        {"id": pk, "label": label, "detail": detail, "rank": rank}
+        for pk, label, detail, rank in rows
+    ]
+
+
+def _search_in_worker(name: str, text: str, limit: int) -> list:
+    try:
+        return search_entity(name, text, limit)
+    except DatabaseError:
+        # Worker threads keep their connection; drop a broken one so the next search reconnects
+        connection.close()
+        raise
+
+
+def search(text: str, types=None, limit: int = DEFAULT_LIMIT) -> dict:
+    """The best ``limit`` matches of each entity type (default: all types)."""
+    types = list(types or ENTITIES)
+    if connection.vendor != "postgresql" or len(types) == 1:
+        return {name: search_entity(name, text, limit) for name in types}
+    futures = {name: _pool.submit(_search_in_worker, name, text, limit) for name in types}
+    return {name: future.result() for name, future in futures.items()}
+
+
+class RankedSearchFilter(filters.BaseFilterBackend):
+    """``?search=`` for viewsets that name their ``search_entity``, ranked and index-backed."""
+
+    search_param = "search"
+
+    def filter_queryset(self, request, queryset, view):
+        text = request.query_params.get(self.search_param, "").strip()
+        entity = getattr(view, "search_entity", None)
+        if not text or entity is None:
+            return queryset
+        return search_queryset(queryset, ENTITIES[entity], text)
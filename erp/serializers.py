@@ -1,14 +1,21 @@
 from django.db import models
 from rest_framework import serializers
 
+from erp.batch import MAX_SUBREQUESTS, SAFE_METHODS
 from erp.models import (
+    Customer,
     ManufacturingOrder,
     ManufacturingStep,
+    PriceList,
+    PriceRule,
     Product,
     ProductInventory,
+    ProductionKPI,
     PurchaseOrder,
+    PurchaseOrderItem,
     QualityCheck,
     SalesOrder,
+    SalesOrderItem,
     Shift,
     Supplier,
     SupplierProduct,
@@ -34,18 +41,38 @@ class InventoryMoveSerializer(serializers.Serializer):
         return data
 
 
+class ReceivedLineSerializer(serializers.Serializer):
+    item = serializers.IntegerField()
+    quantity = serializers.IntegerField(min_value=1)
+
+
+class PurchaseOrderReceiveSerializer(serializers.Serializer):
+    lines = ReceivedLineSerializer(many=True, allow_empty=False)
+
+
 class SupplierProductSerializer(serializers.ModelSerializer):
     class Meta:
         model = SupplierProduct
         exclude = ["supplier"]
 
 
+class SupplierSourceSerializer(serializers.Serializer):
+    rank = serializers.IntegerField()
+    supplier = serializers.IntegerField(source="supplier_id")
+    score = serializers.DecimalField(max_digits=5, decimal_places=4)
+    unit_cost = serializers.DecimalField(max_digits=10, decimal_places=2)
+    lead_time_days = serializers.IntegerField()
+    min_order_quantity = serializers.IntegerField()
+    on_time_rate = serializers.DecimalField(max_digits=5, decimal_places=4, allow_null=True)
+    is_preferred = serializers.BooleanField()
+
+
 class SupplierSerializer(serializers.ModelSerializer):
     products = SupplierProductSerializer(many=True)
 
     class Meta:
         model = Supplier
-        fields = "__all__"
+        exclude = ["search_vector"]
 
 
 class WarehouseSerializer(serializers.ModelSerializer):
@@ -85,9 +112,32 @@ class WorkshiftListSerializer(serializers.ModelSerializer):
         fields = "__all__"
 
 
+class WorkstationStatusQuerySerializer(serializers.Serializer):
+    since = serializers.DateTimeField(required=False)
+    wait = serializers.IntegerField(min_value=0, max_value=60, default=25)
+
+
+class CustomerSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Customer
+        exclude = ["search_vector"]
+
+
+class SalesOrderItemSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = SalesOrderItem
+        fields = "__all__"
+
+
 class SalesOrderSerializer(serializers.ModelSerializer):
     class Meta:
         model = SalesOrder
+        exclude = ["search_vector"]
+
+
+class PurchaseOrderItemSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = PurchaseOrderItem
         fields = "__all__"
 
 
@@ -113,10 +163,33 @@ class PreferredProductSupplierSerializer(serializers.ModelSerializer):
 class ProductSerializer(serializers.ModelSerializer):
     preferred_suppliers = PreferredProductSupplierSerializer(many=True)
     total_quantity = serializers.IntegerField(read_only=True)
+    best_supplier = serializers.IntegerField(read_only=True)
+    best_supplier_cost = serializers.DecimalField(max_digits=10, decimal_places=2, read_only=True)
 
     class Meta:
         model = Product
-        fields = "__all__"
+        exclude = ["search_vector"]
+
+
+class ProductUpsertSerializer(serializers.ModelSerializer):
+    """One row of a bulk product upsert: the sku plus any master data to set."""
+
+    class Meta:
+        model = Product
+        fields = [
+            "sku",
+            "name",
+            "description",
+            "category",
+            "unit_price",
+            "unit_cost",
+            "min_stock_level",
+            "weight",
+            "dimensions",
+            "is_active",
+        ]
+        # Rows are matched on sku, and fields left out keep their stored value
+        extra_kwargs = {"sku": {"validators": []}, "name": {"required": False}, "unit_price": {"required": False}}
 
 
 class WarehouseProductSerializer(serializers.ModelSerializer):
@@ -130,7 +203,7 @@ class ProductInventorySerializer(serializers.ModelSerializer):
 
     class Meta:
         model = ProductInventory
-        fields = ["id", "quantity", "product"]
+        fields = ["id", "quantity", "reserved_quantity", "product"]
 
 
 class WarehouseInventorySerializer(serializers.ModelSerializer):
@@ -150,7 +223,7 @@ class WarehouseInventorySerializer(serializers.ModelSerializer):
         ]
 
     def get_total_product_quantity(self, obj):
-        obj.inventory.aggregate(models.Sum("quantity"))["quantity__sum"]
+        return obj.inventory.aggregate(models.Sum("quantity"))["quantity__sum"]
 
 
 class ManufacturingStepSerializer(serializers.ModelSerializer):
@@ -176,3 +249,189 @@ class ManufacturingOrderSerializer(serializers.ModelSerializer):
             "estimated_completion",
             "order_number",
         ]
+
+
+class ATPItemSerializer(serializers.Serializer):
+    product = serializers.IntegerField()
+    quantity = serializers.IntegerField(min_value=1)
+    requested_date = serializers.DateField()
+
+
+class ATPCheckSerializer(serializers.Serializer):
+    items = ATPItemSerializer(many=True, required=False)
+    orders = serializers.ListField(child=serializers.IntegerField(), required=False)
+
+    def validate(self, data):
+        if not data.get("items") and not data.get("orders"):
+            raise serializers.ValidationError("Provide items and/or orders to check")
+        return data
+
+
+class PriceListSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = PriceList
+        fields = "__all__"
+
+
+class PriceRuleSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = PriceRule
+        fields = "__all__"
+
+    def validate(self, data):
+        valid_from, valid_to = data.get("valid_from"), data.get("valid_to")
+        if valid_from and valid_to and valid_from > valid_to:
+            raise serializers.ValidationError("valid_from must not be after valid_to")
+        return data
+
+
+class PriceQuoteLineSerializer(serializers.Serializer):
+    product = serializers.IntegerField()
+    quantity = serializers.IntegerField(min_value=1)
+
+
+class PriceQuoteOrderSerializer(serializers.Serializer):
+    customer = serializers.IntegerField()
+    items = PriceQuoteLineSerializer(many=True)
+
+
+class PriceQuoteSerializer(serializers.Serializer):
+    date = serializers.DateField(required=False)
+    customer = serializers.IntegerField(required=False)
+    items = PriceQuoteLineSerializer(many=True, required=False)
+    orders = PriceQuoteOrderSerializer(many=True, required=False)
+
+    def validate(self, data):
+        if "items" in data and "customer" not in data:
+            raise serializers.ValidationError("Provide the customer of the items")
+        if not data.get("items") and not data.get("orders"):
+            raise serializers.ValidationError("Provide items and/or orders to price")
+        return data
+
+
+class SearchQuerySerializer(serializers.Serializer):
+    TYPES = ["products", "customers", "suppliers", "orders", "manufacturing_orders"]
+
+    q = serializers.CharField()
+    types = serializers.CharField(required=False)
+    limit = serializers.IntegerField(min_value=1, max_value=50, default=10)
+
+    def validate_types(self, value):
+        types = [name.strip() for name in value.split(",") if name.strip()]
+        unknown = set(types) - set(self.TYPES)
+        if not types or unknown:
+            raise serializers.ValidationError(f"Choose from: {', '.join(self.TYPES)}")
+        return types
+
+
+class BatchSubRequestSerializer(serializers.Serializer):
+    method = serializers.ChoiceField(
+        choices=["GET", "HEAD", "OPTIONS", "POST", "PUT", "PATCH", "DELETE"], default="GET"
+    )
+    path = serializers.RegexField(r"^/", max_length=2000)
+    body = serializers.JSONField(required=False)
+    headers = serializers.DictField(child=serializers.CharField(), required=False)
+
+
+class BatchRequestSerializer(serializers.Serializer):
+    requests = BatchSubRequestSerializer(many=True, allow_empty=False, max_length=MAX_SUBREQUESTS)
+    concurrent = serializers.BooleanField(default=False)
+
+    def validate(self, data):
+        if data["concurrent"] and any(request["method"] not in SAFE_METHODS for request in data["requests"]):
+            raise serializers.ValidationError("Only read-only batches can run concurrently")
+        return data
+
+
+# ---------------------------------------------------
+# Reporting & Analytics
+# ---------------------------------------------------
+class ProductionKPISerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ProductionKPI
+        fields = [
+            "id",
+            "date",
+            "workstation",
+            "planned_minutes",
+            "downtime_minutes",
+            "units_produced",
+            "units_defective",
+            "availability",
+            "performance",
+            "quality",
+            "oee",
+            "computed_at",
+        ]
+
+
+class ProductionTrendQuerySerializer(serializers.Serializer):
+    start = serializers.DateTimeField()
+    end = serializers.DateTimeField()
+    resolution = serializers.DurationField(required=False)
+    workstation = serializers.IntegerField(required=False)
+    manufacturing_order = serializers.IntegerField(required=False)
+
+    def validate(self, data):
+        if data["start"] >= data["end"]:
+            raise serializers.ValidationError("start must be before end")
+        return data
+
+
+class SupplierPerformanceQuerySerializer(serializers.Serializer):
+    start = serializers.DateField()
+    end = serializers.DateField()
+    supplier = serializers.IntegerField(required=False)
+    group_by = serializers.ChoiceField(choices=["month", "supplier"], default="month")
+
+    def validate(self, data):
+        if data["start"] > data["end"]:
+            raise serializers.ValidationError("start must not be after end")
+        return data
+
+
+class SalesSummaryQuerySerializer(serializers.Serializer):
+    GROUPINGS = ["customer", "product", "category", "month", "quarter", "year"]
+
+    start = serializers.DateField()
+    end = serializers.DateField()
+    group_by = serializers.CharField(default="month")
+    customer = serializers.IntegerField(required=False)
+    product = serializers.IntegerField(required=False)
+    category = serializers.CharField(required=False)
+
+    def validate_group_by(self, value):
+        group_by = [name.strip() for name in value.split(",") if name.strip()]
+        unknown = set(group_by) - set(self.GROUPINGS)
+        if not group_by or unknown:
+            raise serializers.ValidationError(
+                f"Choose from: {', '.join(self.GROUPINGS)}"
+            )
+        if len([name for name in group_by if name in ("month", "quarter", "year")]) > 1:
+            raise serializers.ValidationError("Only one period grouping is allowed")
+        return group_by
+
+    def validate(self, data):
+        if data["start"] > data["end"]:
+            raise serializers.ValidationError("start must not be after end")
+        return data
+
+
+class LaborSummaryQuerySerializer(serializers.Serializer):
+    GROUPINGS = ["employee", "workstation", "manufacturing_order", "day", "month", "year"]
+
+    start = serializers.DateField(required=False)
+    end = serializers.DateField(required=False)
+    group_by = serializers.CharField(default="employee")
+    engine = serializers.ChoiceField(choices=["numpy", "sql"], default="numpy")
+
+    def validate_group_by(self, value):
+        group_by = [name.strip() for name in value.split(",") if name.strip()]
+        unknown = set(group_by) - set(self.GROUPINGS)
+        if not group_by or unknown:
+            raise serializers.ValidationError(
+                f"Choose from: {', '.join(self.GROUPINGS)}"
+            )
+        if len([name for name in group_by if name in ("day", "month", "year")]) > 1:
+            raise serializers.ValidationError("Only one period grouping is allowed")
+        return group_by
@@ -2,13 +2,38 @@ import logging
 
 from django.contrib.auth.models import Permission, User
 from django.contrib.contenttypes.models import ContentType
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
 from django.dispatch import receiver
 
+from erp import caching
 from erp.enums import EmployeeRole
+from erp.inventory import atp
+from erp.inventory.reservations import apply_item_change, release_items
 from erp.manufacturing_workflows import MANUFACTURING_WORKFLOWS
-from erp.models import Employee, ManufacturingOrder, QualityCheck
-from erp.tasks import invoice_generate_pdf, send_email_generic
+from erp.models import (
+    Employee,
+    Invoice,
+    ManufacturingOrder,
+    PriceList,
+    PriceRule,
+    Product,
+    ProductInventory,
+    ProductionLog,
+    PurchaseOrder,
+    PurchaseOrderItem,
+    QualityCheck,
+    SalesOrder,
+    SalesOrderItem,
+    Supplier,
+    SupplierProduct,
+    Warehouse,
+)
+from erp.purchasing import sourcing
+from erp.reporting import sales, suppliers
+from erp.reporting.rollups import apply_log
+from erp.sales import credit, pricing
+from erp.tasks import invoice_generate_pdf, send_email_generic, update_standard_costs
 
 logger = logging.getLogger(__name__)
 
@@ -98,3 +123,251 @@ def invoice_when_created_or_updated_generate_pdf(sender, instance, created, **kw
     if created:
         invoice_generate_pdf.delay(instance)
         logger.info(f"PDF generated for invoice {instance.invoice_number}")
+
+
+@receiver(pre_save, sender=ProductionLog)
+def production_log_remember_previous(sender, instance: ProductionLog, **kwargs):
+    """Keep the stored version of an edited log so its old totals can be rolled back."""
+    instance._rollup_previous = None
+    if instance.pk:
+        instance._rollup_previous = ProductionLog.objects.filter(pk=instance.pk).first()
+
+
+@receiver(post_save, sender=ProductionLog)
+def production_log_update_rollups(sender, instance: ProductionLog, created: bool, **kwargs):
+    """Keep hourly, daily and monthly production rollups in step with the raw logs."""
+    previous = getattr(instance, "_rollup_previous", None)
+    if previous is not None:
+        apply_log(previous, sign=-1)
+    apply_log(instance)
+
+
+@receiver(post_delete, sender=ProductionLog)
+def production_log_remove_from_rollups(sender, instance: ProductionLog, **kwargs):
+    """Remove a deleted log from its rollup buckets."""
+    apply_log(instance, sign=-1)
+
+
+@receiver(pre_save, sender=Product)
+def product_remember_previous_cost(sender, instance: Product, **kwargs):
+    """Remember the stored unit cost so a price change can be detected after saving."""
+    instance._previous_unit_cost = None
+    if instance.pk:
+        instance._previous_unit_cost = (
+            Product.objects.filter(pk=instance.pk).values_list("unit_cost", flat=True).first()
+        )
+
+
+@receiver(post_save, sender=Product)
+def product_recost_assemblies(sender, instance: Product, created: bool, **kwargs):
+    """Re-cost the assemblies that use a product whose unit cost changed."""
+    if created or instance.unit_cost == getattr(instance, "_previous_unit_cost", None):
+        return
+    transaction.on_commit(lambda: update_standard_costs.delay([instance.id]))
+
+
+@receiver(post_save, sender=ProductInventory)
+@receiver(post_delete, sender=ProductInventory)
+@receiver(post_save, sender=SalesOrderItem)
+@receiver(post_delete, sender=SalesOrderItem)
+@receiver(post_save, sender=ManufacturingOrder)
+@receiver(post_delete, sender=ManufacturingOrder)
+@receiver(post_save, sender=PurchaseOrderItem)
+@receiver(post_delete, sender=PurchaseOrderItem)
+def atp_invalidate_product(sender, instance, **kwargs):
+    """Drop the cached ATP timeline of the product a stock, demand or supply row belongs to."""
+    atp.invalidate([instance.product_id])
+
+
+@receiver(post_save, sender=SalesOrder)
+@receiver(post_save, sender=PurchaseOrder)
+def atp_invalidate_order_products(sender, instance, created: bool, **kwargs):
+    """A status or date change on an order header affects all of its lines."""
+    if not created:
+        atp.invalidate(instance.items.values_list("product_id", flat=True))
+
+
+@receiver(pre_delete, sender=SalesOrderItem)
+def release_deleted_item_stock(sender, instance, **kwargs):
+    """Give back the stock reserved for a line that is being deleted."""
+    release_items([instance.pk])
+
+
+@receiver(post_save, sender=SalesOrderItem)
+def reserve_saved_item_stock(sender, instance, **kwargs):
+    """Lines added to or edited on a confirmed order hold their stock too."""
+    apply_item_change(instance)
+
+
+@receiver(post_save, sender=SupplierProduct)
+@receiver(post_delete, sender=SupplierProduct)
+def rerank_product_sources(sender, instance, **kwargs):
+    sourcing.queue_refresh(product_ids=[instance.product_id])
+
+
+@receiver(post_save, sender=Supplier)
+def rerank_supplier_sources(sender, instance, created: bool, **kwargs):
+    """Rating or active flag changes re-rank every product the supplier offers."""
+    if not created:
+        sourcing.queue_refresh(supplier_ids=[instance.id])
+
+
+@receiver(post_save, sender=PurchaseOrder)
+def rerank_after_delivery(sender, instance, **kwargs):
+    """A delivered order changes its supplier's on-time record."""
+    if instance.actual_delivery:
+        sourcing.queue_refresh(supplier_ids=[instance.supplier_id])
+
+
+@receiver(pre_save, sender=PurchaseOrder)
+def purchase_order_remember_bucket(sender, instance: PurchaseOrder, **kwargs):
+    """Keep the month an edited order counted in, in case its supplier or date moves."""
+    instance._performance_previous = None
+    if instance.pk:
+        instance._performance_previous = (
+            PurchaseOrder.objects.filter(pk=instance.pk)
+            .values_list("supplier_id", "expected_delivery")
+            .first()
+        )
+
+
+@receiver(post_save, sender=PurchaseOrder)
+def purchase_order_update_performance(sender, instance: PurchaseOrder, **kwargs):
+    buckets = {suppliers.order_bucket(instance)}
+    previous = getattr(instance, "_performance_previous", None)
+    if previous is not None:
+        buckets.add(previous)
+    suppliers.refresh_supplier_performance(buckets)
+
+
+@receiver(post_delete, sender=PurchaseOrder)
+def purchase_order_remove_from_performance(sender, instance: PurchaseOrder, **kwargs):
+    suppliers.refresh_supplier_performance({suppliers.order_bucket(instance)})
+
+
+@receiver(post_save, sender=PurchaseOrderItem)
+@receiver(post_delete, sender=PurchaseOrderItem)
+def purchase_order_item_update_performance(sender, instance: PurchaseOrderItem, **kwargs):
+    """Lines of drafts and cancelled orders are not in the buckets, nothing to update."""
+    order = (
+        PurchaseOrder.objects.filter(pk=instance.purchase_order_id)
+        .only("supplier_id", "expected_delivery", "status")
+        .first()
+    )
+    if order is not None and order.status not in suppliers.EXCLUDED_STATUSES:
+        suppliers.refresh_supplier_performance({suppliers.order_bucket(order)})
+
+
+@receiver(pre_save, sender=SalesOrder)
+def sales_order_remember_bucket(sender, instance: SalesOrder, **kwargs):
+    """Keep the customer and month an edited order counted in (from the row ``save()`` read)."""
+    stored = getattr(instance, "_stored", None)
+    instance._sales_previous = sales.order_bucket(stored) if stored else None
+
+
+@receiver(post_save, sender=SalesOrder)
+def sales_order_update_rollups(sender, instance: SalesOrder, **kwargs):
+    buckets = {sales.order_bucket(instance)}
+    previous = getattr(instance, "_sales_previous", None)
+    if previous is not None:
+        buckets.add(previous)
+    sales.refresh_sales_rollups(buckets)
+
+
+@receiver(post_delete, sender=SalesOrder)
+def sales_order_remove_from_rollups(sender, instance: SalesOrder, **kwargs):
+    sales.refresh_sales_rollups({sales.order_bucket(instance)})
+
+
+@receiver(post_save, sender=SalesOrderItem)
+@receiver(post_delete, sender=SalesOrderItem)
+def sales_order_item_update_rollups(sender, instance: SalesOrderItem, **kwargs):
+    """Refreshed on commit, once per bucket for all the lines saved in the transaction."""
+    sales.queue_order_refresh(instance.sales_order_id)
+
+
+@receiver(pre_save, sender=SalesOrder)
+def sales_order_check_credit(sender, instance: SalesOrder, **kwargs):
+    """Refuse an order change that raises the customer's exposure above their credit limit."""
+    previous = None
+    stored = getattr(instance, "_stored", None)
+    if stored is not None:
+        previous = (stored.customer_id, credit.order_exposure(stored.status, stored.total_amount))
+    instance._credit_previous = previous
+
+    current = (instance.customer_id, credit.order_exposure(instance.status, instance.total_amount))
+    increase = credit.exposure_changes(previous, current)[instance.customer_id]
+    if increase > 0:
+        credit.check_credit(instance.customer_id, increase)
+
+
+@receiver(post_save, sender=SalesOrder)
+def sales_order_update_open_balance(sender, instance: SalesOrder, **kwargs):
+    current = (instance.customer_id, credit.order_exposure(instance.status, instance.total_amount))
+    credit.adjust_balances(
+        credit.exposure_changes(getattr(instance, "_credit_previous", None), current)
+    )
+
+
+@receiver(post_delete, sender=SalesOrder)
+def sales_order_remove_from_open_balance(sender, instance: SalesOrder, **kwargs):
+    previous = (instance.customer_id, credit.order_exposure(instance.status, instance.total_amount))
+    credit.adjust_balances(credit.exposure_changes(previous, None))
+
+
+def invoice_customer_exposure(invoice: Invoice):
+    customer_id = (
+        SalesOrder.objects.filter(pk=invoice.sales_order_id)
+        .values_list("customer_id", flat=True)
+        .first()
+    )
+    return customer_id, credit.invoice_exposure(invoice.status, invoice.gross_amount)
+
+
+@receiver(pre_save, sender=Invoice)
+def invoice_remember_exposure(sender, instance: Invoice, **kwargs):
+    instance._credit_previous = None
+    if instance.pk:
+        row = (
+            Invoice.objects.filter(pk=instance.pk)
+            .values_list("sales_order__customer_id", "status", "gross_amount")
+            .first()
+        )
+        if row is not None:
+            instance._credit_previous = (row[0], credit.invoice_exposure(row[1], row[2]))
+
+
+@receiver(post_save, sender=Invoice)
+def invoice_update_open_balance(sender, instance: Invoice, **kwargs):
+    credit.adjust_balances(
+        credit.exposure_changes(
+            getattr(instance, "_credit_previous", None), invoice_customer_exposure(instance)
+        )
+    )
+
+
+@receiver(post_delete, sender=Invoice)
+def invoice_remove_from_open_balance(sender, instance: Invoice, **kwargs):
+    credit.adjust_balances(credit.exposure_changes(invoice_customer_exposure(instance), None))
+
+
+@receiver(post_save, sender=PriceRule)
+@receiver(post_delete, sender=PriceRule)
+@receiver(post_save, sender=PriceList)
+@receiver(post_delete, sender=PriceList)
+def invalidate_compiled_prices(sender, instance, **kwargs):
+    pricing.invalidate()
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=ProductInventory)
+@receiver(post_delete, sender=ProductInventory)
+@receiver(post_save, sender=Supplier)
+@receiver(post_delete, sender=Supplier)
+@receiver(post_save, sender=SupplierProduct)
+@receiver(post_delete, sender=SupplierProduct)
+@receiver(post_save, sender=Warehouse)
+@receiver(post_delete, sender=Warehouse)
+def invalidate_cached_responses(sender, instance, **kwargs):
+    caching.bump_generation(sender)
@@ -1,12 +1,27 @@
+import datetime
 import logging
 
 import requests
 from celery import shared_task
 from django.conf import settings
 from django.core.mail import send_mail
+from django.utils import timezone
 
+from erp.costing.orders import cost_manufacturing_orders
+from erp.costing.standard import rollup_standard_costs
+from erp.inventory.replenishment import create_purchase_orders, plan_replenishment
+from erp.invoices.billing import invoice_shipped_orders
+from erp.invoices.dunning import (
+    flag_overdue_invoices,
+    reminder_batches,
+    send_overdue_reminders,
+)
 from erp.invoices.generators import generate_invoice
 from erp.models import Invoice
+from erp.purchasing.sourcing import refresh_supplier_sources
+from erp.reporting.kpi import refresh_production_kpis
+from erp.reporting.sales import refresh_sales_rollups
+from erp.reporting.suppliers import refresh_supplier_performance
 from erp.tasks_functions import (
     get_currency_exchange_rates_and_update_currency,
     send_emails_when_product_stock_is_below_minimum,
@@ -20,6 +35,13 @@ def check_if_product_stock_is_below_minimum():
     send_emails_when_product_stock_is_below_minimum()
     return "Sending email to manager"
 
+@shared_task
+def replenish_stock():
+    """Draft purchase orders for every product below its minimum stock."""
+    orders = create_purchase_orders(plan_replenishment())
+    return f"Created {len(orders)} replenishment purchase orders"
+
+
 @shared_task(
     autoretry_for=(KeyError, requests.exceptions.RequestException),
     retry_kwargs={"max_retries": 3},
@@ -39,3 +61,78 @@ def send_email_generic(subject, message, recipient_list):
 @shared_task
 def invoice_generate_pdf(instance: Invoice):
     generate_invoice(instance)
+
+
+@shared_task
+def invoice_generate_pdfs(invoice_ids):
+    """Render the PDFs of a batch of invoices."""
+    for invoice in Invoice.objects.filter(pk__in=invoice_ids).select_related("sales_order"):
+        generate_invoice(invoice)
+    return f"Rendered {len(invoice_ids)} invoice PDFs"
+
+
+@shared_task
+def invoice_shipped_sales_orders(vat_rate=None):
+    """Invoice every shipped or delivered sales order that has no invoice yet."""
+    invoice_ids = invoice_shipped_orders(vat_rate) if vat_rate is not None else invoice_shipped_orders()
+    return f"Created {len(invoice_ids)} invoices"
+
+
+@shared_task
+def mark_overdue_invoices():
+    """Flag unpaid invoices past their due date and queue reminder batches for their customers."""
+    invoice_ids = flag_overdue_invoices()
+    batches = reminder_batches(invoice_ids)
+    for recipients in batches:
+        send_invoice_reminders.delay(recipients)
+    return f"Marked {len(invoice_ids)} invoices overdue, queued {len(batches)} reminder batches"
+
+
+@shared_task
+def send_invoice_reminders(recipients):
+    sent = send_overdue_reminders(recipients)
+    return f"Sent {sent} overdue invoice reminders"
+
+
+@shared_task
+def update_production_kpis():
+    count = refresh_production_kpis()
+    return f"Refreshed {count} production KPIs"
+
+
+@shared_task
+def update_production_costs(start=None, end=None, force=False):
+    """Cost manufacturing orders completed between two ISO dates (default: last 30 days)."""
+    today = timezone.now().date()
+    end = datetime.date.fromisoformat(end) if end else today
+    start = datetime.date.fromisoformat(start) if start else end - datetime.timedelta(days=30)
+    count = cost_manufacturing_orders(start, end, force=force)
+    return f"Costed {count} manufacturing orders"
+
+
+@shared_task
+def update_standard_costs(changed_product_ids=None):
+    """Roll BOM costs up to FIN/WIP products; only ancestors of the given products if set."""
+    count = rollup_standard_costs(changed_product_ids)
+    return f"Updated standard cost of {count} products"
+
+
+@shared_task
+def update_supplier_sources(product_ids=None, supplier_ids=None):
+    """Re-rank supplier sources of the given products or suppliers' products (default: all)."""
+    count = refresh_supplier_sources(product_ids=product_ids, supplier_ids=supplier_ids)
+    return f"Ranked {count} supplier sources"
+
+
+@shared_task
+def update_supplier_performance():
+    """Rebuild all monthly supplier performance buckets."""
+    count = refresh_supplier_performance()
+    return f"Refreshed {count} supplier performance buckets"
+
+
+@shared_task
+def rebuild_sales_rollups():
+    """Rebuild the whole customer x product x month sales rollup."""
+    count = refresh_sales_rollups()
+    return f"Rebuilt {count} sales rollup rows"
@@ -0,0 +1,171 @@
+import datetime
+from unittest.mock import patch
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.contrib.sessions.backends.base import SessionBase
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from erp.models import (
+    Employee,
+    ManufacturingOrder,
+    Product,
+    ProductInventory,
+    Shift,
+    Supplier,
+    SupplierProduct,
+    Warehouse,
+    Workstation,
+)
+
+
+class TestAsyncEndpoints(TestCase):
+    client_class = APIClient
+
+    def setUp(self):
+        cache.clear()
+        self.warehouse = Warehouse.objects.create(name="Main", location="A", capacity=100, manager="Ann")
+        supplier = Supplier.objects.create(
+            name="Acme", contact_person="Bob", email="acme@example.com", phone="1", address="x"
+        )
+        for n in range(3):
+            product = Product.objects.create(name=f"Part {n}", sku=f"P-{n}", unit_price=n + 1, category="SPARE")
+            ProductInventory.objects.create(product=product, warehouse=self.warehouse, quantity=n + 1)
+            SupplierProduct.objects.create(
+                supplier=supplier, product=product, supplier_sku=f"A-{n}", unit_cost=n, is_preferred=True
+            )
+        self.lathe = Workstation.objects.create(name="Lathe", machine_id="L-1", location="Hall 1")
+        self.press = Workstation.objects.create(name="Press", machine_id="P-1", location="Hall 2")
+
+    async def test_product_list_matches_the_sync_endpoint(self):
+        for query in [{}, {"page_size": 2, "page": 2}, {"fields": "id,sku,total_quantity"}, {"expand": "inventory"}]:
+            response = await self.async_client.get("/api/async/products/", query)
+            expected = await sync_to_async(self.client.get)("/api/products/", query)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(
+                response.content, expected.content.replace(b"/api/products/", b"/api/async/products/"), query
+            )
+
+        self.assertEqual((await self.async_client.get("/api/async/products/", {"page": 5})).status_code, 404)
+        self.assertEqual((await self.async_client.get("/api/async/products/", {"fields": "nope"})).status_code, 400)
+
+    async def test_product_list_is_conditional_and_cached_like_the_sync_endpoint(self):
+        first = await self.async_client.get("/api/async/products/")
+        self.assertEqual(first["X-Cache"], "MISS")
+        self.assertIn("Last-Modified", first)
+        again = await self.async_client.get("/api/async/products/")
+        self.assertEqual((again["X-Cache"], again.content), ("HIT", first.content))
+
+        not_modified = await self.async_client.get("/api/async/products/", headers={"If-None-Match": first["ETag"]})
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(not_modified["ETag"], first["ETag"])
+
+        offer = await SupplierProduct.objects.aget(supplier_sku="A-1")
+        offer.unit_cost = 9
+        await offer.asave()
+        changed = await self.async_client.get("/api/async/products/", headers={"If-None-Match": first["ETag"]})
+        self.assertEqual((changed.status_code, changed["X-Cache"]), (200, "MISS"))
+
+    async def test_warehouse_inventory_matches_the_sync_endpoint(self):
+        path = f"warehouses/{self.warehouse.id}/inventory/"
+        response = await self.async_client.get(f"/api/async/{path}")
+        expected = await sync_to_async(self.client.get)(f"/api/{path}")
+        self.assertEqual(response.content, expected.content)
+        self.assertEqual(response.json()["total_product_quantity"], 6)
+
+        narrowed = await self.async_client.get(f"/api/async/{path}", {"fields": "name"})
+        self.assertEqual(narrowed.json(), {"name": "Main"})
+        missing = await self.async_client.get("/api/async/warehouses/0/inventory/")
+        self.assertEqual(missing.status_code, 404)
+        self.assertEqual(missing.json(), {"detail": "No Warehouse matches the given query."})
+
+    async def test_workstation_status_long_poll(self):
+        response = (await self.async_client.get("/api/async/workstations/status/")).json()
+        self.assertEqual([row["name"] for row in response["workstations"]], ["Lathe", "Press"])
+        self.assertEqual(response["workstations"][0]["total_shifts_in_progress"], 0)
+        cursor = response["cursor"]
+
+        with patch("erp.views.asyncio.sleep") as sleep:
+            unchanged = await self.async_client.get("/api/async/workstations/status/", {"since": cursor, "wait": 0})
+        self.assertEqual(unchanged.json(), {"cursor": cursor, "workstations": []})
+        sleep.assert_not_called()
+
+        self.press.status = "BREAKDOWN"
+        await self.press.asave()
+        changed = (await self.async_client.get("/api/async/workstations/status/", {"since": cursor})).json()
+        self.assertEqual([(row["name"], row["status"]) for row in changed["workstations"]], [("Press", "BREAKDOWN")])
+        self.assertGreater(changed["cursor"], cursor)
+
+        self.assertEqual(
+            (await self.async_client.get("/api/async/workstations/status/", {"wait": 600})).status_code, 400
+        )
+
+    async def test_long_poll_reports_shift_changes(self):
+        cursor = (await self.async_client.get("/api/async/workstations/status/")).json()["cursor"]
+        product = await Product.objects.aget(sku="P-0")
+        order = await ManufacturingOrder.objects.acreate(
+            order_number="MO-1", product=product, quantity=1, start_date="2025-01-01", estimated_completion="2025-01-02"
+        )
+        employee = await Employee.objects.acreate(
+            employee_id="E-1", first_name="Ann", last_name="Lee", department="Machining", role="OPERATOR"
+        )
+        await Shift.objects.acreate(
+            employee=employee,
+            manufacturing_order=order,
+            workstation=self.lathe,
+            shift_date="2025-01-01",
+            start_time="06:00",
+            end_time="14:00",
+            status="IN_PROGRESS",
+        )
+
+        changed = (await self.async_client.get("/api/async/workstations/status/", {"since": cursor})).json()
+        self.assertEqual(
+            [(row["name"], row["total_shifts_in_progress"]) for row in changed["workstations"]], [("Lathe", 1)]
+        )
+        self.assertGreater(changed["cursor"], cursor)
+
+    async def test_long_poll_waits_for_a_change(self):
+        since = timezone.now() + datetime.timedelta(seconds=1)
+        calls = []
+
+        async def sleep(seconds):
+            calls.append(seconds)
+            if len(calls) == 2:
+                await Workstation.objects.filter(id=self.lathe.id).aupdate(
+                    status="MAINTENANCE", updated_at=since + datetime.timedelta(seconds=1)
+                )
+
+        with patch("erp.views.asyncio.sleep", sleep):
+            response = await self.async_client.get(
+                "/api/async/workstations/status/", {"since": since.isoformat(), "wait": 30}
+            )
+
+        self.assertEqual(len(calls), 2)
+        self.assertEqual([row["name"] for row in response.json()["workstations"]], ["Lathe"])
+
+    async def test_authentication_and_permissions_of_the_sync_view_apply(self):
+        response = await self.async_client.get("/api/async/products/", headers={"Authorization": "Bearer nope"})
+        self.assertEqual(response.status_code, 401)
+        self.assertIn("WWW-Authenticate", response)
+
+        user = await User.objects.acreate(username="clerk")
+        token = await sync_to_async(lambda: str(RefreshToken.for_user(user).access_token))()
+        response = await self.async_client.get("/api/async/products/", headers={"Authorization": f"Bearer {token}"})
+        self.assertEqual(response.status_code, 200)
+
+    async def test_session_middleware_runs_without_a_thread(self):
+        user = await User.objects.acreate(username="planner")
+        await self.async_client.aforce_login(user)
+
+        # The sync code path would write the session with session[key] = value
+        with patch.object(SessionBase, "__setitem__") as setitem:
+            response = await self.async_client.get("/api/async/workstations/status/")
+
+        self.assertEqual(response.status_code, 200)
+        setitem.assert_not_called()
+        self.assertIn("last_touch", await (await self.async_client.asession()).akeys())
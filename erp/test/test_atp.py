@@ -0,0 +1,142 @@
+import datetime
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from erp.inventory import atp
+from erp.inventory.atp import ATPLine, check_availability, get_timelines
+from erp.models import (
+    Customer,
+    ManufacturingOrder,
+    Product,
+    ProductInventory,
+    PurchaseOrder,
+    PurchaseOrderItem,
+    SalesOrder,
+    SalesOrderItem,
+    Supplier,
+    Warehouse,
+)
+
+
+class TestAvailableToPromise(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.today = timezone.now().date()
+        self.bike = Product.objects.create(name="Bicycle", sku="BIKE", unit_price=1000)
+        self.warehouse = Warehouse.objects.create(name="Main", location="Factory A", capacity=1000)
+        ProductInventory.objects.create(product=self.bike, warehouse=self.warehouse, quantity=10)
+        self.customer = Customer.objects.create(
+            name="Shop", email="shop@example.com", phone="1", address="x"
+        )
+        # -6 on day 5, +20 produced on day 10, -15 on day 12
+        self.order = self.sales_order("SO-1", self.day(5), 6)
+        self.sales_order("SO-2", self.day(12), 15)
+        ManufacturingOrder.objects.create(
+            order_number="MO-1",
+            product=self.bike,
+            quantity=20,
+            status="PLANNED",
+            start_date=self.today,
+            estimated_completion=self.day(10),
+        )
+
+    def day(self, offset: int) -> datetime.date:
+        return self.today + datetime.timedelta(days=offset)
+
+    def sales_order(self, number: str, requested: datetime.date, quantity: int, status="CONFIRMED"):
+        order = SalesOrder.objects.create(
+            order_number=number,
+            customer=self.customer,
+            requested_delivery=requested,
+        )
+        SalesOrderItem.objects.create(
+            sales_order=order, product=self.bike, quantity=quantity, unit_price=1000
+        )
+        # Backorders beyond the stock on hand: open demand that could not be reserved
+        SalesOrder.objects.filter(pk=order.pk).update(status=status)
+        order.status = status
+        return order
+
+    def test_promisable_is_lowest_future_balance(self):
+        timeline = get_timelines([self.bike.id])[self.bike.id]
+
+        # Projected 10, 4, 24, 9: stock for SO-2 cannot be promised again before day 12
+        self.assertEqual(timeline.projected, [10, 4, 24, 9])
+        self.assertEqual(timeline.available(self.today), 4)
+        self.assertEqual(timeline.available(self.day(11)), 9)
+        self.assertEqual(timeline.earliest_date(5), self.day(10))
+        self.assertIsNone(timeline.earliest_date(10))
+
+    def test_lines_of_one_check_do_not_share_stock(self):
+        results = check_availability(
+            [
+                ATPLine(self.bike.id, 3, self.day(1)),
+                ATPLine(self.bike.id, 3, self.day(2)),
+            ]
+        )
+
+        self.assertEqual([r.available for r in results], [4, 1])
+        self.assertTrue(results[0].is_available)
+        self.assertFalse(results[1].is_available)
+        self.assertEqual(results[1].earliest_date, self.day(10))
+
+    def test_open_order_credits_its_own_quantity(self):
+        [result] = check_availability([ATPLine(self.bike.id, 6, self.day(5), allocated=True)])
+
+        self.assertEqual(result.available, 10)
+        self.assertTrue(result.is_available)
+
+    def test_timelines_are_cached_until_inputs_change(self):
+        get_timelines([self.bike.id])
+        with self.assertNumQueries(0):
+            get_timelines([self.bike.id])
+
+        PurchaseOrderItem.objects.create(
+            purchase_order=PurchaseOrder.objects.create(
+                po_number="PO-1",
+                supplier=Supplier.objects.create(
+                    name="Frames", contact_person="Ann", email="a@b.com", phone="1", address="x"
+                ),
+                warehouse=self.warehouse,
+                expected_delivery=self.day(3),
+                status="ORDERED",
+            ),
+            product=self.bike,
+            quantity_ordered=5,
+            unit_price=500,
+        )
+
+        timeline = get_timelines([self.bike.id])[self.bike.id]
+        self.assertEqual(timeline.available(self.day(3)), 9)
+
+    def test_order_status_change_invalidates_its_products(self):
+        get_timelines([self.bike.id])
+
+        self.order.status = "CANCELLED"
+        self.order.save()
+
+        self.assertIsNone(cache.get(f"{atp.CACHE_PREFIX}{self.bike.id}"))
+
+    def test_check_endpoint_accepts_orders_and_items(self):
+        draft = self.sales_order("SO-3", self.day(1), 5, status="DRAFT")
+        client = APIClient()
+
+        response = client.post(
+            "/api/atp/check/",
+            {
+                "orders": [self.order.id, draft.id],
+                "items": [{"product": self.bike.id, "quantity": 2, "requested_date": self.day(1)}],
+            },
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, 200)
+        by_order = {row["order"]: row for row in response.json()}
+        self.assertTrue(by_order[None]["is_available"])
+        # The ad-hoc line for day 1 takes 2 of the 4 free units first
+        self.assertFalse(by_order[draft.id]["is_available"])
+        self.assertEqual(by_order[draft.id]["lines"][0]["available"], 2)
+        self.assertTrue(by_order[self.order.id]["is_available"])
@@ -0,0 +1,118 @@
+from unittest.mock import patch
+
+from django.contrib.auth.models import Permission, User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from erp.batch import MAX_SUBREQUESTS, run_batch
+from erp.models import Product, ProductInventory, Warehouse, Workstation
+
+
+class TestBatchRequests(TestCase):
+    client_class = APIClient
+
+    def setUp(self):
+        cache.clear()
+        self.warehouse = Warehouse.objects.create(name="Main", location="A", capacity=100)
+        self.bike = Product.objects.create(name="Bicycle", sku="BIKE", unit_price=1000)
+        ProductInventory.objects.create(product=self.bike, warehouse=self.warehouse, quantity=5)
+        self.workstation = Workstation.objects.create(name="Lathe", machine_id="L-1", location="Hall 1")
+
+    def batch(self, *requests, **options):
+        return self.client.post("/api/batch/", {"requests": list(requests), **options}, format="json")
+
+    def test_sub_requests_are_answered_in_order_by_their_views(self):
+        response = self.batch(
+            {"path": f"/api/workstations/{self.workstation.id}/?fields=id,name"},
+            {"path": f"/api/products/{self.bike.id}/"},
+            {"path": f"/api/warehouses/{self.warehouse.id}/inventory/"},
+            {"path": "/api/products/0/"},
+            {"path": "/api/nowhere/"},
+        )
+
+        self.assertEqual(response.status_code, 200)
+        results = response.json()["responses"]
+        self.assertEqual([result["status"] for result in results], [200, 200, 200, 404, 404])
+        self.assertEqual(results[0]["body"], {"id": self.workstation.id, "name": "Lathe"})
+        self.assertEqual(results[1]["body"]["total_quantity"], 5)
+        self.assertEqual(results[1]["headers"]["X-Cache"], "MISS")
+        self.assertEqual(results[2]["body"]["inventory"][0]["quantity"], 5)
+        self.assertEqual(self.client.get(f"/api/products/{self.bike.id}/")["X-Cache"], "HIT")
+
+    def test_writes_run_in_order(self):
+        response = self.batch(
+            {"method": "PATCH", "path": f"/api/products/{self.bike.id}/", "body": {"unit_price": "900.00"}},
+            {"method": "POST", "path": "/api/warehouses/", "body": {"name": "Overflow"}},
+            {"path": f"/api/products/{self.bike.id}/", "headers": {"Accept": "application/json"}},
+        )
+
+        results = response.json()["responses"]
+        self.assertEqual([result["status"] for result in results], [200, 400, 200])
+        self.assertIn("location", results[1]["body"])
+        self.assertEqual(results[2]["body"]["unit_price"], "900.00")
+
+    def test_batch_is_authenticated_once_and_shares_the_user(self):
+        user = User.objects.create_user("clerk", password="secret")
+        user.user_permissions.add(Permission.objects.get(codename="view_product"))
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(user).access_token}")
+        paths = [f"/api/products/{self.bike.id}/", "/api/products/", "/api/warehouses/", "/api/cache/stats/"]
+
+        patcher = patch.object(
+            JWTAuthentication, "authenticate", autospec=True, side_effect=JWTAuthentication.authenticate
+        )
+        with patcher as authenticate, CaptureQueriesContext(connection) as queries:
+            response = self.batch(*({"path": path} for path in paths))
+
+        self.assertEqual(authenticate.call_count, 1)
+        self.assertEqual([result["status"] for result in response.json()["responses"]], [200, 200, 200, 403])
+        permission_queries = [query for query in queries.captured_queries if "auth_permission" in query["sql"]]
+        self.assertEqual(len(permission_queries), 2)  # user and group permissions, loaded once
+
+    def test_invalid_batches_are_rejected(self):
+        self.assertEqual(self.batch().status_code, 400)
+        self.assertEqual(self.batch(*[{"path": "/api/products/"}] * (MAX_SUBREQUESTS + 1)).status_code, 400)
+        self.assertEqual(self.batch({"path": "api/products/"}).status_code, 400)
+        self.assertEqual(
+            self.batch({"method": "DELETE", "path": f"/api/products/{self.bike.id}/"}, concurrent=True).status_code,
+            400,
+        )
+
+        results = self.batch({"path": "/api/batch/"}, {"path": "/app/invoices/list/"}).json()["responses"]
+        self.assertEqual([result["status"] for result in results], [400, 400])
+        self.assertTrue(Product.objects.filter(id=self.bike.id).exists())
+
+    def test_batches_with_writes_never_run_concurrently(self):
+        subrequests = [{"path": "/api/products/"}, {"method": "DELETE", "path": f"/api/products/{self.bike.id}/"}]
+        with patch("erp.batch.ThreadPoolExecutor") as executor, patch("erp.batch.dispatch") as dispatch:
+            run_batch(None, subrequests, concurrent=True)
+
+        executor.assert_not_called()
+        self.assertEqual([call.kwargs for call in dispatch.call_args_list], subrequests)
+
+
+class TestConcurrentBatch(TransactionTestCase):
+    client_class = APIClient
+
+    def test_concurrent_results_match_sequential(self):
+        cache.clear()
+        warehouse = Warehouse.objects.create(name="Main", location="A", capacity=100)
+        for n in range(3):
+            product = Product.objects.create(name=f"Part {n}", sku=f"P-{n}", unit_price=n + 1)
+            ProductInventory.objects.create(product=product, warehouse=warehouse, quantity=n)
+        paths = ["/api/products/?page_size=2", f"/api/warehouses/{warehouse.id}/", "/api/suppliers/"]
+        requests = [{"path": path} for path in paths]
+
+        sequential = self.client.post("/api/batch/", {"requests": requests}, format="json").json()
+        cache.clear()
+        concurrent = self.client.post("/api/batch/", {"requests": requests, "concurrent": True}, format="json").json()
+
+        self.assertEqual(
+            [(result["status"], result["body"]) for result in concurrent["responses"]],
+            [(result["status"], result["body"]) for result in sequential["responses"]],
+        )
+        self.assertEqual(concurrent["responses"][0]["body"]["count"], 3)
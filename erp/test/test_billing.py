@@ -0,0 +1,79 @@
+import datetime
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.test import TestCase
+
+from erp.invoices.billing import invoice_shipped_orders
+from erp.models import (
+    Customer,
+    Invoice,
+    OrderNumber,
+    Product,
+    SalesOrder,
+    SalesOrderItem,
+)
+
+ISSUED = datetime.date(2025, 6, 30)
+
+
+class TestBulkInvoicing(TestCase):
+    def setUp(self):
+        self.customer = Customer.objects.create(name="Shop", email="s@example.com", phone="1", address="x")
+        self.bike = Product.objects.create(name="Bicycle", sku="BIKE", unit_price=100)
+        self.shipped = self.order("SHIPPED", shipping="20.00", lines=[(2, "100.00", "10")])
+        self.delivered = self.order("DELIVERED", lines=[(1, "50.00", "0"), (3, "10.00", "0")])
+        self.open = self.order("CONFIRMED", lines=[(1, "100.00", "0")])
+        self.billed = self.order("DELIVERED", lines=[(1, "100.00", "0")])
+        Invoice.objects.create(sales_order=self.billed, net_amount=Decimal("100.00"), vat_rate=Decimal("23"))
+
+    def order(self, status, lines, shipping="0"):
+        order = SalesOrder.objects.create(
+            customer=self.customer, requested_delivery=ISSUED, shipping_cost=Decimal(shipping)
+        )
+        for quantity, price, discount in lines:
+            SalesOrderItem.objects.create(
+                sales_order=order,
+                product=self.bike,
+                quantity=quantity,
+                unit_price=Decimal(price),
+                discount_percentage=Decimal(discount),
+            )
+        SalesOrder.objects.filter(pk=order.pk).update(status=status)
+        return order
+
+    def test_invoices_each_uninvoiced_shipped_order_once(self):
+        counter = OrderNumber.objects.get().last_number
+
+        with patch("erp.tasks.invoice_generate_pdfs.delay") as delay, self.captureOnCommitCallbacks(execute=True):
+            invoice_ids = invoice_shipped_orders(issued_date=ISSUED)
+
+        invoices = Invoice.objects.filter(pk__in=invoice_ids).order_by("sales_order_id")
+        self.assertEqual(
+            [(i.sales_order_id, i.net_amount, i.vat_amount, i.gross_amount) for i in invoices],
+            [
+                (self.shipped.id, Decimal("200.00"), Decimal("46.00"), Decimal("246.00")),
+                (self.delivered.id, Decimal("80.00"), Decimal("18.40"), Decimal("98.40")),
+            ],
+        )
+        self.assertEqual(
+            sorted(i.invoice_number.rsplit("/", 1)[1] for i in invoices),
+            [str(counter + 1), str(counter + 2)],
+        )
+        self.assertEqual(invoices[0].due_date, ISSUED + datetime.timedelta(days=14))
+        self.assertEqual(OrderNumber.objects.get().last_number, counter + 2)
+        delay.assert_called_once_with(invoice_ids)
+
+        self.customer.refresh_from_db()
+        self.assertEqual(self.customer.open_balance, Decimal("123.00") + Decimal("246.00") + Decimal("98.40"))
+        self.assertEqual(invoice_shipped_orders(issued_date=ISSUED), [])
+
+    def test_vat_matches_invoice_save(self):
+        invoice_id = invoice_shipped_orders(vat_rate=Decimal("8"), issued_date=ISSUED)[0]
+        invoice = Invoice.objects.get(pk=invoice_id)
+        gross, vat = invoice.gross_amount, invoice.vat_amount
+
+        invoice.save()
+        invoice.refresh_from_db()
+
+        self.assertEqual((invoice.gross_amount, invoice.vat_amount), (gross, vat))
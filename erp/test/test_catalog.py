@@ -0,0 +1,96 @@
+import json
+import tempfile
+from decimal import Decimal
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from erp.inventory.catalog import upsert_products
+from erp.models import Product
+
+
+class TestProductUpsert(TestCase):
+    def setUp(self):
+        self.bike = Product.objects.create(name="Bicycle", sku="BIKE", unit_price=1000, unit_cost=600)
+        self.bell = Product.objects.create(name="Bell", sku="BELL", unit_price=5)
+
+    def test_creates_updates_and_reports_errors(self):
+        rows = [
+            {"sku": "BIKE", "unit_price": "1100.00"},
+            {"sku": "BELL", "unit_price": "5.00"},
+            {"sku": "LOCK", "name": "Lock", "unit_price": "20", "category": "SPARE"},
+            {"sku": "PUMP", "unit_price": "15"},
+            {"sku": "HORN", "name": "Horn", "unit_price": "-"},
+            "BASKET",
+        ]
+
+        with CaptureQueriesContext(connection) as queries:
+            result = upsert_products(rows)
+
+        self.assertEqual((result.created, result.updated, result.unchanged, result.failed), (1, 1, 1, 3))
+        self.assertEqual([error["row"] for error in result.errors], [4, 5, 3])
+        self.assertIn("unit_price", result.errors[0]["errors"])
+        self.assertEqual(result.errors[2], {"row": 3, "sku": "PUMP", "errors": {"name": ["This field is required."]}})
+        statements = [query["sql"].split()[0] for query in queries.captured_queries if "SAVEPOINT" not in query["sql"]]
+        self.assertEqual(statements, ["SELECT", "INSERT"])
+
+        self.bike.refresh_from_db()
+        self.assertEqual((self.bike.unit_price, self.bike.name, self.bike.unit_cost), (Decimal("1100.00"), "Bicycle", 600))
+        self.assertEqual(Product.objects.get(sku="LOCK").category, "SPARE")
+        self.assertEqual(Product.objects.count(), 3)
+
+    def test_repeated_skus_apply_in_order_and_chunks_are_independent(self):
+        rows = [
+            {"sku": "BIKE", "unit_price": "1200"},
+            {"sku": "BELL", "is_active": False},
+            {"sku": "BIKE", "min_stock_level": 3},
+        ]
+
+        result = upsert_products(rows, chunk_size=2)
+
+        self.assertEqual((result.updated, result.failed), (3, 0))
+        self.bike.refresh_from_db()
+        self.assertEqual((self.bike.unit_price, self.bike.min_stock_level), (Decimal("1200.00"), 3))
+        self.assertFalse(Product.objects.get(sku="BELL").is_active)
+
+    def test_cost_changes_recost_assemblies(self):
+        with patch("erp.tasks.update_standard_costs.delay") as delay, self.captureOnCommitCallbacks(execute=True):
+            upsert_products([{"sku": "BIKE", "unit_cost": "650"}, {"sku": "BELL", "unit_price": "6"}])
+
+        delay.assert_called_once_with([self.bike.id])
+
+    def test_endpoint_accepts_json_and_streams(self):
+        response = self.client.patch(
+            "/api/products/bulk/", [{"sku": "BELL", "unit_price": "7"}], content_type="application/json"
+        )
+        self.assertEqual(response.json(), {"created": 0, "updated": 1, "unchanged": 0, "failed": 0, "errors": []})
+
+        body = "sku,name,unit_price,unit_cost\nBIKE,,1300,\nLOCK,Lock,20,12.5\n"
+        response = self.client.patch("/api/products/bulk/", body, content_type="text/csv")
+        self.assertEqual((response.json()["created"], response.json()["updated"]), (1, 1))
+        self.assertEqual(Product.objects.get(sku="LOCK").unit_cost, Decimal("12.50"))
+        self.assertEqual(Product.objects.get(sku="BIKE").unit_cost, 600)
+
+        body = '{"sku": "LOCK", "is_active": false}\n\n{"sku": \n'
+        response = self.client.patch("/api/products/bulk/", body, content_type="application/x-ndjson")
+        self.assertEqual(response.json()["updated"], 1)
+        self.assertEqual(response.json()["errors"][0]["row"], 1)
+
+        self.assertEqual(
+            self.client.patch("/api/products/bulk/", {"sku": "BELL"}, content_type="application/json").status_code,
+            400,
+        )
+
+    def test_import_command_streams_a_file(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".ndjson") as file:
+            file.write("\n".join(json.dumps({"sku": f"P-{n}", "name": f"Part {n}", "unit_price": n}) for n in range(5)))
+            file.flush()
+            out = StringIO()
+            call_command("import_products", file.name, "--chunk-size", "2", stdout=out)
+
+        self.assertIn("5 created", out.getvalue())
+        self.assertEqual(Product.objects.filter(sku__startswith="P-").count(), 5)
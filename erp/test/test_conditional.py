@@ -0,0 +1,79 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from erp.models import Product, ProductInventory, Supplier, SupplierProduct, Warehouse
+
+
+class TestConditionalLists(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.warehouse = Warehouse.objects.create(name="Main", location="A", capacity=100)
+        self.bike = Product.objects.create(name="Bicycle", sku="BIKE", unit_price=1000)
+        self.stock = ProductInventory.objects.create(product=self.bike, warehouse=self.warehouse, quantity=5)
+
+    def test_unchanged_list_is_not_modified(self):
+        first = self.client.get("/api/warehouses/")
+        self.assertEqual(first.status_code, 200)
+        etag = first["ETag"]
+
+        with self.assertNumQueries(1):
+            again = self.client.get("/api/warehouses/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(again.content, b"")
+        self.assertEqual(again["ETag"], etag)
+
+        modified_since = self.client.get("/api/warehouses/", HTTP_IF_MODIFIED_SINCE=first["Last-Modified"])
+        self.assertEqual(modified_since.status_code, 304)
+        self.assertNotEqual(self.client.get("/api/warehouses/", {"page": 1})["ETag"], etag)
+
+    def test_changes_produce_a_new_etag(self):
+        etag = self.client.get("/api/warehouses/")["ETag"]
+
+        self.warehouse.capacity = 200
+        self.warehouse.save()
+        changed = self.client.get("/api/warehouses/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed["ETag"], etag)
+
+        etag = changed["ETag"]
+        Warehouse.objects.create(name="Overflow", location="B", capacity=10)
+        self.assertEqual(self.client.get("/api/warehouses/", HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_product_list_follows_its_stock(self):
+        etag = self.client.get("/api/products/")["ETag"]
+        self.assertEqual(self.client.get("/api/products/", HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        self.stock.quantity = 7
+        self.stock.save()
+
+        response = self.client.get("/api/products/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["results"][0]["total_quantity"], 7)
+
+    def test_product_list_follows_its_preferred_supplier_costs(self):
+        supplier = Supplier.objects.create(
+            name="Acme", contact_person="Bob", email="acme@example.com", phone="1", address="x"
+        )
+        offer = SupplierProduct.objects.create(
+            supplier=supplier, product=self.bike, supplier_sku="A-1", unit_cost=500, is_preferred=True
+        )
+        etag = self.client.get("/api/products/")["ETag"]
+
+        offer.unit_cost = 450
+        offer.save()
+
+        response = self.client.get("/api/products/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["results"][0]["preferred_suppliers"][0]["unit_cost"], "450.00")
+
+    def test_validators_read_each_table_without_the_list_annotations(self):
+        etag = self.client.get("/api/products/")["ETag"]
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get("/api/products/", HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        tables = [query["sql"].split(" FROM ")[1].split()[0] for query in queries.captured_queries]
+        self.assertEqual(tables, ['"erp_product"', '"erp_productinventory"', '"erp_suppliersource"'])
+        self.assertFalse(any("JOIN" in query["sql"] for query in queries.captured_queries))
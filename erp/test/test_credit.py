@@ -0,0 +1,101 @@
+import datetime
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from erp.models import (
+    Customer,
+    Invoice,
+    Product,
+    ProductInventory,
+    SalesOrder,
+    Warehouse,
+)
+from erp.sales.credit import CreditLimitExceededError, check_credit
+
+
+class TestCreditControl(TestCase):
+    def setUp(self):
+        self.customer = Customer.objects.create(
+            name="Shop", email="s@example.com", phone="1", address="x", credit_limit=Decimal("1000.00")
+        )
+
+    def order(self, amount, status="DRAFT"):
+        return SalesOrder.objects.create(
+            customer=self.customer,
+            requested_delivery=datetime.date(2025, 6, 1),
+            total_amount=Decimal(amount),
+            status=status,
+        )
+
+    def balance(self):
+        self.customer.refresh_from_db()
+        return self.customer.open_balance
+
+    def test_balance_follows_order_and_invoice_changes(self):
+        order = self.order("600.00", status="CONFIRMED")
+        self.assertEqual(self.balance(), Decimal("600.00"))
+
+        order.status = "DELIVERED"
+        order.save()
+        invoice = Invoice.objects.create(
+            sales_order=order, net_amount=Decimal("500.00"), vat_rate=Decimal("20"), status="ISSUED"
+        )
+        self.assertEqual(self.balance(), Decimal("600.00"))
+
+        invoice.status = "PAID"
+        invoice.save()
+        self.assertEqual(self.balance(), Decimal("0.00"))
+
+    def test_confirmation_over_the_limit_is_refused(self):
+        self.order("700.00", status="CONFIRMED")
+        second = self.order("400.00")
+
+        second.status = "CONFIRMED"
+        with self.assertRaises(CreditLimitExceededError):
+            second.save()
+
+        second.refresh_from_db()
+        self.assertEqual(second.status, "DRAFT")
+        self.assertEqual(self.balance(), Decimal("700.00"))
+
+    def test_check_reads_one_customer_row(self):
+        with self.assertNumQueries(1):
+            check_credit(self.customer.id, Decimal("1000.00"))
+        with self.assertRaises(CreditLimitExceededError):
+            check_credit(self.customer.id, Decimal("1000.01"))
+
+    def test_recompute_command_repairs_drift(self):
+        self.order("250.00", status="PROCESSING")
+        Customer.objects.filter(pk=self.customer.pk).update(open_balance=Decimal("9999.00"))
+
+        call_command("recompute_credit_balances", stdout=StringIO())
+
+        self.assertEqual(self.balance(), Decimal("250.00"))
+
+    def test_order_form_checks_the_total_of_its_lines(self):
+        product = Product.objects.create(name="Bicycle", sku="BIKE", unit_price=600)
+        warehouse = Warehouse.objects.create(name="Main", location="A", capacity=100)
+        ProductInventory.objects.create(product=product, warehouse=warehouse, quantity=10)
+        form = {
+            "customer": self.customer.id,
+            "requested_delivery": "2025-06-20",
+            "status": "CONFIRMED",
+            "shipping_cost": "0",
+            "items-TOTAL_FORMS": "1",
+            "items-INITIAL_FORMS": "0",
+            "items-0-product": product.id,
+            "items-0-unit_price": "600.00",
+        }
+
+        response = self.client.post("/app/salesorders/create-form/", {**form, "items-0-quantity": "1"})
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(SalesOrder.objects.get().total_amount, Decimal("600.00"))
+        self.assertEqual(self.balance(), Decimal("600.00"))
+
+        response = self.client.post("/app/salesorders/create-form/", {**form, "items-0-quantity": "2"})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("above the credit limit", response.content.decode())
+        self.assertEqual(SalesOrder.objects.count(), 1)
@@ -0,0 +1,80 @@
+import datetime
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.core import mail
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from erp.invoices.dunning import (
+    flag_overdue_invoices,
+    reminder_batches,
+    send_overdue_reminders,
+)
+from erp.models import Customer, Invoice, SalesOrder
+from erp.tasks import mark_overdue_invoices
+
+TODAY = datetime.date(2025, 6, 10)
+
+
+class TestDunning(TestCase):
+    def setUp(self):
+        self.shop = Customer.objects.create(name="Shop", email="shop@example.com", phone="1", address="x")
+        self.club = Customer.objects.create(name="Club", email="club@example.com", phone="2", address="y")
+        self.first = self.invoice(self.shop, "INV-1", datetime.date(2025, 6, 1))
+        self.second = self.invoice(self.shop, "INV-2", datetime.date(2025, 5, 1), status="PARTIAL")
+        self.club_late = self.invoice(self.club, "INV-3", datetime.date(2025, 6, 9))
+        self.paid = self.invoice(self.club, "INV-4", datetime.date(2025, 5, 1), status="PAID")
+        self.not_due = self.invoice(self.club, "INV-5", TODAY)
+
+    def invoice(self, customer, number, due_date, status="ISSUED"):
+        order = SalesOrder.objects.create(customer=customer, requested_delivery=due_date)
+        return Invoice.objects.create(
+            sales_order=order,
+            invoice_number=number,
+            due_date=due_date,
+            net_amount=Decimal("100.00"),
+            vat_rate=Decimal("20"),
+            status=status,
+        )
+
+    def test_flags_unpaid_invoices_past_due_date(self):
+        with CaptureQueriesContext(connection) as queries:
+            invoice_ids = flag_overdue_invoices(TODAY)
+
+        statements = [query["sql"].split()[0] for query in queries if "SAVEPOINT" not in query["sql"]]
+        self.assertEqual(statements, ["SELECT", "UPDATE"])
+
+        self.assertEqual(set(invoice_ids), {self.first.id, self.second.id, self.club_late.id})
+        self.assertEqual(
+            set(Invoice.objects.filter(status="OVERDUE").values_list("id", flat=True)), set(invoice_ids)
+        )
+        self.assertEqual(flag_overdue_invoices(TODAY), [])
+
+    def test_one_reminder_per_customer_over_one_connection(self):
+        flag_overdue_invoices(TODAY)
+        mail.outbox = []
+
+        with patch("erp.invoices.dunning.get_connection", wraps=mail.get_connection) as get_connection:
+            sent = send_overdue_reminders(["club@example.com", "shop@example.com"])
+
+        self.assertEqual(sent, 2)
+        get_connection.assert_called_once()
+        shop_mail = next(message for message in mail.outbox if message.to == ["shop@example.com"])
+        self.assertIn("INV-1", shop_mail.body)
+        self.assertIn("INV-2", shop_mail.body)
+        self.assertIn("240.00", shop_mail.body)
+
+    def test_task_queues_batches_by_customer(self):
+        self.assertEqual(
+            reminder_batches([self.first.id, self.second.id, self.club_late.id], batch_size=1),
+            [["club@example.com"], ["shop@example.com"]],
+        )
+
+        with patch("erp.tasks.flag_overdue_invoices", return_value=[self.first.id, self.second.id]), patch(
+            "erp.tasks.send_invoice_reminders.delay"
+        ) as delay:
+            mark_overdue_invoices()
+
+        delay.assert_called_once_with(["shop@example.com"])
@@ -0,0 +1,118 @@
+import datetime
+import io
+import uuid
+import zoneinfo
+from collections import namedtuple
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+
+from erp.models import (
+    Customer,
+    Product,
+    ProductInventory,
+    SalesOrder,
+    Supplier,
+    SupplierProduct,
+    Warehouse,
+)
+from erp.parsers import FastJSONParser
+from erp.renderers import FastJSONRenderer
+from erp.values import ValuesListMixin
+
+Line = namedtuple("Line", "product quantity")
+
+
+class TestFastJSON(SimpleTestCase):
+    data = {
+        "price": Decimal("12.50"),
+        "utc": datetime.datetime(2025, 1, 2, 3, 4, 5, 600, tzinfo=datetime.timezone.utc),
+        "london": datetime.datetime(2025, 7, 1, 12, tzinfo=zoneinfo.ZoneInfo("Europe/London")),
+        "naive": datetime.datetime(2025, 1, 2, 3, 4, 5),
+        "date": datetime.date(2025, 1, 2),
+        "time": datetime.time(8, 30),
+        "duration": datetime.timedelta(hours=1, seconds=1),
+        "label": gettext_lazy("Name"),
+        "uuid": uuid.UUID(int=1),
+        "line": Line(1, 2),
+        "by_id": {1: "first"},
+        "text": "ż\u2028",
+        "nothing": None,
+        "rows": [{"id": 1, "ok": True, "ratio": 0.25}],
+    }
+
+    def test_renders_like_drf(self):
+        self.assertEqual(FastJSONRenderer().render(self.data), JSONRenderer().render(self.data))
+
+    def test_indented_output_falls_back(self):
+        self.assertEqual(
+            FastJSONRenderer().render(self.data, "application/json; indent=4"),
+            JSONRenderer().render(self.data, "application/json; indent=4"),
+        )
+        self.assertEqual(FastJSONRenderer().render({"big": 2**70}), b'{"big":1180591620717411303424}')
+
+    def test_parser(self):
+        parser = FastJSONParser()
+
+        self.assertEqual(parser.parse(io.BytesIO('{"name": "ż", "n": 1.5}'.encode())), {"name": "ż", "n": 1.5})
+        with self.assertRaises(ParseError):
+            parser.parse(io.BytesIO(b'{"n": NaN}'))
+        with self.assertRaises(ParseError):
+            parser.parse(io.BytesIO(b"{"))
+
+
+class TestValuesLists(TestCase):
+    def setUp(self):
+        cache.clear()
+        warehouse = Warehouse.objects.create(name="Main", location="A", capacity=100)
+        Warehouse.objects.create(name="Spare", location="B", capacity=5, manager="Ann")
+        bike = Product.objects.create(name="Bicycle", sku="BIKE", unit_price=Decimal("999.90"), weight=12.5)
+        Product.objects.create(name="Bell", sku="BELL", unit_price=5)
+        ProductInventory.objects.create(product=bike, warehouse=warehouse, quantity=5)
+        self.supplier = Supplier.objects.create(
+            name="Frames Ltd", contact_person="Ann", email="frames@example.com", phone="2", address="y"
+        )
+        SupplierProduct.objects.create(
+            supplier=self.supplier, product=bike, supplier_sku="F-1", unit_cost=Decimal("600.5"), is_preferred=True
+        )
+        customer = Customer.objects.create(name="Shop", email="shop@example.com", phone="1", address="x")
+        SalesOrder.objects.create(
+            customer=customer, requested_delivery=datetime.date(2025, 6, 1), shipping_cost=Decimal("9.99")
+        )
+
+    def assertSameAsSerializer(self, url, model, params=None):
+        def no_instances(*args, **kwargs):
+            raise AssertionError(f"{model.__name__} instances were built")
+
+        with patch.object(model, "from_db", no_instances):
+            lean = self.client.get(url, params or {})
+        cache.clear()
+        with patch.object(ValuesListMixin, "values_plan", return_value=None):
+            full = self.client.get(url, params or {})
+
+        self.assertEqual(lean.status_code, 200)
+        self.assertEqual(lean.content, full.content)
+        return lean.json()
+
+    def test_lists_match_the_serializers(self):
+        products = {row["sku"]: row for row in self.assertSameAsSerializer("/api/products/", Product)["results"]}
+        self.assertEqual(
+            products["BIKE"]["preferred_suppliers"], [{"supplier": self.supplier.id, "unit_cost": "600.50"}]
+        )
+        self.assertEqual((products["BIKE"]["total_quantity"], products["BELL"]["total_quantity"]), (5, None))
+
+        self.assertSameAsSerializer("/api/products/", Product, {"fields": "sku,warehouses,best_supplier_cost"})
+        self.assertSameAsSerializer("/api/suppliers/", Supplier)
+        self.assertSameAsSerializer("/api/warehouses/", Warehouse)
+        orders = self.assertSameAsSerializer("/api/salesorders/", SalesOrder)
+        self.assertEqual(orders["results"][0]["shipping_cost"], "9.99")
+
+    def test_expansions_use_the_serializer(self):
+        response = self.client.get("/api/warehouses/", {"expand": "inventory"})
+
+        self.assertEqual(response.json()["results"][0]["inventory"][0]["quantity"], 5)
@@ -0,0 +1,85 @@
+import datetime
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from erp.models import (
+    Customer,
+    Product,
+    ProductInventory,
+    SalesOrder,
+    SalesOrderItem,
+    Supplier,
+    SupplierProduct,
+    Warehouse,
+)
+
+
+class TestSparseFieldsets(TestCase):
+    def setUp(self):
+        self.warehouse = Warehouse.objects.create(name="Main", location="A", capacity=100)
+        self.bike = Product.objects.create(name="Bicycle", sku="BIKE", unit_price=1000)
+        ProductInventory.objects.create(product=self.bike, warehouse=self.warehouse, quantity=5)
+        supplier = Supplier.objects.create(
+            name="Frames Ltd", contact_person="Ann", email="frames@example.com", phone="2", address="y"
+        )
+        SupplierProduct.objects.create(
+            supplier=supplier, product=self.bike, supplier_sku="F-1", unit_cost=600, is_preferred=True
+        )
+        customer = Customer.objects.create(name="Shop", email="shop@example.com", phone="1", address="x")
+        self.order = SalesOrder.objects.create(customer=customer, requested_delivery=datetime.date(2025, 6, 1))
+        SalesOrderItem.objects.create(sales_order=self.order, product=self.bike, quantity=2, unit_price=1000)
+
+    def get(self, url, params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params)
+        return response, [query["sql"] for query in queries.captured_queries]
+
+    def test_fields_narrow_the_query(self):
+        full, full_sql = self.get("/api/products/", {})
+        response, sql = self.get("/api/products/", {"fields": "id,name,total_quantity"})
+
+        self.assertEqual(response.json()["results"], [{"id": self.bike.id, "name": "Bicycle", "total_quantity": 5}])
+        self.assertLess(len(sql), len(full_sql))
+        rows = [query for query in sql if '"erp_product"."name"' in query][-1].split(" FROM ")[0]
+        self.assertNotIn('"erp_product"."unit_price"', rows)
+        self.assertNotIn("erp_supplierproduct", " ".join(sql))
+        self.assertNotIn("erp_suppliersource", rows)
+        self.assertIn("preferred_suppliers", full.json()["results"][0])
+
+    def test_method_fields_keep_whole_rows(self):
+        response = self.client.get(
+            f"/api/warehouses/{self.warehouse.id}/inventory/", {"fields": "name,total_product_quantity"}
+        )
+
+        self.assertEqual(set(response.json()), {"name", "total_product_quantity"})
+
+    def test_expand_nests_relations(self):
+        response, sql = self.get(
+            f"/api/salesorders/{self.order.id}/", {"fields": "order_number", "expand": "customer,items"}
+        )
+
+        data = response.json()
+        self.assertEqual(set(data), {"order_number", "customer", "items"})
+        self.assertEqual(data["customer"]["name"], "Shop")
+        self.assertEqual([item["quantity"] for item in data["items"]], [2])
+        self.assertEqual(len(sql), 2)  # Order joined with its customer, then the items
+
+        listed = self.client.get("/api/salesorders/", {"expand": "customer"}).json()
+        self.assertEqual(listed["results"][0]["customer"]["email"], "shop@example.com")
+        self.assertIn("total_amount", listed["results"][0])
+
+    def test_unknown_names_are_rejected(self):
+        self.assertEqual(self.client.get("/api/products/", {"fields": "id,colour"}).status_code, 400)
+        self.assertEqual(self.client.get("/api/products/", {"expand": "customer"}).status_code, 400)
+
+    def test_writes_ignore_fieldsets(self):
+        response = self.client.patch(
+            f"/api/warehouses/{self.warehouse.id}/?fields=id",
+            {"capacity": 150},
+            content_type="application/json",
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["capacity"], 150)
@@ -0,0 +1,91 @@
+import datetime
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from erp.costing.labor import labor_arrays, labor_summary, labor_summary_sql
+from erp.models import Employee, ManufacturingOrder, Product, Shift, Workstation
+
+
+@override_settings(OVERTIME_RATE_MULTIPLIER=1.5)
+class TestLaborCalculation(TestCase):
+    def setUp(self):
+        product = Product.objects.create(name="Bicycle", sku="BIKE", unit_price=1000)
+        self.order = ManufacturingOrder.objects.create(
+            order_number="MO-1",
+            product=product,
+            quantity=10,
+            start_date="2025-01-01",
+            estimated_completion="2025-01-31",
+        )
+        self.workstation = Workstation.objects.create(
+            name="Frame Assembly", machine_id="FA001", location="Factory A"
+        )
+        self.anna = Employee.objects.create(
+            employee_id="E1", first_name="Anna", last_name="Nowak", hourly_rate=Decimal("20.00")
+        )
+        self.piotr = Employee.objects.create(
+            employee_id="E2", first_name="Piotr", last_name="Lis", hourly_rate=Decimal("30.00")
+        )
+        shifts = [
+            (self.anna, datetime.date(2025, 1, 6), datetime.time(6, 0), datetime.time(14, 0), 30, 0),
+            (self.anna, datetime.date(2025, 2, 3), datetime.time(22, 0), datetime.time(6, 0), 45, 60),
+            (self.piotr, datetime.date(2025, 1, 6), datetime.time(14, 10), datetime.time(22, 5), 17, 0),
+            (self.piotr, datetime.date(2025, 1, 7), datetime.time(9, 0), datetime.time(9, 0), 0, 0),
+        ]
+        for employee, date, start, end, breaks, overtime in shifts:
+            Shift.objects.create(
+                employee=employee,
+                manufacturing_order=self.order,
+                workstation=self.workstation,
+                shift_date=date,
+                start_time=start,
+                end_time=end,
+                break_minutes=breaks,
+                overtime_minutes=overtime,
+            )
+
+    def test_hours_match_shift_hours_exactly(self):
+        columns = labor_arrays()
+        expected = {shift.id: shift.shift_hours() for shift in Shift.objects.all()}
+
+        self.assertEqual(dict(zip(columns["id"].tolist(), columns["hours"].tolist())), expected)
+
+    def test_summary_by_employee_and_month(self):
+        summary = labor_summary(group_by=("employee", "month"))
+
+        self.assertEqual(
+            [(row["employee"], row["month"], row["shifts"]) for row in summary],
+            [
+                (self.anna.id, datetime.date(2025, 1, 1), 1),
+                (self.anna.id, datetime.date(2025, 2, 1), 1),
+                (self.piotr.id, datetime.date(2025, 1, 1), 2),
+            ],
+        )
+        overnight = summary[1]
+        self.assertEqual(overnight["hours"], 7.25)
+        # 7.25h + 1h overtime at 1.5x, 20/h
+        self.assertEqual(overnight["cost"], Decimal("175.00"))
+
+    def test_sql_path_matches_numpy_path(self):
+        for group_by in [("employee",), ("workstation", "day"), ("manufacturing_order", "year")]:
+            numpy_rows = labor_summary(group_by=group_by)
+            sql_rows = labor_summary_sql(group_by=group_by)
+
+            self.assertEqual(len(numpy_rows), len(sql_rows))
+            for numpy_row, sql_row in zip(numpy_rows, sql_rows):
+                for name in (*group_by, "shifts", "cost"):
+                    self.assertEqual(numpy_row[name], sql_row[name])
+                self.assertAlmostEqual(numpy_row["hours"], sql_row["hours"], places=9)
+
+    def test_summary_endpoint_is_limited_to_admins(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user("clerk", password="x"))
+        self.assertEqual(client.get("/api/labor/summary/").status_code, 403)
+
+        client.force_authenticate(User.objects.create_superuser("admin", password="x"))
+        response = client.get("/api/labor/summary/", {"group_by": "employee"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()["results"]), 2)
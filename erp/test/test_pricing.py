@@ -0,0 +1,137 @@
+import datetime
+from decimal import Decimal
+
+from django.test import TestCase
+
+from erp.models import Customer, PriceList, PriceRule, Product, SalesOrder
+from erp.sales.pricing import price_order, price_orders
+
+JUNE = datetime.date(2025, 6, 15)
+
+
+class TestPricing(TestCase):
+    def setUp(self):
+        self.wholesale = PriceList.objects.create(name="Wholesale")
+        self.shop = Customer.objects.create(
+            name="Shop", email="s@example.com", phone="1", address="x", price_list=self.wholesale
+        )
+        self.walk_in = Customer.objects.create(name="Walk-in", email="w@example.com", phone="2", address="y")
+        self.bike = Product.objects.create(name="Bicycle", sku="BIKE", unit_price=1000)
+        self.bell = Product.objects.create(name="Bell", sku="BELL", unit_price=5)
+
+        self.wholesale_bike = PriceRule.objects.create(
+            price_list=self.wholesale, product=self.bike, unit_price=Decimal("900.00")
+        )
+        self.bulk_bike = PriceRule.objects.create(
+            product=self.bike, min_quantity=10, discount_percentage=Decimal("15")
+        )
+        self.bell_promotion = PriceRule.objects.create(
+            product=self.bell,
+            discount_percentage=Decimal("20"),
+            valid_from=datetime.date(2025, 6, 1),
+            valid_to=datetime.date(2025, 6, 30),
+        )
+
+    def prices(self, lines):
+        return [(line.unit_price, line.discount_percentage, line.rule_id) for line in lines]
+
+    def test_lowest_applicable_price_wins(self):
+        shop, walk_in = price_orders(
+            [
+                (self.shop.id, [(self.bike.id, 1), (self.bike.id, 10), (self.bell.id, 1)]),
+                (self.walk_in.id, [(self.bike.id, 1), (self.bike.id, 10)]),
+            ],
+            on=JUNE,
+        )
+
+        self.assertEqual(
+            self.prices(shop),
+            [
+                (Decimal("900.00"), Decimal("0.00"), self.wholesale_bike.id),
+                (Decimal("1000.00"), Decimal("15.00"), self.bulk_bike.id),
+                (Decimal("5.00"), Decimal("20.00"), self.bell_promotion.id),
+            ],
+        )
+        self.assertEqual(
+            self.prices(walk_in),
+            [(Decimal("1000.00"), Decimal("0"), None), (Decimal("1000.00"), Decimal("15.00"), self.bulk_bike.id)],
+        )
+        self.assertEqual(shop[1].line_total, Decimal("8500.00"))
+        # The promotion is over in July
+        self.assertIsNone(price_order(self.shop.id, [(self.bell.id, 1)], on=datetime.date(2025, 7, 1))[0].rule_id)
+
+    def test_unknown_products_and_customers_are_rejected(self):
+        with self.assertRaisesMessage(ValueError, "Unknown products: [999999]"):
+            price_order(self.shop.id, [(999999, 1)])
+        with self.assertRaisesMessage(ValueError, "Unknown customers: [999999]"):
+            price_order(999999, [(self.bell.id, 1)])
+
+    def test_compiled_rules_are_reused_until_a_rule_changes(self):
+        price_order(self.shop.id, [(self.bike.id, 1)], on=JUNE)
+
+        with self.assertNumQueries(2):
+            price_orders([(self.shop.id, [(self.bike.id, 1)]), (self.walk_in.id, [(self.bell.id, 3)])], on=JUNE)
+
+        self.wholesale_bike.unit_price = Decimal("880.00")
+        self.wholesale_bike.save()
+        self.assertEqual(price_order(self.shop.id, [(self.bike.id, 1)], on=JUNE)[0].unit_price, Decimal("880.00"))
+
+        self.wholesale.is_active = False
+        self.wholesale.save()
+        self.assertIsNone(price_order(self.shop.id, [(self.bike.id, 1)], on=JUNE)[0].rule_id)
+
+    def test_quote_endpoint(self):
+        response = self.client.post(
+            "/api/pricing/quote/",
+            {
+                "date": "2025-06-15",
+                "customer": self.shop.id,
+                "items": [{"product": self.bike.id, "quantity": 2}],
+                "orders": [{"customer": self.walk_in.id, "items": [{"product": self.bell.id, "quantity": 4}]}],
+            },
+            content_type="application/json",
+        )
+
+        self.assertEqual(response.status_code, 200)
+        shop, walk_in = response.json()["orders"]
+        self.assertEqual((shop["customer"], shop["total"]), (self.shop.id, 1800))
+        self.assertEqual((walk_in["lines"][0]["discount_percentage"], walk_in["total"]), (20, 16))
+
+        response = self.client.post(
+            "/api/pricing/quote/",
+            {"customer": self.shop.id, "items": [{"product": 999999, "quantity": 1}]},
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 400)
+
+        response = self.client.post(
+            "/api/pricing/quote/",
+            {"customer": 999999, "items": [{"product": self.bell.id, "quantity": 1}]},
+            content_type="application/json",
+        )
+        self.assertEqual((response.status_code, response.json()), (400, ["Unknown customers: [999999]"]))
+
+    def test_order_form_uses_the_price_list_for_empty_prices(self):
+        response = self.client.post(
+            "/app/salesorders/create-form/",
+            {
+                "customer": self.shop.id,
+                "requested_delivery": "2025-06-20",
+                "status": "DRAFT",
+                "shipping_cost": "0",
+                "items-TOTAL_FORMS": "2",
+                "items-INITIAL_FORMS": "0",
+                "items-0-product": self.bike.id,
+                "items-0-quantity": "1",
+                "items-1-product": self.bell.id,
+                "items-1-quantity": "2",
+                "items-1-unit_price": "4.50",
+            },
+        )
+
+        self.assertEqual(response.status_code, 302)
+        order = SalesOrder.objects.get(customer=self.shop)
+        self.assertEqual(
+            sorted((item.product_id, item.unit_price, item.discount_percentage) for item in order.items.all()),
+            [(self.bike.id, Decimal("900.00"), Decimal("0.00")), (self.bell.id, Decimal("4.50"), Decimal("0.00"))],
+        )
@@ -0,0 +1,90 @@
+import datetime
+from decimal import Decimal
+
+from django.test import TestCase
+
+from erp.costing.orders import cost_manufacturing_orders
+from erp.models import (
+    BillOfMaterials,
+    BOMItem,
+    Employee,
+    MaintenanceActivity,
+    ManufacturingOrder,
+    Product,
+    Shift,
+    Supplier,
+    SupplierProduct,
+    Workstation,
+)
+
+
+class TestProductionCost(TestCase):
+    def setUp(self):
+        self.day = datetime.date(2025, 3, 3)
+        bike = Product.objects.create(name="Bicycle", sku="BIKE", unit_price=1000)
+        frame = Product.objects.create(
+            name="Frame", sku="FRAME", category="RAW", unit_price=100, unit_cost=Decimal("80.00")
+        )
+        wheel = Product.objects.create(
+            name="Wheel", sku="WHEEL", category="RAW", unit_price=50, unit_cost=Decimal("30.00")
+        )
+        supplier = Supplier.objects.create(
+            name="Wheels Inc", contact_person="Ann", email="a@b.com", phone="1", address="x"
+        )
+        SupplierProduct.objects.create(
+            supplier=supplier, product=wheel, unit_cost=Decimal("25.00"), is_preferred=True
+        )
+        bom = BillOfMaterials.objects.create(product=bike)
+        BOMItem.objects.create(bom=bom, component=frame, quantity_required=1)
+        BOMItem.objects.create(bom=bom, component=wheel, quantity_required=2)
+
+        self.workstation = Workstation.objects.create(
+            name="Frame Assembly", machine_id="FA001", location="Factory A"
+        )
+        self.order = ManufacturingOrder.objects.create(
+            order_number="MO-1",
+            product=bike,
+            quantity=10,
+            status="COMPLETED",
+            start_date=self.day,
+            estimated_completion=self.day,
+            actual_completion=self.day,
+        )
+        employee = Employee.objects.create(
+            employee_id="E1", first_name="Jan", last_name="Kowalski", hourly_rate=Decimal("20.00")
+        )
+        # 7.5 worked hours, no overtime
+        Shift.objects.create(
+            employee=employee,
+            manufacturing_order=self.order,
+            workstation=self.workstation,
+            shift_date=self.day,
+            start_time=datetime.time(6, 0),
+            end_time=datetime.time(14, 0),
+            break_minutes=30,
+        )
+        MaintenanceActivity.objects.create(
+            workstation=self.workstation,
+            maintenance_type="PREVENTIVE",
+            description="Oil change",
+            start_datetime=datetime.datetime(2025, 3, 3, 15, tzinfo=datetime.timezone.utc),
+            status="COMPLETED",
+            cost=Decimal("75.00"),
+        )
+
+    def test_cost_includes_material_labor_and_maintenance(self):
+        with self.assertNumQueries(6):
+            self.assertEqual(cost_manufacturing_orders(self.day, self.day), 1)
+
+        self.order.refresh_from_db()
+        # material 10 x (80 + 2 x 25) + labor 7.5h x 20 + maintenance 75
+        self.assertEqual(self.order.production_cost, Decimal("1525.00"))
+        self.assertIsNotNone(self.order.cost_computed_at)
+
+    def test_rerun_only_recosts_changed_orders(self):
+        cost_manufacturing_orders(self.day, self.day)
+        self.assertEqual(cost_manufacturing_orders(self.day, self.day), 0)
+
+        Shift.objects.get().save()
+        self.assertEqual(cost_manufacturing_orders(self.day, self.day), 1)
+        self.assertEqual(cost_manufacturing_orders(self.day, self.day, force=True), 1)
@@ -0,0 +1,96 @@
+import datetime
+from decimal import Decimal
+
+from django.test import TestCase
+
+from erp.models import (
+    Employee,
+    ManufacturingOrder,
+    Product,
+    ProductionKPI,
+    ProductionLog,
+    Shift,
+    Workstation,
+)
+from erp.reporting.kpi import dirty_dates, refresh_production_kpis
+
+
+class TestProductionKPI(TestCase):
+    def setUp(self):
+        self.day = datetime.date(2025, 3, 3)
+        self.workstation = Workstation.objects.create(
+            name="Frame Assembly",
+            machine_id="FA001",
+            location="Factory A",
+            capacity_per_hour=10,
+        )
+        product = Product.objects.create(name="Bicycle", sku="BIKE", unit_price=1000)
+        self.order = ManufacturingOrder.objects.create(
+            order_number="MO-1",
+            product=product,
+            quantity=100,
+            start_date=self.day,
+            estimated_completion=self.day,
+        )
+        employee = Employee.objects.create(
+            employee_id="E1", first_name="Jan", last_name="Kowalski"
+        )
+        # 8h shift with a 60 minute break -> 420 planned minutes
+        for _ in range(2):  # Two workers on the same window share the machine
+            Shift.objects.create(
+                employee=employee,
+                manufacturing_order=self.order,
+                workstation=self.workstation,
+                shift_date=self.day,
+                start_time=datetime.time(6, 0),
+                end_time=datetime.time(14, 0),
+                break_minutes=60,
+            )
+
+    def create_log(self, date, units_produced, units_defective=0, downtime_minutes=0):
+        return ProductionLog.objects.create(
+            manufacturing_order=self.order,
+            workstation=self.workstation,
+            date=date,
+            units_produced=units_produced,
+            units_defective=units_defective,
+            downtime_minutes=downtime_minutes,
+        )
+
+    def test_refresh_computes_oee_per_workstation_day(self):
+        self.create_log(self.day, units_produced=40, units_defective=2, downtime_minutes=60)
+        self.create_log(self.day, units_produced=20, units_defective=1, downtime_minutes=0)
+
+        self.assertEqual(refresh_production_kpis(), 1)
+
+        kpi = ProductionKPI.objects.get(workstation=self.workstation, date=self.day)
+        self.assertEqual(kpi.planned_minutes, 420)
+        self.assertEqual(kpi.downtime_minutes, 60)
+        self.assertEqual(kpi.units_produced, 60)
+        self.assertEqual(kpi.availability, Decimal("0.8571"))  # 360 / 420
+        self.assertEqual(kpi.performance, Decimal("1.0000"))  # 60 / (10 * 6h)
+        self.assertEqual(kpi.quality, Decimal("0.9500"))  # 57 / 60
+        self.assertEqual(kpi.oee, Decimal("0.8143"))
+
+    def test_overnight_shift_wraps_past_midnight(self):
+        Shift.objects.update(start_time=datetime.time(22, 0), end_time=datetime.time(6, 0))
+        self.create_log(self.day, units_produced=35)
+
+        refresh_production_kpis()
+
+        kpi = ProductionKPI.objects.get(workstation=self.workstation, date=self.day)
+        self.assertEqual(kpi.planned_minutes, 420)
+        self.assertEqual(kpi.performance, Decimal("0.5000"))
+
+    def test_refresh_only_recomputes_days_with_new_logs(self):
+        next_day = self.day + datetime.timedelta(days=1)
+        self.create_log(self.day, units_produced=10)
+        refresh_production_kpis()
+
+        self.assertEqual(dirty_dates(), [])
+        self.create_log(next_day, units_produced=10)
+        self.assertEqual(dirty_dates(), [next_day])
+
+        self.assertEqual(refresh_production_kpis(), 1)
+        self.assertEqual(ProductionKPI.objects.count(), 2)
+        self.assertIsNone(ProductionKPI.objects.get(date=next_day).availability)
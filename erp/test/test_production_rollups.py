@@ -0,0 +1,124 @@
+import datetime
+import tempfile
+from pathlib import Path
+
+from django.db import IntegrityError, transaction
+from django.test import TestCase
+from django.utils import timezone
+
+from erp.models import (
+    ManufacturingOrder,
+    Product,
+    ProductionLog,
+    ProductionRollup,
+    Workstation,
+)
+from erp.reporting.rollups import (
+    archive_production_logs,
+    production_trend,
+    rebuild_production_rollups,
+    select_grain,
+)
+
+UTC = datetime.timezone.utc
+
+
+class TestProductionRollups(TestCase):
+    def setUp(self):
+        self.workstation = Workstation.objects.create(
+            name="Frame Assembly", machine_id="FA001", location="Factory A"
+        )
+        product = Product.objects.create(name="Bicycle", sku="BIKE", unit_price=1000)
+        self.order = ManufacturingOrder.objects.create(
+            order_number="MO-1",
+            product=product,
+            quantity=100,
+            start_date="2025-01-01",
+            estimated_completion="2025-01-31",
+        )
+
+    def create_log(self, date, hour, units_produced, **kwargs):
+        return ProductionLog.objects.create(
+            manufacturing_order=self.order,
+            date=date,
+            start_time=datetime.time(hour, 15),
+            units_produced=units_produced,
+            **{"workstation": self.workstation, **kwargs},
+        )
+
+    def rollup(self, grain, bucket_start):
+        return ProductionRollup.objects.get(grain=grain, bucket_start=bucket_start)
+
+    def test_logs_without_workstation_share_one_bucket(self):
+        for units in (4, 6):
+            self.create_log(datetime.date(2025, 1, 6), 8, units, workstation=None)
+
+        month = self.rollup("MONTH", datetime.datetime(2025, 1, 1, tzinfo=UTC))
+        self.assertEqual((month.workstation_id, month.log_count, month.units_produced), (None, 2, 10))
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            ProductionRollup.objects.create(
+                grain="MONTH", bucket_start=month.bucket_start, manufacturing_order=self.order
+            )
+
+    def test_logs_are_rolled_up_incrementally(self):
+        self.create_log(datetime.date(2025, 1, 6), 8, 10, units_defective=1)
+        log = self.create_log(datetime.date(2025, 1, 6), 9, 5)
+        self.create_log(datetime.date(2025, 1, 20), 8, 7)
+
+        self.assertEqual(self.rollup("HOUR", datetime.datetime(2025, 1, 6, 8, tzinfo=UTC)).units_produced, 10)
+        self.assertEqual(self.rollup("DAY", datetime.datetime(2025, 1, 6, tzinfo=UTC)).units_produced, 15)
+        month = self.rollup("MONTH", datetime.datetime(2025, 1, 1, tzinfo=UTC))
+        self.assertEqual((month.log_count, month.units_produced, month.units_defective), (3, 22, 1))
+
+        log.units_produced = 8
+        log.save()
+        self.assertEqual(self.rollup("DAY", datetime.datetime(2025, 1, 6, tzinfo=UTC)).units_produced, 18)
+
+        log.delete()
+        month.refresh_from_db()
+        self.assertEqual((month.log_count, month.units_produced), (2, 17))
+
+    def test_rebuild_matches_incremental_rollups(self):
+        self.create_log(datetime.date(2025, 1, 6), 8, 10)
+        self.create_log(datetime.date(2025, 2, 3), 14, 4)
+        incremental = sorted(
+            ProductionRollup.objects.values_list("grain", "bucket_start", "units_produced")
+        )
+
+        ProductionRollup.objects.all().delete()
+        rebuild_production_rollups(datetime.date(2025, 1, 6), datetime.date(2025, 2, 3))
+
+        rebuilt = sorted(
+            ProductionRollup.objects.values_list("grain", "bucket_start", "units_produced")
+        )
+        self.assertEqual(rebuilt, incremental)
+
+    def test_trend_uses_coarsest_sufficient_grain(self):
+        start = datetime.datetime(2024, 1, 1, tzinfo=UTC)
+        self.assertEqual(select_grain(start, start + datetime.timedelta(days=5 * 365)), "MONTH")
+        self.assertEqual(select_grain(start, start + datetime.timedelta(days=90)), "DAY")
+        self.assertEqual(select_grain(start, start + datetime.timedelta(days=2)), "HOUR")
+
+        self.create_log(datetime.date(2025, 1, 6), 8, 10)
+        self.create_log(datetime.date(2025, 1, 7), 8, 3)
+        grain, series = production_trend(
+            datetime.datetime(2025, 1, 6, 12, tzinfo=UTC),
+            datetime.datetime(2025, 1, 8, tzinfo=UTC),
+            resolution=datetime.timedelta(days=1),
+        )
+        self.assertEqual(grain, "DAY")
+        self.assertEqual([point["units_produced"] for point in series], [10, 3])
+
+    def test_archiving_keeps_rollup_totals(self):
+        old_date = timezone.now().date() - datetime.timedelta(days=800)
+        self.create_log(old_date, 8, 10)
+
+        with tempfile.TemporaryDirectory() as output_dir:
+            archived = archive_production_logs(Path(output_dir), retention_days=730)
+            self.assertEqual(len(list(Path(output_dir).iterdir())), 1)
+
+        self.assertEqual(archived, 1)
+        self.assertFalse(ProductionLog.objects.exists())
+        self.assertEqual(
+            ProductionRollup.objects.get(grain="DAY").units_produced, 10
+        )
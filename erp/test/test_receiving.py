@@ -0,0 +1,85 @@
+import datetime
+
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from erp.models import (
+    Product,
+    ProductInventory,
+    PurchaseOrder,
+    PurchaseOrderItem,
+    Supplier,
+    Warehouse,
+)
+
+
+class TestPurchaseOrderReceiving(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        supplier = Supplier.objects.create(
+            name="Parts Co", contact_person="Ann", email="a@b.com", phone="1", address="x"
+        )
+        self.north = Warehouse.objects.create(name="North", location="A", capacity=1000)
+        self.south = Warehouse.objects.create(name="South", location="B", capacity=1000)
+        self.frame = Product.objects.create(name="Frame", sku="FRAME", unit_price=100)
+        self.wheel = Product.objects.create(name="Wheel", sku="WHEEL", unit_price=50)
+        ProductInventory.objects.create(product=self.frame, warehouse=self.north, quantity=5)
+
+        self.first = self.purchase_order("PO-1", supplier, self.north)
+        self.second = self.purchase_order("PO-2", supplier, self.south)
+        self.frames = self.line(self.first, self.frame, 10)
+        self.wheels = self.line(self.first, self.wheel, 20)
+        self.south_frames = self.line(self.second, self.frame, 4)
+
+    def purchase_order(self, number, supplier, warehouse):
+        return PurchaseOrder.objects.create(
+            po_number=number,
+            supplier=supplier,
+            warehouse=warehouse,
+            expected_delivery=datetime.date(2025, 6, 1),
+            status="ORDERED",
+        )
+
+    def line(self, order, product, quantity):
+        return PurchaseOrderItem.objects.create(
+            purchase_order=order, product=product, quantity_ordered=quantity, unit_price=10
+        )
+
+    def receive(self, *lines):
+        return self.client.post(
+            "/api/inventory/receive/",
+            {"lines": [{"item": item.id, "quantity": quantity} for item, quantity in lines]},
+            format="json",
+        )
+
+    def stock(self, product, warehouse):
+        return ProductInventory.objects.get(product=product, warehouse=warehouse).quantity
+
+    def test_receives_many_orders_into_their_warehouses(self):
+        response = self.receive((self.frames, 10), (self.wheels, 8), (self.south_frames, 4))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json()["purchase_orders"],
+            [{"id": self.first.id, "status": "PARTIAL"}, {"id": self.second.id, "status": "RECEIVED"}],
+        )
+        self.assertEqual(self.stock(self.frame, self.north), 15)
+        self.assertEqual(self.stock(self.wheel, self.north), 8)
+        self.assertEqual(self.stock(self.frame, self.south), 4)
+        self.wheels.refresh_from_db()
+        self.assertEqual(self.wheels.quantity_received, 8)
+        self.second.refresh_from_db()
+        self.assertIsNotNone(self.second.actual_delivery)
+
+    def test_query_count_does_not_grow_with_lines(self):
+        with self.assertNumQueries(14):
+            self.receive((self.frames, 1))
+        with self.assertNumQueries(14):
+            self.receive((self.frames, 1), (self.wheels, 1), (self.south_frames, 1))
+
+    def test_over_receipt_is_rejected(self):
+        response = self.receive((self.frames, 3), (self.south_frames, 5))
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.stock(self.frame, self.north), 5)
+        self.assertFalse(ProductInventory.objects.filter(warehouse=self.south).exists())
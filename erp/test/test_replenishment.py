@@ -0,0 +1,108 @@
+from decimal import Decimal
+
+from django.test import TestCase
+
+from erp.inventory.replenishment import (
+    ReplenishmentLine,
+    create_purchase_orders,
+    plan_replenishment,
+)
+from erp.models import (
+    OrderNumber,
+    Product,
+    ProductInventory,
+    PurchaseOrder,
+    PurchaseOrderItem,
+    Supplier,
+    SupplierProduct,
+    Warehouse,
+)
+from erp.purchasing.sourcing import refresh_supplier_sources
+
+
+class TestReplenishment(TestCase):
+    def setUp(self):
+        self.north = Warehouse.objects.create(name="North", location="A", capacity=1000)
+        self.south = Warehouse.objects.create(name="South", location="B", capacity=1000)
+        self.cheap = self.supplier("Cheap")
+        self.preferred = self.supplier("Preferred")
+
+        self.frame = Product.objects.create(name="Frame", sku="FRAME", unit_price=100, min_stock_level=50)
+        self.wheel = Product.objects.create(name="Wheel", sku="WHEEL", unit_price=50, min_stock_level=40)
+        self.bell = Product.objects.create(name="Bell", sku="BELL", unit_price=5, min_stock_level=10)
+        ProductInventory.objects.create(product=self.frame, warehouse=self.south, quantity=30)
+        ProductInventory.objects.create(product=self.frame, warehouse=self.north, quantity=5, reserved_quantity=5)
+        ProductInventory.objects.create(product=self.bell, warehouse=self.north, quantity=25)
+
+        SupplierProduct.objects.create(
+            supplier=self.cheap, product=self.frame, unit_cost=Decimal("8.00"), min_order_quantity=5
+        )
+        SupplierProduct.objects.create(
+            supplier=self.preferred, product=self.frame, unit_cost=Decimal("9.00"), is_preferred=True,
+            lead_time_days=7,
+        )
+        SupplierProduct.objects.create(
+            supplier=self.cheap, product=self.wheel, unit_cost=Decimal("3.00"), min_order_quantity=100,
+            lead_time_days=3,
+        )
+        refresh_supplier_sources()
+
+    def supplier(self, name):
+        return Supplier.objects.create(
+            name=name, contact_person="Ann", email="a@b.com", phone="1", address="x"
+        )
+
+    def test_plans_shortages_net_of_open_orders(self):
+        order = PurchaseOrder.objects.create(
+            po_number="PO-1", supplier=self.cheap, warehouse=self.south,
+            expected_delivery="2025-06-01", status="ORDERED",
+        )
+        PurchaseOrderItem.objects.create(
+            purchase_order=order, product=self.frame, quantity_ordered=15, quantity_received=5,
+            unit_price=8,
+        )
+
+        with self.assertNumQueries(2):
+            lines = plan_replenishment()
+
+        self.assertEqual(
+            lines,
+            [
+                # 50 - 30 free - 10 still due; the preferred supplier wins over the cheaper one
+                ReplenishmentLine(self.frame.id, self.preferred.id, self.south.id, 10, Decimal("9.00"), 7),
+                # Short 40 but the supplier's minimum is 100; no stock yet, first warehouse
+                ReplenishmentLine(self.wheel.id, self.cheap.id, self.north.id, 100, Decimal("3.00"), 3),
+            ],
+        )
+
+    def test_one_draft_order_per_supplier_and_warehouse(self):
+        SupplierProduct.objects.filter(supplier=self.preferred).delete()
+        refresh_supplier_sources()
+        ProductInventory.objects.filter(product=self.frame, warehouse=self.south).update(quantity=0)
+
+        orders = create_purchase_orders(plan_replenishment())
+
+        self.assertEqual(len(orders), 1)
+        order = PurchaseOrder.objects.get()
+        self.assertEqual((order.status, order.supplier, order.warehouse), ("DRAFT", self.cheap, self.north))
+        self.assertEqual(order.total_amount, Decimal("700.00"))
+        self.assertEqual(
+            sorted(order.items.values_list("product__sku", "quantity_ordered")),
+            [("FRAME", 50), ("WHEEL", 100)],
+        )
+        # Drafts count as inbound, so a second run orders nothing
+        self.assertEqual(plan_replenishment(), [])
+
+    def test_orders_whole_multiples_with_counter_numbers(self):
+        SupplierProduct.objects.filter(supplier=self.preferred).delete()
+        refresh_supplier_sources()
+        ProductInventory.objects.filter(product=self.frame, warehouse=self.south).update(quantity=38)
+        OrderNumber.objects.create(last_number=7000)
+
+        [frame, wheel] = plan_replenishment()
+        # Short 12, the supplier sells in fives
+        self.assertEqual((frame.product_id, frame.quantity), (self.frame.id, 15))
+
+        first = create_purchase_orders([frame])
+        second = create_purchase_orders([wheel])
+        self.assertEqual([order.po_number for order in first + second], ["RP-7001", "RP-7002"])
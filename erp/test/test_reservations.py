@@ -0,0 +1,143 @@
+import datetime
+
+from django.test import TestCase
+
+from erp.inventory.reservations import InsufficientStockError, plan_allocation
+from erp.models import (
+    Customer,
+    Product,
+    ProductInventory,
+    SalesOrder,
+    SalesOrderItem,
+    StockReservation,
+    Warehouse,
+)
+
+
+class TestPlanAllocation(TestCase):
+    def test_prefers_own_warehouse_then_most_available(self):
+        stock = {1: {10: (100, 5), 11: (101, 8), 12: (102, 3)}}
+
+        allocation, shortages = plan_allocation(
+            [(1, 1, None, 6), (2, 1, 102, 4), (3, 1, None, 5)], stock
+        )
+
+        self.assertEqual(allocation, {(1, 11): 6, (2, 12): 3, (2, 10): 1, (3, 10): 4, (3, 11): 1})
+        self.assertEqual(shortages, {})
+
+    def test_reports_shortage_per_product(self):
+        _, shortages = plan_allocation([(1, 1, None, 6), (2, 2, None, 1)], {1: {10: (100, 5)}})
+
+        self.assertEqual(shortages, {1: 1, 2: 1})
+
+
+class TestStockReservation(TestCase):
+    def setUp(self):
+        self.bike = Product.objects.create(name="Bicycle", sku="BIKE", unit_price=1000)
+        self.north = ProductInventory.objects.create(
+            product=self.bike,
+            warehouse=Warehouse.objects.create(name="North", location="A", capacity=100),
+            quantity=4,
+        )
+        self.south = ProductInventory.objects.create(
+            product=self.bike,
+            warehouse=Warehouse.objects.create(name="South", location="B", capacity=100),
+            quantity=10,
+        )
+        self.customer = Customer.objects.create(
+            name="Shop", email="shop@example.com", phone="1", address="x"
+        )
+
+    def order(self, quantity: int) -> SalesOrder:
+        order = SalesOrder.objects.create(
+            customer=self.customer, requested_delivery=datetime.date(2025, 6, 1)
+        )
+        SalesOrderItem.objects.create(
+            sales_order=order, product=self.bike, quantity=quantity, unit_price=1000
+        )
+        return order
+
+    def set_status(self, order: SalesOrder, status: str):
+        order.status = status
+        order.save()
+
+    def reserved(self):
+        self.north.refresh_from_db()
+        self.south.refresh_from_db()
+        return self.north.reserved_quantity, self.south.reserved_quantity
+
+    def test_confirming_reserves_across_warehouses(self):
+        order = self.order(12)
+
+        self.set_status(order, "CONFIRMED")
+
+        self.assertEqual(self.reserved(), (2, 10))
+        self.assertEqual(self.north.available_quantity, 2)
+        self.assertEqual(StockReservation.objects.count(), 2)
+
+    def test_second_order_cannot_take_reserved_stock(self):
+        self.set_status(self.order(12), "CONFIRMED")
+        second = self.order(3)
+
+        with self.assertRaises(InsufficientStockError):
+            self.set_status(second, "CONFIRMED")
+
+        second.refresh_from_db()
+        self.assertEqual(second.status, "DRAFT")
+        self.assertEqual(self.reserved(), (2, 10))
+
+    def test_cancel_releases_and_ship_consumes(self):
+        cancelled, shipped = self.order(5), self.order(3)
+        self.set_status(cancelled, "CONFIRMED")
+        self.set_status(shipped, "CONFIRMED")
+
+        self.set_status(cancelled, "CANCELLED")
+        self.set_status(shipped, "SHIPPED")
+
+        self.assertEqual(self.reserved(), (0, 0))
+        self.assertEqual((self.north.quantity, self.south.quantity), (4, 7))
+        self.assertFalse(StockReservation.objects.exists())
+
+    def test_deleting_line_releases_its_stock(self):
+        order = self.order(5)
+        self.set_status(order, "CONFIRMED")
+
+        order.delete()
+
+        self.assertEqual(self.reserved(), (0, 0))
+
+    def test_back_to_draft_releases(self):
+        order = self.order(5)
+        self.set_status(order, "CONFIRMED")
+
+        self.set_status(order, "DRAFT")
+
+        self.assertEqual(self.reserved(), (0, 0))
+        self.assertFalse(StockReservation.objects.exists())
+
+    def test_lines_saved_on_a_confirmed_order_are_reserved(self):
+        order = SalesOrder.objects.create(
+            customer=self.customer, status="CONFIRMED", requested_delivery=datetime.date(2025, 6, 1)
+        )
+        item = SalesOrderItem.objects.create(sales_order=order, product=self.bike, quantity=3, unit_price=1000)
+        self.assertEqual(self.reserved(), (0, 3))
+
+        item.quantity = 12
+        item.save()
+        self.assertEqual(self.reserved(), (2, 10))
+
+        item.quantity = 20
+        with self.assertRaises(InsufficientStockError):
+            item.save()
+        self.assertEqual(self.reserved(), (2, 10))
+
+    def test_api_maps_shortages_to_validation_errors(self):
+        self.set_status(self.order(14), "CONFIRMED")
+        order = self.order(1)
+
+        response = self.client.patch(
+            f"/api/salesorders/{order.id}/", {"status": "CONFIRMED"}, content_type="application/json"
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("status", response.json())
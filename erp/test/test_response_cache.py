@@ -0,0 +1,100 @@
+import datetime
+
+from django.contrib.auth.models import Permission, User
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from erp.caching import cache_stats
+from erp.inventory.reservations import reserve_order
+from erp.models import (
+    Customer,
+    Product,
+    ProductInventory,
+    SalesOrder,
+    SalesOrderItem,
+    Warehouse,
+)
+
+
+class TestResponseCache(TestCase):
+    client_class = APIClient
+
+    def setUp(self):
+        cache.clear()
+        self.warehouse = Warehouse.objects.create(name="Main", location="A", capacity=100)
+        self.bike = Product.objects.create(name="Bicycle", sku="BIKE", unit_price=1000)
+        self.stock = ProductInventory.objects.create(product=self.bike, warehouse=self.warehouse, quantity=5)
+
+    def test_second_read_is_served_from_the_cache(self):
+        first = self.client.get(f"/api/products/{self.bike.id}/")
+        self.assertEqual(first["X-Cache"], "MISS")
+
+        with self.assertNumQueries(0):
+            again = self.client.get(f"/api/products/{self.bike.id}/")
+        self.assertEqual(again["X-Cache"], "HIT")
+        self.assertEqual(again.json(), first.json())
+
+        self.assertEqual(self.client.get("/api/products/", {"page": 1})["X-Cache"], "MISS")
+        self.assertEqual(self.client.get("/api/products/", {"page": 1})["X-Cache"], "HIT")
+        self.assertEqual(self.client.get("/api/products/", {"page_size": 5})["X-Cache"], "MISS")
+
+    def test_saves_invalidate_dependent_endpoints(self):
+        self.client.get("/api/products/")
+        self.client.get(f"/api/warehouses/{self.warehouse.id}/inventory/")
+
+        self.stock.quantity = 7
+        self.stock.save()
+
+        products = self.client.get("/api/products/")
+        self.assertEqual(products["X-Cache"], "MISS")
+        self.assertEqual(products.json()["results"][0]["total_quantity"], 7)
+        inventory = self.client.get(f"/api/warehouses/{self.warehouse.id}/inventory/")
+        self.assertEqual(inventory["X-Cache"], "MISS")
+        self.assertEqual(inventory.json()["inventory"][0]["quantity"], 7)
+
+        Warehouse.objects.create(name="Overflow", location="B", capacity=10)
+        self.assertEqual(self.client.get("/api/products/")["X-Cache"], "HIT")
+        self.assertEqual(self.client.get("/api/warehouses/")["X-Cache"], "MISS")
+
+    def test_bulk_stock_updates_invalidate(self):
+        customer = Customer.objects.create(name="Shop", email="shop@example.com", phone="1", address="x")
+        order = SalesOrder.objects.create(customer=customer, requested_delivery=datetime.date(2025, 6, 1))
+        SalesOrderItem.objects.create(sales_order=order, product=self.bike, quantity=3, unit_price=1000)
+        url = f"/api/warehouses/{self.warehouse.id}/inventory/"
+        self.assertEqual(self.client.get(url)["X-Cache"], "MISS")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            reserve_order(order)  # A queryset update, no signals
+
+        response = self.client.get(url)
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.json()["inventory"][0]["reserved_quantity"], 3)
+
+    def test_permission_sets_do_not_share_entries(self):
+        clerk = User.objects.create_user("clerk", password="x")
+        manager = User.objects.create_user("manager", password="x")
+        manager.user_permissions.add(Permission.objects.get(codename="change_product"))
+
+        self.client.force_authenticate(clerk)
+        self.assertEqual(self.client.get("/api/products/")["X-Cache"], "MISS")
+        self.client.force_authenticate(manager)
+        self.assertEqual(self.client.get("/api/products/")["X-Cache"], "MISS")
+        other_clerk = User.objects.create_user("clerk2", password="x")
+        self.client.force_authenticate(other_clerk)
+        self.assertEqual(self.client.get("/api/products/")["X-Cache"], "HIT")
+
+    def test_hit_ratio(self):
+        for _ in range(3):
+            self.client.get("/api/warehouses/")
+
+        stats = cache_stats()
+        self.assertEqual(stats["WarehouseModelViewSet"], {"hits": 2, "misses": 1, "hit_ratio": 0.6667})
+        self.assertIsNone(stats["SupplierModelViewSet"]["hit_ratio"])
+
+        self.client.force_authenticate(User.objects.create_user("clerk", password="x"))
+        self.assertEqual(self.client.get("/api/cache/stats/").status_code, 403)
+        admin = User.objects.create_superuser("admin", password="x")
+        self.client.force_authenticate(admin)
+        response = self.client.get("/api/cache/stats/")
+        self.assertEqual(response.json()["WarehouseModelViewSet"]["hits"], 2)
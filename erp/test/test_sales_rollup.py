@@ -0,0 +1,127 @@
+import datetime
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from erp.models import (
+    Customer,
+    Product,
+    ProductInventory,
+    SalesOrder,
+    SalesOrderItem,
+    SalesRollup,
+    Warehouse,
+)
+from erp.reporting import sales
+from erp.reporting.sales import line_totals, refresh_sales_rollups, sales_summary
+
+
+class TestSalesRollup(TestCase):
+    def setUp(self):
+        self.shop = Customer.objects.create(name="Shop", email="s@example.com", phone="1", address="x")
+        self.club = Customer.objects.create(name="Club", email="c@example.com", phone="2", address="y")
+        self.bike = Product.objects.create(name="Bicycle", sku="BIKE", unit_price=1000)
+        self.bell = Product.objects.create(name="Bell", sku="BELL", category="SPARE", unit_price=5)
+        warehouse = Warehouse.objects.create(name="Main", location="A", capacity=100)
+        for product in (self.bike, self.bell):
+            ProductInventory.objects.create(product=product, warehouse=warehouse, quantity=20)
+
+        # Line changes refresh the rollup when the transaction commits
+        with self.captureOnCommitCallbacks(execute=True):
+            self.march = self.order(self.shop, datetime.date(2025, 3, 3))
+            self.line(self.march, self.bike, 2, "1000.00", discount="10")
+            self.line(self.march, self.bell, 4, "5.00")
+            self.april = self.order(self.club, datetime.date(2025, 4, 15))
+            self.line(self.april, self.bike, 1, "950.00")
+            draft = self.order(self.club, datetime.date(2025, 4, 16), status="DRAFT")
+            self.line(draft, self.bike, 5, "1000.00")
+
+    def order(self, customer, date, status="CONFIRMED"):
+        return SalesOrder.objects.create(
+            customer=customer, order_date=date, requested_delivery=date, status=status
+        )
+
+    def line(self, order, product, quantity, price, discount="0"):
+        return SalesOrderItem.objects.create(
+            sales_order=order,
+            product=product,
+            quantity=quantity,
+            unit_price=Decimal(price),
+            discount_percentage=Decimal(discount),
+        )
+
+    def test_sql_line_totals_match_line_total(self):
+        rows = SalesOrderItem.objects.annotate(**line_totals()).order_by("id")
+
+        for item in rows:
+            self.assertEqual(Decimal(item.net).quantize(Decimal("0.01")), item.line_total())
+
+    def test_rollup_is_maintained_from_order_changes(self):
+        bike_march = SalesRollup.objects.get(customer=self.shop, product=self.bike)
+        self.assertEqual(
+            (bike_march.month, bike_march.quantity, bike_march.gross, bike_march.discount, bike_march.net),
+            (datetime.date(2025, 3, 1), 2, Decimal("2000.00"), Decimal("200.00"), Decimal("1800.00")),
+        )
+        # Drafts are not sales yet
+        self.assertEqual(SalesRollup.objects.filter(customer=self.club).get().quantity, 1)
+
+        self.april.status = "CANCELLED"
+        self.april.save()
+        self.assertFalse(SalesRollup.objects.filter(customer=self.club).exists())
+
+    def test_line_changes_refresh_each_bucket_once_per_transaction(self):
+        with patch.object(sales, "refresh_sales_rollups", wraps=refresh_sales_rollups) as refresh:
+            with self.captureOnCommitCallbacks(execute=True):
+                for _ in range(3):
+                    self.line(self.march, self.bell, 1, "5.00")
+                self.line(self.april, self.bell, 2, "5.00")
+
+        refresh.assert_called_once_with(
+            {(self.shop.id, datetime.date(2025, 3, 1)), (self.club.id, datetime.date(2025, 4, 1))}
+        )
+        self.assertEqual(SalesRollup.objects.get(customer=self.shop, product=self.bell).quantity, 7)
+
+    def test_saving_an_order_reads_the_stored_row_once(self):
+        self.april.order_date = datetime.date(2025, 5, 2)
+        with CaptureQueriesContext(connection) as queries:
+            self.april.save()
+
+        reads = [
+            query for query in queries.captured_queries
+            if query["sql"].startswith("SELECT") and 'FROM "erp_salesorder"' in query["sql"]
+        ]
+        self.assertEqual(len(reads), 1)
+        self.assertEqual(SalesRollup.objects.get(customer=self.club).month, datetime.date(2025, 5, 1))
+
+    def test_full_rebuild_matches_incremental(self):
+        incremental = set(SalesRollup.objects.values_list("customer", "product", "month", "net"))
+
+        refresh_sales_rollups()
+
+        self.assertEqual(set(SalesRollup.objects.values_list("customer", "product", "month", "net")), incremental)
+
+    def test_slices_and_drill_down(self):
+        start, end = datetime.date(2025, 1, 1), datetime.date(2025, 12, 31)
+
+        by_quarter = sales_summary(start, end, group_by=["quarter"])
+        self.assertEqual(
+            [(row["quarter"], row["net"]) for row in by_quarter],
+            [(datetime.date(2025, 1, 1), Decimal("1820.00")), (datetime.date(2025, 4, 1), Decimal("950.00"))],
+        )
+        [spares] = sales_summary(start, end, group_by=["customer"], category="SPARE")
+        self.assertEqual((spares["customer"], spares["quantity"]), (self.shop.id, 4))
+
+    def test_summary_endpoint(self):
+        response = self.client.get(
+            "/api/sales/summary/",
+            {"start": "2025-01-01", "end": "2025-12-31", "group_by": "product,month", "customer": self.shop.id},
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [(row["product"], row["quantity"]) for row in response.json()["results"]],
+            [(self.bike.id, 2), (self.bell.id, 4)],
+        )
@@ -0,0 +1,82 @@
+from django.test import TestCase, TransactionTestCase
+
+from erp.models import Customer, ManufacturingOrder, Product, SalesOrder, Supplier
+from erp.search import (
+    _pool,
+    _search_in_worker,
+    _worker_connections,
+    prefix_query,
+    search,
+)
+
+
+class TestSearch(TestCase):
+    def setUp(self):
+        self.bicycle = Product.objects.create(name="Bicycle", sku="BIKE-1", unit_price=1000)
+        self.bell = Product.objects.create(
+            name="Bell", sku="BELL-1", description="Fits any bicycle", unit_price=5
+        )
+        self.customer = Customer.objects.create(
+            name="Bicycle Club", email="club@example.com", phone="1", address="x"
+        )
+        Supplier.objects.create(
+            name="Frames Ltd", contact_person="Ann", email="frames@example.com", phone="2", address="y"
+        )
+        self.order = SalesOrder.objects.create(customer=self.customer, requested_delivery="2025-06-01")
+
+    def test_prefix_query(self):
+        self.assertEqual(prefix_query(" Bi-cy 42 "), "bi:* & cy:* & 42:*")
+        self.assertIsNone(prefix_query("--"))
+
+    def test_results_are_ranked_per_entity(self):
+        results = search("bicycle")
+
+        self.assertEqual([row["id"] for row in results["products"]], [self.bicycle.id, self.bell.id])
+        self.assertEqual(results["products"][0]["detail"], "BIKE-1")
+        self.assertEqual([row["label"] for row in results["customers"]], ["Bicycle Club"])
+        self.assertEqual((results["suppliers"], results["orders"]), ([], []))
+        self.assertEqual(search(self.order.order_number, types=["orders"])["orders"][0]["id"], self.order.id)
+
+    def test_search_endpoint(self):
+        response = self.client.get("/api/search/", {"q": "bic", "types": "products,customers", "limit": 1})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(response.json()["results"]), {"products", "customers"})
+        self.assertEqual([row["id"] for row in response.json()["results"]["products"]], [self.bicycle.id])
+        self.assertEqual(self.client.get("/api/search/", {"q": "bic", "types": "invoices"}).status_code, 400)
+
+    def test_viewsets_search_with_the_same_ranking(self):
+        response = self.client.get("/api/products/", {"search": "bicycle"})
+
+        self.assertEqual([row["id"] for row in response.json()["results"]], [self.bicycle.id, self.bell.id])
+        self.assertNotIn("search_vector", response.json()["results"][0])
+
+    def test_manufacturing_orders_search_by_number_and_product_sku(self):
+        order = ManufacturingOrder.objects.create(
+            order_number="MO-77",
+            product=self.bicycle,
+            quantity=1,
+            start_date="2025-06-01",
+            estimated_completion="2025-06-02",
+        )
+        ManufacturingOrder.objects.create(
+            order_number="MO-78", product=self.bell, quantity=1, start_date="2025-06-01", estimated_completion="2025-06-02"
+        )
+
+        for text in ["MO-77", "bike"]:
+            response = self.client.get("/api/manufacturing-orders/", {"search": text})
+            self.assertEqual([row["id"] for row in response.json()["results"]], [order.id], text)
+            self.assertNotIn("search_vector", response.json()["results"][0])
+        self.assertEqual([row["id"] for row in search("bike")["manufacturing_orders"]], [order.id])
+
+
+class TestSearchWorkers(TransactionTestCase):
+    def test_workers_keep_their_connection_between_searches(self):
+        bicycle = Product.objects.create(name="Bicycle", sku="BIKE-1", unit_price=1000)
+
+        for _ in range(2):
+            [row] = _pool.submit(_search_in_worker, "products", "bicycle", 10).result()
+            self.assertEqual(row["id"], bicycle.id)
+
+        self.assertTrue(_worker_connections)
+        self.assertTrue(any(worker.connection is not None for worker in _worker_connections))
@@ -0,0 +1,92 @@
+import datetime
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from erp.models import (
+    Product,
+    PurchaseOrder,
+    Supplier,
+    SupplierProduct,
+    SupplierSource,
+    Warehouse,
+)
+from erp.purchasing.sourcing import (
+    best_source,
+    on_time_rates,
+    ranked_sources,
+    refresh_supplier_sources,
+)
+
+
+class TestSupplierSourcing(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.warehouse = Warehouse.objects.create(name="Main", location="A", capacity=1000)
+        self.reliable = self.supplier("Reliable", rating=5)
+        self.late = self.supplier("Late", rating=2)
+        self.wheel = Product.objects.create(name="Wheel", sku="WHEEL", unit_price=50)
+        SupplierProduct.objects.create(
+            supplier=self.reliable, product=self.wheel, unit_cost=Decimal("10.00"), lead_time_days=4
+        )
+        SupplierProduct.objects.create(
+            supplier=self.late, product=self.wheel, unit_cost=Decimal("9.00"), lead_time_days=9
+        )
+        self.delivery(self.reliable, "PO-1", late_by=0)
+        self.delivery(self.late, "PO-2", late_by=3)
+        self.delivery(self.late, "PO-3", late_by=-1)
+
+    def supplier(self, name, rating):
+        return Supplier.objects.create(
+            name=name, contact_person="Ann", email="a@b.com", phone="1", address="x",
+            supplier_rating=rating,
+        )
+
+    def delivery(self, supplier, number, late_by):
+        expected = datetime.date(2025, 3, 10)
+        PurchaseOrder.objects.create(
+            po_number=number,
+            supplier=supplier,
+            warehouse=self.warehouse,
+            expected_delivery=expected,
+            actual_delivery=expected + datetime.timedelta(days=late_by),
+            status="RECEIVED",
+        )
+
+    def test_on_time_rate_from_delivery_history(self):
+        self.assertEqual(on_time_rates(), {self.reliable.id: 1.0, self.late.id: 0.5})
+
+    def test_ranks_by_score_with_preferred_first(self):
+        refresh_supplier_sources()
+
+        sources = ranked_sources(self.wheel.id)
+        self.assertEqual([source["supplier_id"] for source in sources], [self.reliable.id, self.late.id])
+        # 0.4 * 0.9 cost + 0.2 * 1 lead time + 0.15 * 1 rating + 0.25 * 1 on time
+        self.assertEqual(sources[0]["score"], Decimal("0.9600"))
+        self.assertEqual(sources[1]["on_time_rate"], Decimal("0.5000"))
+
+        SupplierProduct.objects.filter(supplier=self.late).update(is_preferred=True)
+        refresh_supplier_sources(supplier_ids=[self.late.id])
+        self.assertEqual(best_source(self.wheel.id)["supplier_id"], self.late.id)
+
+    def test_lookup_is_cached_and_invalidated_by_refresh(self):
+        refresh_supplier_sources()
+        ranked_sources(self.wheel.id)
+        with self.assertNumQueries(0):
+            ranked_sources(self.wheel.id)
+
+        Supplier.objects.filter(id=self.reliable.id).update(is_active=False)
+        refresh_supplier_sources(product_ids=[self.wheel.id])
+
+        self.assertEqual([s["supplier_id"] for s in ranked_sources(self.wheel.id)], [self.late.id])
+        self.assertEqual(SupplierSource.objects.get().rank, 1)
+
+    def test_sources_endpoint(self):
+        refresh_supplier_sources()
+
+        response = self.client.get(f"/api/products/{self.wheel.id}/sources/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row["rank"] for row in response.json()], [1, 2])
+        self.assertEqual(response.json()[0]["supplier"], self.reliable.id)
@@ -0,0 +1,73 @@
+from decimal import Decimal
+
+from django.test import TestCase
+
+from erp.costing.standard import BOMCycleError, BOMGraph, rollup_standard_costs
+from erp.models import BillOfMaterials, BOMItem, Product, ProductCostHistory
+
+
+class TestStandardCostRollup(TestCase):
+    def setUp(self):
+        def product(sku, category, unit_cost=None):
+            return Product.objects.create(
+                name=sku, sku=sku, category=category, unit_price=1, unit_cost=unit_cost
+            )
+
+        self.steel = product("STEEL", "RAW", Decimal("2.00"))
+        self.rubber = product("RUBBER", "RAW", Decimal("1.50"))
+        self.frame = product("FRAME", "WIP")
+        self.wheel = product("WHEEL", "WIP")
+        self.bike = product("BIKE", "FIN")
+        self.scooter = product("SCOOTER", "FIN")
+
+        self.add_bom(self.frame, [(self.steel, "10")])
+        self.add_bom(self.wheel, [(self.steel, "1.5"), (self.rubber, "2")])
+        self.add_bom(self.bike, [(self.frame, "1"), (self.wheel, "2"), (self.steel, "0.5")])
+        self.add_bom(self.scooter, [(self.rubber, "1")])
+
+    def add_bom(self, product, components):
+        bom = BillOfMaterials.objects.create(product=product)
+        for component, quantity in components:
+            BOMItem.objects.create(bom=bom, component=component, quantity_required=Decimal(quantity))
+
+    def unit_cost(self, product):
+        product.refresh_from_db()
+        return product.unit_cost
+
+    def test_low_level_codes(self):
+        graph = BOMGraph.load()
+        # Steel is used directly by the bike and one level deeper through the frame
+        self.assertEqual(graph.low_level_codes[self.steel.id], 2)
+        self.assertEqual(graph.low_level_codes[self.frame.id], 1)
+        self.assertEqual(graph.low_level_codes[self.bike.id], 0)
+
+    def test_full_rollup_costs_bottom_up(self):
+        self.assertEqual(rollup_standard_costs(), 4)
+
+        self.assertEqual(self.unit_cost(self.frame), Decimal("20.00"))
+        self.assertEqual(self.unit_cost(self.wheel), Decimal("6.00"))
+        self.assertEqual(self.unit_cost(self.bike), Decimal("33.00"))
+        self.assertEqual(self.unit_cost(self.scooter), Decimal("1.50"))
+        self.assertEqual(ProductCostHistory.objects.count(), 4)
+
+        self.assertEqual(rollup_standard_costs(), 0)
+
+    def test_price_change_recosts_only_ancestors(self):
+        rollup_standard_costs()
+        Product.objects.filter(id=self.steel.id).update(unit_cost=Decimal("3.00"))
+
+        with self.assertNumQueries(6):
+            # graph, costs, then bulk update and history inside a savepoint
+            self.assertEqual(rollup_standard_costs([self.steel.id]), 3)
+
+        self.assertEqual(self.unit_cost(self.bike), Decimal("46.50"))
+        history = ProductCostHistory.objects.filter(product=self.bike).latest("id")
+        self.assertEqual((history.previous_cost, history.unit_cost), (Decimal("33.00"), Decimal("46.50")))
+        self.assertEqual(ProductCostHistory.objects.filter(product=self.scooter).count(), 1)
+
+    def test_cycle_is_reported(self):
+        self.add_bom(self.steel, [(self.bike, "1")])
+        Product.objects.filter(id=self.steel.id).update(category="WIP")
+
+        with self.assertRaises(BOMCycleError):
+            BOMGraph.load()
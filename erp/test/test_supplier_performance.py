@@ -0,0 +1,98 @@
+import datetime
+from decimal import Decimal
+
+from django.test import TestCase
+
+from erp.models import (
+    Product,
+    PurchaseOrder,
+    PurchaseOrderItem,
+    Supplier,
+    SupplierPerformance,
+    Warehouse,
+)
+from erp.reporting.suppliers import refresh_supplier_performance, supplier_performance
+
+
+class TestSupplierPerformance(TestCase):
+    def setUp(self):
+        self.supplier = Supplier.objects.create(
+            name="Parts Co", contact_person="Ann", email="a@b.com", phone="1", address="x"
+        )
+        self.warehouse = Warehouse.objects.create(name="Main", location="A", capacity=1000)
+        self.frame = Product.objects.create(name="Frame", sku="FRAME", unit_price=100)
+
+        self.on_time = self.order("PO-1", datetime.date(2025, 3, 10), delivered=datetime.date(2025, 3, 9))
+        self.line(self.on_time, ordered=10, received=10, price="5.00")
+        self.late = self.order("PO-2", datetime.date(2025, 3, 20), delivered=datetime.date(2025, 3, 24))
+        self.line(self.late, ordered=10, received=6, price="5.00")
+        self.line(self.late, ordered=20, received=20, price="2.50")
+        self.order("PO-3", datetime.date(2025, 3, 25), status="DRAFT")
+        self.order("PO-4", datetime.date(2025, 4, 2), status="ORDERED")
+
+    def order(self, number, expected, delivered=None, status="RECEIVED"):
+        return PurchaseOrder.objects.create(
+            po_number=number,
+            supplier=self.supplier,
+            warehouse=self.warehouse,
+            expected_delivery=expected,
+            actual_delivery=delivered,
+            status=status,
+        )
+
+    def line(self, order, ordered, received, price):
+        return PurchaseOrderItem.objects.create(
+            purchase_order=order,
+            product=self.frame,
+            quantity_ordered=ordered,
+            quantity_received=received,
+            unit_price=Decimal(price),
+        )
+
+    def test_monthly_aggregates(self):
+        refresh_supplier_performance()
+
+        march, april = supplier_performance(datetime.date(2025, 3, 1), datetime.date(2025, 4, 30))
+
+        self.assertEqual(march["month"], datetime.date(2025, 3, 1))
+        self.assertEqual((march["purchase_orders"], march["lines"]), (2, 3))
+        self.assertEqual(march["on_time_rate"], 0.5)
+        self.assertEqual(march["average_days_late"], 2.0)
+        self.assertEqual(march["fill_rate"], 0.9)
+        self.assertEqual(march["spend"], Decimal("150.00"))
+        self.assertIsNone(april["on_time_rate"])
+
+    def test_saving_an_order_refreshes_its_months(self):
+        refresh_supplier_performance()
+
+        self.late.expected_delivery = datetime.date(2025, 4, 30)
+        self.late.save()
+
+        march = SupplierPerformance.objects.get(month=datetime.date(2025, 3, 1))
+        april = SupplierPerformance.objects.get(month=datetime.date(2025, 4, 1))
+        self.assertEqual((march.purchase_orders, march.days_late), (1, 0))
+        self.assertEqual((april.purchase_orders, april.on_time_orders, april.lines), (2, 1, 2))
+
+    def test_line_changes_refresh_their_month(self):
+        def march():
+            return SupplierPerformance.objects.get(month=datetime.date(2025, 3, 1))
+
+        line = self.line(self.on_time, ordered=4, received=0, price="10.00")
+        self.assertEqual((march().lines, march().quantity_received, march().spend), (4, 36, Decimal("190.00")))
+
+        line.quantity_received = 4
+        line.save()
+        self.assertEqual(march().quantity_received, 40)
+
+        line.delete()
+        self.assertEqual((march().lines, march().spend), (3, Decimal("150.00")))
+
+    def test_endpoint_totals_per_supplier(self):
+        response = self.client.get(
+            "/api/supplier-performance/",
+            {"start": "2025-01-01", "end": "2025-12-31", "group_by": "supplier"},
+        )
+
+        self.assertEqual(response.status_code, 200)
+        [row] = response.json()["results"]
+        self.assertEqual((row["supplier"], row["purchase_orders"], row["lines"]), (self.supplier.id, 3, 3))
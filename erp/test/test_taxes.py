@@ -0,0 +1,69 @@
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import IntegrityError, transaction
+from django.test import TestCase
+
+from erp.invoices.taxes import compute_taxes, invoice_taxes
+from erp.models import Customer, Invoice, SalesOrder
+
+
+class TestTaxes(TestCase):
+    def setUp(self):
+        self.customer = Customer.objects.create(name="Shop", email="s@example.com", phone="1", address="x")
+        self.order = SalesOrder.objects.create(customer=self.customer, requested_delivery="2025-06-01")
+
+    def invoice(self, net, rate, status="ISSUED"):
+        return Invoice.objects.create(
+            sales_order=self.order, net_amount=Decimal(net), vat_rate=Decimal(rate), status=status
+        )
+
+    def test_rounds_half_up_to_the_cent(self):
+        nets, vats, grosses = compute_taxes(["2.50", Decimal("10.004"), 0.1], [5, Decimal("23"), Decimal("8")])
+
+        self.assertEqual(nets, [Decimal("2.50"), Decimal("10.00"), Decimal("0.10")])
+        self.assertEqual(vats, [Decimal("0.13"), Decimal("2.30"), Decimal("0.01")])
+        self.assertEqual(grosses, [Decimal("2.63"), Decimal("12.30"), Decimal("0.11")])
+        self.assertEqual(
+            compute_taxes([Decimal("100"), Decimal("50")], Decimal("23"))[2], [Decimal("123.00"), Decimal("61.50")]
+        )
+        self.assertEqual(invoice_taxes(None, Decimal("23")), (None, None, None))
+
+    def test_save_uses_the_same_computation(self):
+        invoice = self.invoice("2.50", "5")
+
+        invoice.refresh_from_db()
+        self.assertEqual((invoice.vat_amount, invoice.gross_amount), (Decimal("0.13"), Decimal("2.63")))
+
+    def test_database_rejects_drifting_gross(self):
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Invoice.objects.bulk_create(
+                [
+                    Invoice(
+                        net_amount=Decimal("100.00"),
+                        vat_rate=Decimal("23"),
+                        vat_amount=Decimal("23.00"),
+                        gross_amount=Decimal("100.00"),
+                    )
+                ]
+            )
+
+    def test_rate_change_command(self):
+        first, second = self.invoice("100.00", "8"), self.invoice("50.00", "8")
+        paid = self.invoice("10.00", "8", status="PAID")
+        untouched = self.invoice("10.00", "23")
+
+        call_command(
+            "recompute_invoice_taxes", "--rate", "23", "--from-rate", "8", "--status", "ISSUED",
+            "--batch-size", "1", stdout=StringIO(),
+        )
+
+        for invoice in (first, second, paid, untouched):
+            invoice.refresh_from_db()
+        self.assertEqual((first.vat_amount, first.gross_amount), (Decimal("23.00"), Decimal("123.00")))
+        self.assertEqual((second.vat_amount, second.gross_amount), (Decimal("11.50"), Decimal("61.50")))
+        self.assertEqual((paid.vat_rate, paid.gross_amount), (Decimal("8.00"), Decimal("10.80")))
+        self.assertEqual(untouched.gross_amount, Decimal("12.30"))
+        self.customer.refresh_from_db()
+        self.assertEqual(self.customer.open_balance, Decimal("123.00") + Decimal("61.50") + Decimal("12.30"))
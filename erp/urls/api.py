@@ -2,12 +2,29 @@ from django.urls import include, path
 from rest_framework import routers
 
 from erp.views import (
+    AsyncProductListView,
+    AsyncWarehouseInventoryView,
+    AsyncWorkstationStatusView,
+    ATPCheckView,
+    BatchView,
     InventoryMoveView,
+    LaborSummaryView,
     ManufacturingOrderModelViewSet,
+    PriceListModelViewSet,
+    PriceQuoteView,
+    PriceRuleModelViewSet,
+    ProductionKPIViewSet,
+    ProductionTrendView,
     ProductModelViewSet,
+    ProductSourcesView,
     PurchaseOrderModelViewSet,
+    PurchaseOrderReceiveView,
+    ResponseCacheStatsView,
     SalesOrderModelViewSet,
+    SalesSummaryView,
+    SearchView,
     SupplierModelViewSet,
+    SupplierPerformanceView,
     WarehouseInventoryView,
     WarehouseModelViewSet,
     WorkstationModelViewSet,
@@ -32,15 +49,41 @@ erp_router.register(r"workstations", WorkstationModelViewSet, basename='workstat
 # ---------------------------------------------------
 erp_router.register(r"salesorders", SalesOrderModelViewSet)
 erp_router.register(r"purchaseorders", PurchaseOrderModelViewSet)
+erp_router.register(r"price-lists", PriceListModelViewSet)
+erp_router.register(r"price-rules", PriceRuleModelViewSet)
+
+# ---------------------------------------------------
+# Reporting & Analytics
+# ---------------------------------------------------
+erp_router.register(r"production-kpis", ProductionKPIViewSet)
 
 
 
 urlpatterns = [
     path("", include(erp_router.urls)),
+    path("products/<int:pk>/sources/", ProductSourcesView.as_view(), name="product-sources"),
     path("inventory/move/", InventoryMoveView.as_view(), name="inventory-move"),
+    path("inventory/receive/", PurchaseOrderReceiveView.as_view(), name="inventory-receive"),
     path(
         "warehouses/<int:pk>/inventory/",
         WarehouseInventoryView.as_view(),
         name="warehouse-inventory",
     ),
+    path("atp/check/", ATPCheckView.as_view(), name="atp-check"),
+    path("pricing/quote/", PriceQuoteView.as_view(), name="pricing-quote"),
+    path("search/", SearchView.as_view(), name="search"),
+    path("batch/", BatchView.as_view(), name="batch"),
+    path("cache/stats/", ResponseCacheStatsView.as_view(), name="cache-stats"),
+    path("production-trends/", ProductionTrendView.as_view(), name="production-trends"),
+    path("sales/summary/", SalesSummaryView.as_view(), name="sales-summary"),
+    path("supplier-performance/", SupplierPerformanceView.as_view(), name="supplier-performance"),
+    path("labor/summary/", LaborSummaryView.as_view(), name="labor-summary"),
+    # Async read endpoints, served without a worker thread under ASGI
+    path("async/products/", AsyncProductListView.as_view(), name="async-products"),
+    path(
+        "async/warehouses/<int:pk>/inventory/",
+        AsyncWarehouseInventoryView.as_view(),
+        name="async-warehouse-inventory",
+    ),
+    path("async/workstations/status/", AsyncWorkstationStatusView.as_view(), name="async-workstation-status"),
 ]
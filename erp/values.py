@@ -0,0 +1,182 @@
+"""Lean read-only list serialization for the hottest endpoints.
+
+``ValuesListMixin`` serves ``list`` from ``.values()`` rows instead of model
+instances: each column goes straight through its serializer field's
+``to_representation``, skipping instance construction, attribute lookup and
+the per-object ``Serializer.to_representation`` walk. To-many fields (nested
+serializers over reverse foreign keys, primary keys of many-to-many fields)
+are fetched with one ``.values()`` query each for the whole page. The output
+is the same as the serializer's.
+
+Lists whose fields cannot be built from rows this way (serializer methods,
+model properties, traversed sources, expansions) use the serializer.
+"""
+
+from collections import defaultdict
+from typing import Callable, NamedTuple, Optional, Union
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from rest_framework import serializers
+from rest_framework.relations import (
+    ManyRelatedField,
+    PrimaryKeyRelatedField,
+    RelatedField,
+)
+from rest_framework.response import Response
+
+from erp.fieldsets import SparseFieldsetMixin
+
+
+class Column(NamedTuple):
+    name: str
+    key: str  # Key of the .values() row
+    convert: Optional[Callable]  # None leaves the value as it is
+
+
+class Relation(NamedTuple):
+    name: str
+    fetch: Callable  # Primary keys of the page -> {primary key: [values]}
+
+
+def _column(model, name: str, field, annotations) -> Optional[Column]:
+    if isinstance(field, serializers.SerializerMethodField) or len(field.source_attrs) != 1:
+        return None
+    source = field.source_attrs[0]
+    if source in annotations:
+        return Column(name, source, field.to_representation)
+    try:
+        model_field = model._meta.get_field(source)
+    except FieldDoesNotExist:
+        return None
+    if not model_field.concrete or model_field.many_to_many:
+        return None
+    if isinstance(field, RelatedField):
+        if not isinstance(field, PrimaryKeyRelatedField) or field.pk_field is not None:
+            return None
+        if not model_field.target_field.primary_key:
+            return None
+        return Column(name, model_field.attname, None)
+    return Column(name, model_field.attname, field.to_representation)
+
+
+def _columns(model, fields: dict, annotations=()) -> Optional[list]:
+    columns = []
+    for name, field in fields.items():
+        if field.write_only:
+            continue
+        column = _column(model, name, field, annotations)
+        if column is None:
+            return None
+        columns.append(column)
+    return columns
+
+
+def _to_many(model, name: str, field, lookup) -> Optional[Relation]:
+    """Fetcher of a to-many field, from the prefetch lookup declared for it (if any)."""
+    queryset = None
+    if isinstance(lookup, Prefetch):
+        lookup, queryset = lookup.prefetch_through, lookup.queryset
+    lookup = lookup or field.source
+    try:
+        relation = model._meta.get_field(lookup)
+    except FieldDoesNotExist:
+        return None
+
+    if isinstance(field, ManyRelatedField) and relation.many_to_many and relation.concrete and queryset is None:
+        if not isinstance(field.child_relation, PrimaryKeyRelatedField) or field.child_relation.pk_field:
+            return None
+        through = relation.remote_field.through
+        source = through._meta.get_field(relation.m2m_field_name()).attname
+        target = through._meta.get_field(relation.m2m_reverse_field_name()).attname
+
+        def fetch_ids(ids):
+            grouped = defaultdict(list)
+            rows = through.objects.filter(**{f"{source}__in": ids}).order_by("pk").values_list(source, target)
+            for owner, value in rows:
+                grouped[owner].append(value)
+            return grouped
+
+        return Relation(name, fetch_ids)
+
+    if isinstance(field, serializers.ListSerializer) and relation.one_to_many:
+        child_model = relation.related_model
+        columns = _columns(child_model, field.child.fields)
+        if columns is None:
+            return None
+        owner = relation.field.attname
+        keys = list(dict.fromkeys([owner] + [column.key for column in columns]))
+        queryset = queryset if queryset is not None else child_model._default_manager.all()
+
+        def fetch_rows(ids):
+            grouped = defaultdict(list)
+            for row in queryset.filter(**{f"{owner}__in": ids}).values(*keys):
+                grouped[row[owner]].append(_render(row, columns))
+            return grouped
+
+        return Relation(name, fetch_rows)
+    return None
+
+
+def _render(row: dict, columns) -> dict:
+    item = {}
+    for name, key, convert in columns:
+        value = row[key]
+        item[name] = value if value is None or convert is None else convert(value)
+    return item
+
+
+class ValuesListMixin(SparseFieldsetMixin):
+    """Serves ``list`` from ``.values()`` rows when the (sparse) fields allow it."""
+
+    def values_plan(self, model) -> Optional[list]:
+        fieldset = self.sparse_fieldset()
+        if fieldset.expand:
+            return None
+        plan = []
+        for name, field in fieldset.serializer_fields.items():
+            if field.write_only or name not in fieldset.fields:
+                continue
+            entry: Optional[Union[Column, Relation]]
+            if isinstance(field, (serializers.ListSerializer, ManyRelatedField)):
+                entry = _to_many(model, name, field, self.field_prefetches.get(name))
+            else:
+                entry = _column(model, name, field, self.field_annotations)
+            if entry is None:
+                return None
+            plan.append(entry)
+        return plan
+
+    def values_rows(self, queryset, plan):
+        """The ``.values()`` queryset of the plan's columns, with the primary key."""
+        pk = queryset.model._meta.pk.attname
+        keys = [pk] + [entry.key for entry in plan if isinstance(entry, Column)]
+        return queryset.prefetch_related(None).values(*dict.fromkeys(keys))
+
+    def render_values(self, model, rows, plan) -> list:
+        pk = model._meta.pk.attname
+        relations = [entry for entry in plan if isinstance(entry, Relation)]
+        ids = [row[pk] for row in rows]
+        if relations and ids:
+            # Relations render as a lookup of the row's primary key in their fetched values
+            fetched = {relation.name: relation.fetch(ids) for relation in relations}
+            plan = [
+                Column(entry.name, pk, lambda value, grouped=fetched[entry.name]: grouped.get(value, []))
+                if isinstance(entry, Relation)
+                else entry
+                for entry in plan
+            ]
+        return [_render(row, plan) for row in rows]
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        plan = self.values_plan(queryset.model)
+        if plan is None:
+            return super().list(request, *args, **kwargs)
+
+        rows = self.values_rows(queryset, plan)
+        page = self.paginate_queryset(rows)
+        data = self.render_values(queryset.model, list(rows) if page is None else page, plan)
+        if page is not None:
+            return self.get_paginated_response(data)
+        return Response(data)
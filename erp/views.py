@@ -1,44 +1,100 @@
+import asyncio
+import hashlib
+from collections import defaultdict
+from dataclasses import asdict
+from decimal import Decimal
+
+from asgiref.sync import sync_to_async
 from django import forms
 from django.contrib.auth.decorators import login_required, permission_required
+from django.core.cache import cache
 from django.db import transaction
-from django.db.models import Count, Prefetch, Q, Sum
+from django.db.models import Count, Exists, Max, OuterRef, Prefetch, Q, Subquery, Sum
+from django.http import Http404
 from django.shortcuts import redirect, render, reverse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
 from django.views.generic.edit import CreateView
+from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters, generics, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.fields import DateTimeField
 from rest_framework.pagination import PageNumberPagination
+from rest_framework.permissions import IsAdminUser
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from erp.asyncapi import AsyncAPIView, json_response
+from erp.batch import run_batch
+from erp.caching import CachedResponseMixin, cache_stats, generations
+from erp.costing.labor import labor_summary, labor_summary_sql
+from erp.fieldsets import SparseFieldsetMixin
 from erp.forms import InvoiceForm, SalesOrderFormSet
+from erp.inventory.atp import OPEN_SALES_STATUSES, ATPLine, check_availability
+from erp.inventory.catalog import csv_rows, ndjson_rows, upsert_products
+from erp.inventory.receiving import ReceivingError, receive_purchase_order_items
+from erp.inventory.reservations import InsufficientStockError
 from erp.models import (
     Employee,
     Invoice,
     ManufacturingOrder,
+    PriceList,
+    PriceRule,
     Product,
     ProductInventory,
+    ProductionKPI,
     PurchaseOrder,
     QualityCheck,
     SalesOrder,
+    SalesOrderItem,
     Shift,
     Supplier,
     SupplierProduct,
+    SupplierSource,
     Warehouse,
     Workstation,
 )
 from erp.permissions import ExtendedDjangoModelPermission
+from erp.purchasing.sourcing import ranked_sources
+from erp.reporting.rollups import production_trend
+from erp.reporting.sales import sales_summary
+from erp.reporting.suppliers import supplier_performance
+from erp.sales.credit import CreditLimitExceededError
+from erp.sales.pricing import price_order, price_orders
+from erp.search import RankedSearchFilter, search
 from erp.serializers import (
+    ATPCheckSerializer,
+    BatchRequestSerializer,
+    CustomerSerializer,
     InventoryMoveSerializer,
+    LaborSummaryQuerySerializer,
     ManufacturingOrderSerializer,
+    PriceListSerializer,
+    PriceQuoteSerializer,
+    PriceRuleSerializer,
+    ProductionKPISerializer,
+    ProductionTrendQuerySerializer,
     ProductSerializer,
+    PurchaseOrderItemSerializer,
+    PurchaseOrderReceiveSerializer,
     PurchaseOrderSerializer,
     QualityCheckSerializer,
+    SalesOrderItemSerializer,
     SalesOrderSerializer,
+    SalesSummaryQuerySerializer,
+    SearchQuerySerializer,
+    SupplierPerformanceQuerySerializer,
     SupplierSerializer,
+    SupplierSourceSerializer,
+    WarehouseInventoryItemSerializer,
     WarehouseInventorySerializer,
     WarehouseSerializer,
     WorkshiftListSerializer,
     WorkstationSerializer,
+    WorkstationStatusQuerySerializer,
 )
+from erp.values import ValuesListMixin
 
 
 class SmallSizePagination(PageNumberPagination):
@@ -47,6 +103,72 @@ class SmallSizePagination(PageNumberPagination):
     max_page_size = 1000
 
 
+class ConditionalListMixin:
+    """
+    Answers conditional list requests (If-None-Match / If-Modified-Since) with
+    304 Not Modified before anything is serialized. The validators come from the
+    newest timestamp and the row count of each ``etag_timestamps`` path over the
+    filtered rows, so related rows shown in the list can be included, and from
+    the cache generations of ``cache_models`` for data no timestamp covers.
+    Deleting a row changes the ETag (through the count) but not Last-Modified.
+    """
+
+    etag_timestamps = ["updated_at"]
+
+    def validator_rows(self):
+        """Primary keys of the filtered list, without the annotations and prefetches of the page."""
+        return self.filter_queryset(self.queryset.all()).order_by().values("pk")
+
+    @staticmethod
+    def latest(model, pks, path) -> dict:
+        """Newest ``path`` value and its count; a reverse foreign key is read from its own table."""
+        name, _, rest = path.partition("__")
+        field = model._meta.get_field(name)
+        if rest and field.one_to_many:
+            rows = field.related_model._default_manager.filter(**{f"{field.field.name}__in": pks})
+            path = rest
+        else:
+            rows = model._default_manager.filter(pk__in=pks)
+        return rows.order_by().aggregate(latest=Max(path), rows=Count(path))
+
+    def list_validators(self, pks):
+        values = [
+            self.request.get_full_path(),
+            self.request.META.get("HTTP_ACCEPT", ""),
+            generations(getattr(self, "cache_models", ())),
+        ]
+        last_modified = None
+        for path in self.etag_timestamps:
+            row = self.latest(pks.model, pks, path)
+            values += [row["latest"].isoformat() if row["latest"] else None, row["rows"]]
+            if row["latest"] and (last_modified is None or row["latest"] > last_modified):
+                last_modified = row["latest"]
+        digest = hashlib.md5(repr(values).encode(), usedforsecurity=False).hexdigest()
+        return f'W/"{digest}"', last_modified
+
+    @staticmethod
+    def not_modified(request, etag, last_modified):
+        """The 304 response for a client whose copy is current, else None."""
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+        return get_conditional_response(request, etag=etag, last_modified=timestamp)
+
+    @staticmethod
+    def validator_headers(etag, last_modified) -> dict:
+        headers = {"ETag": etag}
+        if last_modified:
+            headers["Last-Modified"] = http_date(int(last_modified.timestamp()))
+        return headers
+
+    def list(self, request, *args, **kwargs):
+        etag, last_modified = self.list_validators(self.validator_rows())
+        response = self.not_modified(request, etag, last_modified)
+        if response is None:
+            response = super().list(request, *args, **kwargs)
+        for name, value in self.validator_headers(etag, last_modified).items():
+            response[name] = value
+        return response
+
+
 
 # ---------------------------------------------------
 # Product & Inventory Management System
@@ -88,7 +210,7 @@ class InventoryMoveView(APIView):
                     status=404,
                 )
 
-            if source_inventory.quantity < quantity:
+            if source_inventory.available_quantity < quantity:
                 return Response(
                     {"error": "Not enough quantity in the from warehouse"}, status=400
                 )
@@ -113,37 +235,148 @@ class InventoryMoveView(APIView):
         )
 
 
-class ProductModelViewSet(viewsets.ModelViewSet):
-    serializer_class = ProductSerializer
-    queryset = (
-        Product.objects.all()
-        .prefetch_related(
-            Prefetch(
-                "suppliers",
-                queryset=SupplierProduct.objects.filter(is_preferred=True),
-                to_attr="preferred_suppliers",
-            )
+class PurchaseOrderReceiveView(APIView):
+    """
+    API endpoint to receive purchase order lines at the dock. Accepts all received
+    lines of one or many purchase orders and books them into each order's warehouse.
+    """
+
+    def post(self, request, *args, **kwargs):
+        serializer = PurchaseOrderReceiveSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        quantities = defaultdict(int)
+        for line in serializer.validated_data["lines"]:
+            quantities[line["item"]] += line["quantity"]
+
+        try:
+            statuses = receive_purchase_order_items(quantities)
+        except ReceivingError as error:
+            return Response({"error": str(error)}, status=400)
+
+        return Response(
+            {
+                "received": len(quantities),
+                "purchase_orders": [
+                    {"id": order_id, "status": status} for order_id, status in sorted(statuses.items())
+                ],
+            }
         )
-        .annotate(total_quantity=Sum("inventory__quantity"))
-    )
+
+
+class ProductModelViewSet(
+    ConditionalListMixin, CachedResponseMixin, ValuesListMixin, viewsets.ModelViewSet
+):
+    serializer_class = ProductSerializer
+    etag_timestamps = ["updated_at", "inventory__updated_at", "sources__computed_at"]
+    cache_models = (Product, ProductInventory, SupplierProduct, SupplierSource, Supplier)
+    queryset = Product.objects.all()
+    field_prefetches = {
+        "warehouses": "warehouses",
+        "preferred_suppliers": Prefetch(
+            "suppliers",
+            queryset=SupplierProduct.objects.filter(is_preferred=True),
+            to_attr="preferred_suppliers",
+        ),
+    }
+    field_annotations = {
+        "total_quantity": Sum("inventory__quantity"),
+        "best_supplier": Subquery(
+            SupplierSource.objects.filter(product=OuterRef("pk"), rank=1).values("supplier_id")
+        ),
+        "best_supplier_cost": Subquery(
+            SupplierSource.objects.filter(product=OuterRef("pk"), rank=1).values("unit_cost")
+        ),
+    }
+    expandable_fields = {"inventory": WarehouseInventoryItemSerializer}
     pagination_class = SmallSizePagination
+    filter_backends = [DjangoFilterBackend, RankedSearchFilter]
+    search_entity = "products"
+    # Bodies read line by line instead of parsed whole
+    upsert_streams = {"application/x-ndjson": ndjson_rows, "text/csv": csv_rows}
+
+    @action(detail=False, methods=["patch"], url_path="bulk")
+    def bulk_upsert(self, request, *args, **kwargs):
+        """
+        Create or update products by sku from a JSON list, or streamed from an
+        NDJSON or CSV body. Returns the counts and the errors of rejected rows.
+        """
+        stream = self.upsert_streams.get(request.content_type.split(";")[0].strip())
+        if stream is not None:
+            rows = stream(request.stream or [])
+        else:
+            rows = request.data
+            if not isinstance(rows, list):
+                raise ValidationError({"non_field_errors": ["Expected a list of products"]})
+        return Response(asdict(upsert_products(rows)))
+
 
+class ProductSourcesView(APIView):
+    """
+    Ranked supplier sources of a product, best first, served from the sourcing cache.
+    """
+
+    def get(self, request, pk, *args, **kwargs):
+        serializer = SupplierSourceSerializer(ranked_sources(pk), many=True)
+        return Response(serializer.data)
 
-class SupplierModelViewSet(viewsets.ModelViewSet):
+
+class SupplierModelViewSet(CachedResponseMixin, ValuesListMixin, viewsets.ModelViewSet):
     serializer_class = SupplierSerializer
-    queryset = Supplier.objects.all().prefetch_related("products")
+    cache_models = (Supplier, SupplierProduct, Product)
+    queryset = Supplier.objects.all()
+    field_prefetches = {"products": "products"}
     pagination_class = SmallSizePagination
+    filter_backends = [DjangoFilterBackend, RankedSearchFilter]
+    search_entity = "suppliers"
 
 
-class WarehouseModelViewSet(viewsets.ModelViewSet):
+class WarehouseModelViewSet(
+    ConditionalListMixin, CachedResponseMixin, ValuesListMixin, viewsets.ModelViewSet
+):
     serializer_class = WarehouseSerializer
+    cache_models = (Warehouse, ProductInventory)
     queryset = Warehouse.objects.all()
+    expandable_fields = {"inventory": WarehouseInventoryItemSerializer}
     pagination_class = SmallSizePagination
 
 
-class WarehouseInventoryView(generics.RetrieveAPIView):
-    queryset = Warehouse.objects.all().prefetch_related("inventory")
+class WarehouseInventoryView(CachedResponseMixin, SparseFieldsetMixin, generics.RetrieveAPIView):
+    queryset = Warehouse.objects.all()
     serializer_class = WarehouseInventorySerializer
+    field_prefetches = {
+        "inventory": Prefetch("inventory", queryset=ProductInventory.objects.select_related("product"))
+    }
+    cache_models = (Warehouse, ProductInventory, Product)
+
+
+class ResponseCacheStatsView(APIView):
+    """
+    Hit and miss counts and the hit ratio of each endpoint served from the response cache.
+    """
+
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        return Response(cache_stats())
+
+
+class BatchView(APIView):
+    """
+    Runs several API calls in one round trip:
+    {"requests": [{"method", "path", "body", "headers"}], "concurrent": false}.
+    The batch is authenticated once and each sub-request is answered by its own
+    view as that user; the responses come back in order with their status,
+    headers and body. Read-only batches can run concurrently.
+    """
+
+    batchable = False
+
+    def post(self, request, *args, **kwargs):
+        serializer = BatchRequestSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        return Response({"responses": run_batch(request, data["requests"], concurrent=data["concurrent"])})
 
 
 # ---------------------------------------------------
@@ -151,37 +384,24 @@ class WarehouseInventoryView(generics.RetrieveAPIView):
 # ---------------------------------------------------
 
 
-class WorkstationModelViewSet(viewsets.ModelViewSet):
+class WorkstationModelViewSet(ConditionalListMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     serializer_class = WorkstationSerializer
-
-    def get_queryset(self):
-        """
-        Return different querysets based on the action.
-        """
-        # Check if the current action is 'list'
-        if self.action == 'list':
-            # Customize the queryset for the list action (for example, get all Workstations)
-            return Workstation.objects.all().prefetch_related(
-                Prefetch("shifts", queryset=Shift.objects.filter(
-                    Q(status="IN_PROGRESS") | Q(status="ABSENT")
-                )
-                )
-            ).annotate(
-                    total_shifts=Count("shifts"),
-                    total_shifts_in_progress=Count(
-                        "shifts", filter=Q(shifts__status="IN_PROGRESS")
-                    ),
-                    total_shifts_absent=Count(
-                        "shifts", filter=Q(shifts__status="ABSENT")
-                    ),
-            )
-        else:
-            # Default queryset for other actions (create, retrieve, etc.)
-            return Workstation.objects.all().prefetch_related(
-                Prefetch("shifts", queryset=Shift.objects.filter(
-                    Q(status="IN_PROGRESS") | Q(status="ABSENT")
-                ).select_related("employee").order_by("status", "end_time"))
-            )
+    etag_timestamps = ["updated_at", "shifts__updated_at"]
+    queryset = Workstation.objects.all()
+    # The list serializer shows the shift counts, the others the open shifts
+    field_prefetches = {
+        "shifts": Prefetch(
+            "shifts",
+            queryset=Shift.objects.filter(Q(status="IN_PROGRESS") | Q(status="ABSENT"))
+            .select_related("employee")
+            .order_by("status", "end_time"),
+        )
+    }
+    field_annotations = {
+        "total_shifts": Count("shifts"),
+        "total_shifts_in_progress": Count("shifts", filter=Q(shifts__status="IN_PROGRESS")),
+        "total_shifts_absent": Count("shifts", filter=Q(shifts__status="ABSENT")),
+    }
 
     def get_serializer_class(self):
         """
@@ -200,26 +420,433 @@ class WorkstationModelViewSet(viewsets.ModelViewSet):
 # ---------------------------------------------------
 
 
-class SalesOrderModelViewSet(viewsets.ModelViewSet):
+class SalesOrderModelViewSet(ValuesListMixin, viewsets.ModelViewSet):
     serializer_class = SalesOrderSerializer
     queryset = SalesOrder.objects.all()
+    expandable_fields = {"customer": CustomerSerializer, "items": SalesOrderItemSerializer}
+    filter_backends = [DjangoFilterBackend, RankedSearchFilter]
+    search_entity = "orders"
+
+    def perform_create(self, serializer):
+        try:
+            serializer.save()
+        except InsufficientStockError as error:
+            raise ValidationError({"status": [str(error)]})
+        except CreditLimitExceededError as error:
+            raise ValidationError({"total_amount": [str(error)]})
+
+    def perform_update(self, serializer):
+        try:
+            serializer.save()
+        except InsufficientStockError as error:
+            raise ValidationError({"status": [str(error)]})
+        except CreditLimitExceededError as error:
+            raise ValidationError({"total_amount": [str(error)]})
 
 
-class PurchaseOrderModelViewSet(viewsets.ModelViewSet):
+class PurchaseOrderModelViewSet(SparseFieldsetMixin, viewsets.ModelViewSet):
     serializer_class = PurchaseOrderSerializer
     queryset = PurchaseOrder.objects.all()
+    expandable_fields = {"warehouse": WarehouseSerializer, "items": PurchaseOrderItemSerializer}
 
 
-class QualityCheckSerializerModelViewSet(viewsets.ModelViewSet):
+class QualityCheckSerializerModelViewSet(SparseFieldsetMixin, viewsets.ModelViewSet):
     serializer_class = QualityCheckSerializer
     queryset = QualityCheck.objects.all()
     permission_classes = [ExtendedDjangoModelPermission]
 
 
-class ManufacturingOrderModelViewSet(viewsets.ModelViewSet):
+class ATPCheckView(APIView):
+    """
+    Available-to-promise check for order entry. Accepts ad-hoc lines
+    ({"items": [{"product", "quantity", "requested_date"}]}) and/or whole
+    sales orders ({"orders": [ids]}) and checks them all in one call.
+    """
+
+    def post(self, request, *args, **kwargs):
+        serializer = ATPCheckSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        groups = []
+        lines = [
+            ATPLine(item["product"], item["quantity"], item["requested_date"])
+            for item in data.get("items", [])
+        ]
+        if lines:
+            groups.append((None, lines))
+
+        order_lines = {}
+        order_items = SalesOrderItem.objects.filter(
+            sales_order_id__in=data.get("orders", [])
+        ).values_list(
+            "sales_order_id",
+            "product_id",
+            "quantity",
+            "sales_order__requested_delivery",
+            "sales_order__status",
+        )
+        for order_id, product_id, quantity, requested_date, status in order_items:
+            order_lines.setdefault(order_id, []).append(
+                ATPLine(product_id, quantity, requested_date, status in OPEN_SALES_STATUSES)
+            )
+        groups.extend(order_lines.items())
+
+        # One call for everything, so lines of different orders share the timelines
+        results = iter(check_availability([line for _, lines in groups for line in lines]))
+        response = []
+        for order_id, lines in groups:
+            checked = [next(results) for _ in lines]
+            response.append(
+                {
+                    "order": order_id,
+                    "is_available": all(result.is_available for result in checked),
+                    "lines": [
+                        {
+                            "product": result.product_id,
+                            "quantity": result.quantity,
+                            "requested_date": result.requested_date,
+                            "available": result.available,
+                            "is_available": result.is_available,
+                            "earliest_date": result.earliest_date,
+                        }
+                        for result in checked
+                    ],
+                }
+            )
+        return Response(response)
+
+
+class PriceListModelViewSet(SparseFieldsetMixin, viewsets.ModelViewSet):
+    serializer_class = PriceListSerializer
+    queryset = PriceList.objects.all()
+    pagination_class = SmallSizePagination
+
+
+class PriceRuleModelViewSet(SparseFieldsetMixin, viewsets.ModelViewSet):
+    serializer_class = PriceRuleSerializer
+    expandable_fields = {"price_list": PriceListSerializer}
+    queryset = PriceRule.objects.all().order_by("product", "price_list", "min_quantity")
+    pagination_class = SmallSizePagination
+    filterset_fields = ["product", "price_list", "is_active"]
+
+
+class PriceQuoteView(APIView):
+    """
+    Prices order lines from the customers' price lists, quantity breaks and
+    promotions. Accepts one order ({"customer", "items": [{"product", "quantity"}]})
+    and/or a batch ({"orders": [{"customer", "items"}]}) plus an optional "date",
+    and prices them all in one call.
+    """
+
+    def post(self, request, *args, **kwargs):
+        serializer = PriceQuoteSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        orders = [(order["customer"], order["items"]) for order in data.get("orders", [])]
+        if data.get("items"):
+            orders.insert(0, (data["customer"], data["items"]))
+        try:
+            priced = price_orders(
+                [
+                    (customer_id, [(item["product"], item["quantity"]) for item in items])
+                    for customer_id, items in orders
+                ],
+                on=data.get("date"),
+            )
+        except ValueError as error:
+            raise ValidationError(str(error))
+
+        return Response(
+            {
+                "orders": [
+                    {
+                        "customer": customer_id,
+                        "total": sum((line.line_total for line in lines), Decimal("0")),
+                        "lines": [
+                            {
+                                "product": line.product_id,
+                                "quantity": line.quantity,
+                                "list_price": line.list_price,
+                                "unit_price": line.unit_price,
+                                "discount_percentage": line.discount_percentage,
+                                "line_total": line.line_total,
+                                "rule": line.rule_id,
+                            }
+                            for line in lines
+                        ],
+                    }
+                    for (customer_id, _), lines in zip(orders, priced)
+                ]
+            }
+        )
+
+
+class ManufacturingOrderModelViewSet(SparseFieldsetMixin, viewsets.ModelViewSet):
     serializer_class = ManufacturingOrderSerializer
     queryset = ManufacturingOrder.objects.all()
-    filter_backends = [filters.OrderingFilter, filters.SearchFilter]
+    field_prefetches = {"steps": "steps"}
+    expandable_fields = {"target_warehouse": WarehouseSerializer}
+    filter_backends = [RankedSearchFilter, filters.OrderingFilter]
+    search_entity = "manufacturing_orders"
+
+
+class SearchView(APIView):
+    """
+    Typeahead search over products, customers, suppliers, sales and manufacturing orders:
+    ?q=<text>[&types=products,orders][&limit=10]. The entity types are
+    searched concurrently and each list is ranked best first.
+    """
+
+    def get(self, request, *args, **kwargs):
+        serializer = SearchQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        results = search(data["q"], types=data.get("types"), limit=data["limit"])
+        return Response({"query": data["q"], "results": results})
+
+
+# ---------------------------------------------------
+# Reporting & Analytics
+# ---------------------------------------------------
+
+
+class ProductionKPIViewSet(SparseFieldsetMixin, viewsets.ReadOnlyModelViewSet):
+    """Daily OEE per workstation, precomputed by the update_production_kpis task."""
+
+    serializer_class = ProductionKPISerializer
+    queryset = ProductionKPI.objects.filter(
+        employee__isnull=True, manufacturing_order__isnull=True
+    ).order_by("-date", "workstation")
+    filterset_fields = {"workstation": ["exact"], "date": ["exact", "gte", "lte"]}
+    pagination_class = SmallSizePagination
+
+
+class ProductionTrendView(APIView):
+    """
+    Production totals over time, read from the coarsest rollup grain that still
+    meets the requested resolution (e.g. ?resolution=7 00:00:00 for weekly points).
+    """
+
+    def get(self, request, *args, **kwargs):
+        serializer = ProductionTrendQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        grain, series = production_trend(
+            data["start"],
+            data["end"],
+            resolution=data.get("resolution"),
+            workstation_id=data.get("workstation"),
+            manufacturing_order_id=data.get("manufacturing_order"),
+        )
+        return Response({"grain": grain, "results": series})
+
+
+class SalesSummaryView(APIView):
+    """
+    Sales quantity, gross, discount and net from the monthly sales rollup, sliced by
+    customer, product, category and period (e.g. ?group_by=category,quarter) and
+    drilled down with the customer, product and category filters.
+    """
+
+    def get(self, request, *args, **kwargs):
+        serializer = SalesSummaryQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        results = sales_summary(
+            data["start"],
+            data["end"],
+            group_by=data["group_by"],
+            customer_id=data.get("customer"),
+            product_id=data.get("product"),
+            category=data.get("category"),
+        )
+        return Response({"results": results})
+
+
+class SupplierPerformanceView(APIView):
+    """
+    On-time rate, average days late, fill rate and spend per supplier and month
+    (or over the whole range with ?group_by=supplier), read from monthly aggregates.
+    """
+
+    def get(self, request, *args, **kwargs):
+        serializer = SupplierPerformanceQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        results = supplier_performance(
+            data["start"],
+            data["end"],
+            supplier_id=data.get("supplier"),
+            group_by=data["group_by"],
+        )
+        return Response({"results": results})
+
+
+class LaborSummaryView(APIView):
+    """
+    Labor hours and cost for payroll reports, grouped by employee, workstation,
+    manufacturing order and/or period (e.g. ?group_by=employee,month).
+    """
+
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        serializer = LaborSummaryQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        shifts = Shift.objects.all()
+        if "start" in data:
+            shifts = shifts.filter(shift_date__gte=data["start"])
+        if "end" in data:
+            shifts = shifts.filter(shift_date__lte=data["end"])
+
+        summarize = labor_summary_sql if data["engine"] == "sql" else labor_summary
+        return Response({"results": summarize(shifts, group_by=data["group_by"])})
+
+
+# ---------------------------------------------------
+# Async read endpoints (ASGI)
+# ---------------------------------------------------
+
+
+class AsyncProductListView(AsyncAPIView):
+    """
+    The product list of ``ProductModelViewSet`` (filters, search, ``?fields=``,
+    pagination, its ETag / 304 handling and response cache) read with the async
+    ORM. Lists the ``.values()`` path cannot build, such as
+    ``?expand=``, are answered by the sync view.
+    """
+
+    api_view = ProductModelViewSet
+    api_view_initkwargs = {"action_map": {"get": "list"}}
+
+    async def get(self, request, *args, **kwargs):
+        view = self.view
+        # Filters may validate their values against the database
+        queryset = await sync_to_async(lambda: view.filter_queryset(view.get_queryset()))()
+        plan = view.values_plan(queryset.model)
+        if plan is None:
+            return await self.sync_response(view.list)
+
+        etag, last_modified = await sync_to_async(lambda: view.list_validators(view.validator_rows()))()
+        headers = view.validator_headers(etag, last_modified)
+        response = view.not_modified(request, etag, last_modified)
+        if response is not None:
+            for name, value in headers.items():
+                response[name] = value
+            return response
+
+        key, data = await sync_to_async(view.cache_lookup)("list", request)
+        if data is not None:
+            return json_response(data, headers={**headers, "X-Cache": "HIT"})
+
+        async def render(rows):
+            return await sync_to_async(view.render_values)(queryset.model, rows, plan)
+
+        data = await self.paginate(request, view.values_rows(queryset, plan), render)
+        await cache.aset(key, data, view.cache_timeout)
+        return json_response(data, headers={**headers, "X-Cache": "MISS"})
+
+
+class AsyncWarehouseInventoryView(AsyncAPIView):
+    """
+    The stock of a warehouse as served by ``WarehouseInventoryView``, read with
+    the async ORM. Requests with ``?fields=`` or ``?expand=`` use the sync view.
+    """
+
+    api_view = WarehouseInventoryView
+
+    async def get(self, request, pk, *args, **kwargs):
+        fieldset = self.view.sparse_fieldset()
+        if fieldset.narrowed or fieldset.expand:
+            return await self.sync_response(self.view.retrieve, pk=pk)
+
+        try:
+            warehouse = await Warehouse.objects.values("id", "name", "location", "capacity", "manager").aget(pk=pk)
+        except Warehouse.DoesNotExist:
+            raise Http404("No Warehouse matches the given query.")
+        rows = (
+            ProductInventory.objects.filter(warehouse_id=pk)
+            .order_by("id")
+            .values("id", "quantity", "reserved_quantity", "product_id", "product__name")
+        )
+        inventory = [
+            {
+                "id": row["id"],
+                "quantity": row["quantity"],
+                "reserved_quantity": row["reserved_quantity"],
+                "product": {"id": row["product_id"], "name": row["product__name"]},
+            }
+            async for row in rows.aiterator()
+        ]
+        return json_response(
+            {
+                "id": warehouse["id"],
+                "name": warehouse["name"],
+                "inventory": inventory,
+                "location": warehouse["location"],
+                "capacity": warehouse["capacity"],
+                "manager": warehouse["manager"],
+                "total_product_quantity": sum(item["quantity"] for item in inventory) if inventory else None,
+            }
+        )
+
+
+class AsyncWorkstationStatusView(AsyncAPIView):
+    """
+    Status of the workstations, as a long poll. With ``?since=<cursor>`` it waits
+    up to ``?wait=`` seconds (25 by default) for a workstation or one of its
+    shifts to change and returns only the changed workstations; ``cursor`` in the response is the next ``since``.
+    Waiting holds no worker thread under ASGI.
+    """
+
+    api_view = WorkstationModelViewSet
+    api_view_initkwargs = {"action_map": {"get": "list"}}
+    fields = ["id", "name", "machine_id", "location", "status", "is_active", "updated_at"]
+    poll_interval = 1  # Seconds between checks for changes
+
+    async def get(self, request, *args, **kwargs):
+        serializer = WorkstationStatusQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        since = serializer.validated_data.get("since")
+
+        workstations = Workstation.objects.order_by("id")
+        if since is not None:
+            # A started or finished shift changes the in-progress count
+            changed_shifts = Shift.objects.filter(workstation=OuterRef("pk"), updated_at__gt=since)
+            workstations = workstations.filter(Q(updated_at__gt=since) | Exists(changed_shifts))
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + serializer.validated_data["wait"]
+            while loop.time() < deadline and not await workstations.aexists():
+                await asyncio.sleep(min(self.poll_interval, deadline - loop.time()))
+
+        rows = workstations.values(*self.fields).annotate(
+            total_shifts_in_progress=Count("shifts", filter=Q(shifts__status="IN_PROGRESS")),
+            shifts_updated_at=Max("shifts__updated_at"),
+        )
+        results = [row async for row in rows.aiterator()]
+        changes = [
+            timestamp
+            for row in results
+            for timestamp in (row["updated_at"], row.pop("shifts_updated_at"))
+            if timestamp is not None
+        ]
+        latest = max(changes, default=since)
+        timestamp = DateTimeField()
+        for row in results:
+            row["updated_at"] = timestamp.to_representation(row["updated_at"])
+        return json_response(
+            {
+                "cursor": timestamp.to_representation(latest) if latest else None,
+                "workstations": results,
+            }
+        )
 
 
 class SalesOrderCreateView(CreateView):
@@ -243,8 +870,14 @@ class SalesOrderCreateView(CreateView):
 
         total = 0
         if formset.is_valid():
+            lines = [
+                item_form
+                for item_form in formset.forms
+                if item_form.cleaned_data and not item_form.cleaned_data.get("DELETE")
+            ]
+            self.apply_price_list(form.cleaned_data["customer"], lines)
             total = 0
-            for item_form in formset.forms:
+            for item_form in lines:
                 # Example calculation for total amount, assuming quantity, unit_price, and discount_percentage exist
                 total += (
                     (
@@ -255,13 +888,18 @@ class SalesOrderCreateView(CreateView):
                     / 100
                 )
 
-            form.total_amount = total
-            form.created_by = self.request.user
-            self.object = form.save()  # Save the SalesOrder first
-            formset.instance = (
-                self.object
-            )  # Link SalesOrderItem to the saved SalesOrder
-            formset.save()  # Save the formset
+            form.instance.total_amount = total
+            form.instance.created_by = self.request.user
+            try:
+                with transaction.atomic():
+                    self.object = form.save()  # Save the SalesOrder first
+                    formset.instance = (
+                        self.object
+                    )  # Link SalesOrderItem to the saved SalesOrder
+                    formset.save()  # Save the formset, which reserves the lines of a confirmed order
+            except (InsufficientStockError, CreditLimitExceededError) as error:
+                form.add_error(None, str(error))
+                return self.render_to_response(self.get_context_data(form=form))
 
             return redirect(
                 reverse("salesorder-list")
@@ -269,6 +907,27 @@ class SalesOrderCreateView(CreateView):
         else:
             return self.render_to_response(self.get_context_data(form=form))
 
+    @staticmethod
+    def apply_price_list(customer, item_forms):
+        """Price the lines left without a unit price in one pricing call"""
+        unpriced = [
+            item_form for item_form in item_forms if item_form.cleaned_data.get("unit_price") is None
+        ]
+        if not unpriced:
+            return
+        priced = price_order(
+            customer.pk,
+            [
+                (item_form.cleaned_data["product"].pk, item_form.cleaned_data["quantity"])
+                for item_form in unpriced
+            ],
+        )
+        for item_form, line in zip(unpriced, priced):
+            item_form.cleaned_data["unit_price"] = line.unit_price
+            item_form.cleaned_data["discount_percentage"] = line.discount_percentage
+            item_form.instance.unit_price = line.unit_price
+            item_form.instance.discount_percentage = line.discount_percentage
+
 
 
 @login_required(login_url="/accounts/login/")
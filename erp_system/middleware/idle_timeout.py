@@ -1,6 +1,7 @@
 import logging
 from datetime import timedelta
 
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
 from django.conf import settings
 from django.shortcuts import redirect
 from django.utils import timezone
@@ -10,29 +11,58 @@ logger = logging.getLogger(__name__)
 class IdleTimeoutMiddleware:
     """
     Middleware to enforce automatic logout after a period of inactivity.
+    Runs natively under ASGI too, so async views are not moved onto a thread.
     """
 
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response):
         self.get_response = get_response
         self.timeout_minutes = getattr(settings, "IDLE_TIMEOUT", 15)
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def is_idle(self, user, last_touch, now) -> bool:
+        if not last_touch:
+            return False
+        last_touch_time = timezone.datetime.fromisoformat(last_touch)
+        if last_touch_time < now - timedelta(minutes=self.timeout_minutes):
+            logger.info(f"User {user} session expired due to inactivity.")
+            return True
+        return False
 
     def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
         if not request.user.is_authenticated:
             return self.get_response(request)
 
         try:
-            last_touch = request.session.get("last_touch")
             now = timezone.now()
-
-            if last_touch:
-                last_touch_time = timezone.datetime.fromisoformat(last_touch)
-                if last_touch_time < now - timedelta(minutes=self.timeout_minutes):
-                    logger.info(f"User {request.user} session expired due to inactivity.")
-                    request.session.flush()  # Clear session
-                    return redirect("/logout/")
+            if self.is_idle(request.user, request.session.get("last_touch"), now):
+                request.session.flush()  # Clear session
+                return redirect("/logout/")
 
             request.session["last_touch"] = now.isoformat()
         except Exception as e:
             logger.error(f"Error in IdleTimeoutMiddleware: {e}")
 
         return self.get_response(request)
+
+    async def __acall__(self, request):
+        user = await request.auser()
+        if not user.is_authenticated:
+            return await self.get_response(request)
+
+        try:
+            now = timezone.now()
+            if self.is_idle(user, await request.session.aget("last_touch"), now):
+                await request.session.aflush()  # Clear session
+                return redirect("/logout/")
+
+            await request.session.aset("last_touch", now.isoformat())
+        except Exception as e:
+            logger.error(f"Error in IdleTimeoutMiddleware: {e}")
+
+        return await self.get_response(request)
@@ -1,6 +1,7 @@
 import logging
 from time import time
 
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
 from django.conf import settings
 
 logger = logging.getLogger(__name__)
@@ -10,18 +11,39 @@ class LogSlowRequestsMiddleware:
     Middleware to enforce automatic logout after a period of inactivity.
     """
 
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response):
         self.get_response = get_response
         self.timeout_minutes = getattr(settings, "LOG_SLOW_TREASHHOLDp\_SECONDS", 15)
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def log(self, request, user, response, duration):
+        user = user if user.is_authenticated else "Anonymous"
+        logger.info(f"User: {user}, Method: {request.method}, Path: {request.path}, Status: {response.status_code}, Time: {duration:.3f}s")
 
     def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
         start_time = time()
 
         response = self.get_response(request)
 
         duration = time() - start_time
         if duration > self.timeout_minutes:
-            user = request.user if request.user.is_authenticated else "Anonymous"
-            logger.info(f"User: {user}, Method: {request.method}, Path: {request.path}, Status: {response.status_code}, Time: {duration:.3f}s")
+            self.log(request, request.user, response, duration)
+
+        return response
+
+    async def __acall__(self, request):
+        start_time = time()
+
+        response = await self.get_response(request)
+
+        duration = time() - start_time
+        if duration > self.timeout_minutes:
+            self.log(request, await request.auser(), response, duration)
 
         return response
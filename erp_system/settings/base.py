@@ -13,6 +13,8 @@ https://docs.djangoproject.com/en/5.1/ref/settings/
 import os
 from pathlib import Path
 
+from celery.schedules import crontab
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -33,6 +35,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "django_extensions",
     "rest_framework",
     "django_filters",
@@ -143,6 +146,21 @@ REST_FRAMEWORK = {
     ),
     "PAGE_SIZE": 50,
     "DEFAULT_FILTER_BACKENDS": ["django_filters.rest_framework.DjangoFilterBackend"],
+    "DEFAULT_RENDERER_CLASSES": [
+        "erp.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+    "DEFAULT_PARSER_CLASSES": [
+        "erp.parsers.FastJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ],
+}
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": os.getenv("CACHE_URL", "redis://redis:6379/1"),
+    }
 }
 EMAIL_BACKEND = "django.core.mail.backends.console.EmailBackend"
 EMAIL_HOST_USER = os.getenv("EMAIL_HOST_USER", "test@test.com")
@@ -152,3 +170,39 @@ CELERY_ACCEPT_CONTENT = ['application/json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = 'Europe/London'
+CELERY_BEAT_SCHEDULE = {
+    "mark-overdue-invoices": {
+        "task": "erp.tasks.mark_overdue_invoices",
+        "schedule": crontab(hour=6, minute=0),
+    },
+    # Recomputes only the days with new production logs
+    "update-production-kpis": {
+        "task": "erp.tasks.update_production_kpis",
+        "schedule": crontab(minute=15),
+    },
+    # Costs orders completed in the last 30 days; already costed, unchanged orders are skipped
+    "update-production-costs": {
+        "task": "erp.tasks.update_production_costs",
+        "schedule": crontab(hour=1, minute=0),
+    },
+    # Drafts purchase orders for short products, after the sources were re-ranked
+    "replenish-stock": {
+        "task": "erp.tasks.replenish_stock",
+        "schedule": crontab(hour=5, minute=0),
+    },
+    # Full re-rank; edits queue their own refresh, this catches on-time rates and missed tasks
+    "update-supplier-sources": {
+        "task": "erp.tasks.update_supplier_sources",
+        "schedule": crontab(hour=2, minute=0),
+    },
+    # Purchase order edits refresh their own months; this catches bulk loads and missed refreshes
+    "update-supplier-performance": {
+        "task": "erp.tasks.update_supplier_performance",
+        "schedule": crontab(hour=3, minute=0),
+    },
+    # Order edits refresh their own months; this catches bulk loads and missed refreshes
+    "rebuild-sales-rollups": {
+        "task": "erp.tasks.rebuild_sales_rollups",
+        "schedule": crontab(hour=4, minute=0),
+    },
+}
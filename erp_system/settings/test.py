@@ -6,3 +6,9 @@ DATABASES = {
         "NAME": BASE_DIR / "db.sqlite3", # type: ignore
     }
 }
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    }
+}